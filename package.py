@@ -31,11 +31,20 @@ requires = [
     "qt-6.9.1",
 ]
 
-build_requires = [
-    "cmake-3.26.5",
-    "gcc-11.5.0",
-    "ninja-1.11.1",
-]
+@early()
+def build_requires():
+    import os
+
+    requires = [
+        "cmake-3.26.5",
+        "gcc-11.5.0",
+        "ninja-1.11.1",
+    ]
+    # USD_BUILD_ALLOCATOR=jemalloc-5.3.0 등: PXR_MALLOC_LIBRARY용 allocator 패키지
+    allocator = os.environ.get("USD_BUILD_ALLOCATOR", "")
+    if allocator and not os.path.isabs(allocator):
+        requires.append(allocator)
+    return requires
 
 tools = [
     "usdcat",
@@ -46,18 +55,57 @@ tools = [
     "usdtree",
     "usdchecker",
     "usdGenSchema",
+    "usdplugindex",
+    "usdbench",
+    "usdlocalize",
 ]
 
 build_command = "python {root}/rezbuild.py {install}"
 
 def commands():
-    env.USD_ROOT = "{root}"
-    env.PXR_USD_LOCATION = "{root}"
-    env.CMAKE_PREFIX_PATH.prepend("{root}")
-    env.PATH.prepend("{root}/bin")
-    env.LD_LIBRARY_PATH.prepend("{root}/lib")
-    env.LIBRARY_PATH.prepend("{root}/lib")
-    env.CPATH.prepend("{root}/include")
-    env.PKG_CONFIG_PATH.prepend("{root}/lib/pkgconfig")
-    env.PYTHONPATH.prepend("{root}/lib/python")
-    env.PXR_PLUGINPATH_NAME.prepend("{root}/lib/usd")
+    import os
+
+    # 노드 로컬 사본(usdlocalize populate)이 이 설치 트리의 manifest와 일치하면 그쪽을 사용
+    # (사용 시각/사용 중 표시는 usdlocalize populate/exec가 관리)
+    root = this.root
+    try:
+        with open(os.path.join(this.root, ".usd_manifest.sha256")) as f:
+            local = os.path.join(os.environ.get("USD_LOCALIZE_DIR") or "/var/tmp/usd-localize",
+                                 f.read().strip()[:20])
+        if os.path.isfile(os.path.join(local, ".usd_localized")):
+            root = local
+    except OSError:
+        pass
+
+    env.USD_SHARED_ROOT = "{root}"
+    # strip된 바이너리의 debug 파일 (.build-id/xx/yyyy.debug, 모든 variant 공용)
+    if os.path.isdir(os.path.join(this.base, ".debug")):
+        env.USD_DEBUG_FILE_DIRECTORY = os.path.join(this.base, ".debug")
+    env.USD_ROOT = root
+    env.PXR_USD_LOCATION = root
+    env.CMAKE_PREFIX_PATH.prepend(root)
+    env.PATH.prepend(root + "/bin")
+    # PXR_MALLOC_LIBRARY allocator: 경로만 USD_MALLOC_LIBRARY로 노출하고, context의 모든
+    # 프로세스(DCC, 셸)에 주입되지 않도록 LD_PRELOAD는 USD_MALLOC_PRELOAD=1 일 때만
+    try:
+        with open(os.path.join(root, ".usd_malloc_preload")) as f:
+            preload = f.read().strip()
+        if os.path.isfile(preload):
+            env.USD_MALLOC_LIBRARY = preload
+            if os.environ.get("USD_MALLOC_PRELOAD", "") == "1":
+                env.LD_PRELOAD.prepend(preload)
+    except OSError:
+        pass
+    # USD_BUILD_RPATH 설치는 $ORIGIN RPATH로 라이브러리를 찾으므로 LD_LIBRARY_PATH 불필요
+    if not os.path.exists(os.path.join(root, ".usd_rpath_ok")):
+        env.LD_LIBRARY_PATH.prepend(root + "/lib")
+    env.LIBRARY_PATH.prepend(root + "/lib")
+    env.CPATH.prepend(root + "/include")
+    env.PKG_CONFIG_PATH.prepend(root + "/lib/pkgconfig")
+    env.PYTHONPATH.prepend(root + "/lib/python")
+    # Arnold USD 플러그인 root (usdplugindex.ARNOLD_PLUGIN_ROOTS): 설치 시 lib/usd/plugInfo.json에
+    # 병합되어 plugInfo.json이 없으면 등록하지 않음 (중복 등록 방지)
+    for sub in ("schema", "plugin"):
+        if os.path.exists(os.path.join(root, sub, "plugInfo.json")):
+            env.PXR_PLUGINPATH_NAME.prepend(root + "/" + sub)
+    env.PXR_PLUGINPATH_NAME.prepend(root + "/lib/usd")
@@ -4,21 +4,367 @@ usd 25.11 rezbuild.py - OpenUSD CMake direct build
 build_usd.py 대신 CMake 직접 빌드로 rez 패키지 의존성만 사용
 """
 import os
+import re
+import ast
 import sys
+import shlex
+import glob
+import json
+import time
 import shutil
+import socket
+import fcntl
+import errno
+import ctypes
+import struct
+import filecmp
+import hashlib
+import resource
+import tempfile
+import contextlib
 import subprocess
+import concurrent.futures
 import multiprocessing
 
+import rezbuild_telemetry
+
+# 패키지와 함께 설치되는 도구 (tools/<name>.py → bin/<name>)
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools")
+sys.path.insert(0, TOOLS_DIR)
+import usdbench  # noqa: E402
+import usdplugindex  # noqa: E402
+import usdlocalize  # noqa: E402
+
+# 빌드 디렉토리에 남기는 구성 상태 (incremental 빌드 판단용)
+BUILD_STATE_FILE = ".rezbuild_state.json"
+
+# 빌드 산출물에 영향을 주지 않는 CMake 변수: 값이 바뀌면 재구성만 하고 빌드 트리는 유지
+CONFIGURE_ONLY_CMAKE_VARS = {
+    "CMAKE_C_COMPILER_LAUNCHER",
+    "CMAKE_CXX_COMPILER_LAUNCHER",
+    "CMAKE_C_LINKER_LAUNCHER",
+    "CMAKE_CXX_LINKER_LAUNCHER",
+    "CMAKE_JOB_POOLS",
+    "CMAKE_JOB_POOL_COMPILE",
+    "CMAKE_JOB_POOL_LINK",
+}
+
+# distccd 기본 포트
+DISTCC_PORT = 3632
+
+# 멀티 variant driver용 job slot launcher (rezbuild_driver.py 참고)
+JOBSLOT_LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "rezbuild_jobslot.py")
+
+
+# job당 메모리 추정치 (MB): 무거운 hdSt/usdImaging/Boost.Python wrap TU, 대형 .so 링크 기준
+DEFAULT_COMPILE_JOB_MB = 1500
+DEFAULT_LINK_JOB_MB = 4000
+MEMORY_HISTORY_FILE = "memory_history.json"
+MEMORY_HISTORY_SAMPLES = 5
+MEMORY_SAMPLE_MIN_JOBS = {"compile": 50, "link": 1}  # 이보다 적게 실행된 role은 기록하지 않음
+
+# 의존성 탐색 캐시 (<cache root>/dep_cache.json) 와 CMake 초기 캐시 seed (<cache root>/cmake_seed/)
+DEP_CACHE_FILE = "dep_cache.json"
+CMAKE_SEED_DIR = "cmake_seed"
+CMAKE_CACHE_LINE_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_.+-]*):([A-Z]+)=(.*)$")
+CMAKE_SEED_INTERNAL_RE = re.compile(r"^(CMAKE_HAVE_|HAVE_)|^X11_LIB_X11_SOLO$")
+
+# 빌드 telemetry (단계별 시간/peak RSS + .ninja_log 분석)
+TELEMETRY_FILE = "build_telemetry.json"
+
+# 설치 결과 artifact store (USD_BUILD_ARTIFACT_STORE): <store>/<fingerprint>/{tree,meta.json}
+DEFAULT_ARTIFACT_STORE_SIZE = "200G"
+_ACTIVE_PHASES = []  # 진행 중인 telemetry 단계: 실행한 명령의 peak RSS 반영 대상
+
+# run_cmd 로그 분석: Ninja 진행률, 로그 줄 시각 prefix, 실패 요약에 남길 오류 줄
+NINJA_PROGRESS_RE = re.compile(r"^\[(\d+)/(\d+)\]")
+LOG_PREFIX_RE = re.compile(r"^\d\d:\d\d:\d\d\.\d{3} \+\s*[\d.]+s  ")
+ERROR_LINE_RE = re.compile(r"(\berror\b|\bError\b|undefined reference|fatal|"
+                           r"In function|required from|note:|^\s*\d*\s+\|)")
+
+
+def _tee_output(proc, log_path, record):
+    """자식 출력을 콘솔에는 그대로(driver가 Ninja 진행률을 읽음), 로그에는 시각과 함께 기록.
+    Ninja "[n/N]" 진행률은 진행 중인 단계 record와 <log>.progress 에 반영"""
+    progress_path = log_path + ".progress"
+    start = time.time()
+    last_report = 0.0
+    with open(log_path, "a", errors="replace") as log:
+        for raw in iter(proc.stdout.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            now = time.time()
+            log.write(f"{time.strftime('%H:%M:%S', time.localtime(now))}."
+                      f"{int(now % 1 * 1000):03d} +{now - start:9.1f}s  {line}")
+            match = NINJA_PROGRESS_RE.match(line)
+            if not match:
+                continue
+            done, total = int(match.group(1)), int(match.group(2))
+            if record is not None:
+                record["progress"] = [done, total]
+            if now - last_report >= 1 or done == total:
+                last_report = now
+                elapsed = now - start
+                eta = elapsed / done * (total - done) if done else None
+                with open(progress_path, "w") as f:
+                    json.dump({"done": done, "total": total, "elapsed_s": round(elapsed, 1),
+                               "eta_s": round(eta, 1) if eta is not None else None}, f)
+
+
+def _run_with_rusage(args, cwd=None, env=None, log_path=None):
+    """프로세스 실행 후 (returncode, rusage) 반환.
+    wait4 rusage의 ru_maxrss는 자식 트리에서 가장 큰 단일 프로세스의 peak RSS.
+    log_path: 출력을 콘솔과 로그 파일(줄마다 시각)에 함께 기록"""
+    record = _ACTIVE_PHASES[-1] if _ACTIVE_PHASES else None
+    if log_path:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "a") as log:
+            log.write(f"# {time.strftime('%Y-%m-%dT%H:%M:%S')} cwd={cwd}\n# {' '.join(args)}\n")
+        proc = subprocess.Popen(args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    else:
+        proc = subprocess.Popen(args, cwd=cwd, env=env)
+    try:
+        if log_path:
+            _tee_output(proc, log_path, record)
+            proc.stdout.close()
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    peak_mb = rusage.ru_maxrss // 1024  # Linux: KB
+    for active in _ACTIVE_PHASES:
+        active["peak_rss_mb"] = max(active["peak_rss_mb"], peak_mb)
+    return proc.returncode, rusage
+
+
+def summarize_failure(log_path, max_lines=40):
+    """로그에서 실패한 Ninja target과 compiler/CMake 오류 줄 추출 → [{"target", "errors"}]"""
+    failures = []
+    current = None
+    with open(log_path, "r", errors="replace") as f:
+        for raw in f:
+            # 로그 줄 앞의 "HH:MM:SS.mmm +     1.0s  " 제거
+            line = raw.split("s  ", 1)[1] if LOG_PREFIX_RE.match(raw) else raw
+            line = line.rstrip("\n")
+            if line.startswith("FAILED: "):
+                current = {"target": line[len("FAILED: "):].strip(), "command": None,
+                           "errors": []}
+                failures.append(current)
+                continue
+            if line.startswith("CMake Error"):
+                current = {"target": "(cmake configure)", "errors": [line]}
+                failures.append(current)
+                continue
+            if current is None:
+                continue
+            if current.get("command", "") is None:
+                current["command"] = line[:500]  # FAILED 다음 줄은 실패한 명령
+                continue
+            if NINJA_PROGRESS_RE.match(line) or line.startswith(("ninja: build stopped", "-- ")):
+                current = None
+            elif current["target"] == "(cmake configure)" or ERROR_LINE_RE.search(line):
+                if len(current["errors"]) < max_lines:
+                    current["errors"].append(line)
+    return failures
+
+
+def write_failure_summary(log_path, failures):
+    """<log>.failure.txt 기록 + 콘솔 출력 (실패 target별 오류 줄)"""
+    path = os.path.splitext(log_path)[0] + ".failure.txt"
+    lines = [f"{len(failures)} failed target(s), full log: {log_path}"]
+    for failure in failures:
+        lines.append("")
+        lines.append(f"FAILED: {failure['target']}")
+        if failure.get("command"):
+            lines.append(f"    $ {failure['command']}")
+        lines.extend(f"    {e}" for e in failure["errors"] or ["(no compiler error lines found)"])
+    text = "\n".join(lines) + "\n"
+    with open(path, "w") as f:
+        f.write(text)
+    print("=== Failure summary ===")
+    print(text, end="")
+    print(f"=== (saved to {path}) ===")
+    return path
 
-def run_cmd(cmd, cwd=None, env=None):
-    """명령 실행"""
-    print(f"[RUN] {cmd}  (cwd={cwd})")
-    subprocess.run(
-        ["bash", "-lc", cmd],
-        cwd=cwd,
-        env=env,
-        check=True,
-    )
+
+def run_cmd(cmd, cwd=None, env=None, log_path=None):
+    """명령 실행 → rusage 반환.
+
+    셸(bash -lc)을 거치지 않고 build()가 만든 env로 직접 실행 (로그인 프로필이 env를 바꾸거나
+    배너를 출력하지 않음). 문자열은 shlex로 나누므로 따옴표 인자는 그대로 동작.
+    log_path가 있으면 실패 시 실패 target/오류 요약을 <log>.failure.txt 로 남김"""
+    args = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+    print(f"[RUN] {' '.join(shlex.quote(a) for a in args)}  (cwd={cwd})")
+    returncode, rusage = _run_with_rusage(args, cwd=cwd, env=env, log_path=log_path)
+    if returncode != 0:
+        if log_path:
+            failures = summarize_failure(log_path)
+            if failures:
+                write_failure_summary(log_path, failures)
+            if _ACTIVE_PHASES:
+                _ACTIVE_PHASES[-1]["log"] = log_path
+                _ACTIVE_PHASES[-1]["failures"] = failures[:20]
+        raise subprocess.CalledProcessError(returncode, args)
+    return rusage
+
+
+# PXR 기능 플래그별 preflight 검사 항목 (None = 항상 검사)
+#   headers/files: 루트 기준 상대 경로 (glob 허용)
+#   libs: lib/lib64 아래 lib<name>*.so* 또는 lib<name>*.a
+#   cmake: lib/lib64/share 아래 cmake/<Name> 설정 디렉토리
+PREFLIGHT_REQUIREMENTS = {
+    None: [
+        {"root": "REZ_BOOST_ROOT", "headers": ["boost/version.hpp"]},
+        {"root": "REZ_TBB_ROOT", "headers": ["oneapi/tbb.h"], "libs": ["tbb"]},
+        {"root": "REZ_IMATH_ROOT", "headers": ["Imath/ImathVec.h"], "libs": ["Imath"],
+         "cmake": ["Imath"]},
+    ],
+    "PXR_ENABLE_PYTHON_SUPPORT": [
+        {"root": "REZ_PYTHON_ROOT", "headers": ["python3*/Python.h"], "libs": ["python3"]},
+    ],
+    "PXR_BUILD_IMAGING": [
+        {"root": "REZ_OPENSUBDIV_ROOT", "headers": ["opensubdiv/version.h"],
+         "libs": ["osdCPU", "osdGPU"]},
+    ],
+    "PXR_BUILD_USDVIEW": [
+        {"root": "REZ_PYSIDE6_ROOT", "files": ["bin/pyside6-uic"]},
+        {"root": "REZ_PYOPENGL_ROOT", "files": ["OpenGL/__init__.py"]},
+    ],
+    "PXR_BUILD_OPENIMAGEIO_PLUGIN": [
+        {"root": "REZ_OIIO_ROOT", "headers": ["OpenImageIO/imageio.h"],
+         "libs": ["OpenImageIO", "OpenImageIO_Util"]},
+    ],
+    "PXR_BUILD_OPENCOLORIO_PLUGIN": [
+        {"root": "REZ_OCIO_ROOT", "headers": ["OpenColorIO/OpenColorIO.h"],
+         "libs": ["OpenColorIO"]},
+    ],
+    "PXR_ENABLE_MATERIALX_SUPPORT": [
+        {"root": "REZ_MATERIALX_ROOT",
+         "headers": ["MaterialXCore/Document.h", "MaterialXFormat/Util.h",
+                     "MaterialXGenShader/ShaderGenerator.h",
+                     "MaterialXGenGlsl/GlslShaderGenerator.h", "MaterialXRender/Util.h"],
+         "libs": ["MaterialXCore", "MaterialXFormat", "MaterialXGenShader",
+                  "MaterialXGenGlsl", "MaterialXRender"],
+         "cmake": ["MaterialX"]},
+    ],
+    "PXR_ENABLE_OPENVDB_SUPPORT": [
+        {"root": "REZ_OPENVDB_ROOT", "headers": ["openvdb/openvdb.h"], "libs": ["openvdb"]},
+    ],
+    "PXR_ENABLE_PTEX_SUPPORT": [
+        {"root": "REZ_PTEX_ROOT", "headers": ["Ptexture.h"], "libs": ["Ptex"]},
+    ],
+    "PXR_BUILD_ALEMBIC_PLUGIN": [
+        {"root": "REZ_ALEMBIC_ROOT", "headers": ["Alembic/Abc/All.h"], "libs": ["Alembic"]},
+    ],
+}
+
+# 빌드 profile (USD_BUILD_PROFILE)
+# full: 워크스테이션용 전체 기능, farm: 렌더/캐시 생성 팜용 헤드리스 패키지
+#   (usd/usdGeom/usdShade/Alembic + Arnold procedural, imaging/Qt/GL/usdview 제외)
+DEFAULT_BUILD_PROFILE = "full"
+BUILD_PROFILES = {
+    "full": {},
+    "farm": {
+        "package": "usd_farm",
+        "description": "Universal Scene Description (OpenUSD), headless farm profile "
+                       "(no imaging/Qt/usdview) with Arnold procedural",
+        "cmake": {
+            "PXR_BUILD_IMAGING": "OFF",
+            "PXR_BUILD_USD_IMAGING": "OFF",
+            "PXR_BUILD_USDVIEW": "OFF",
+            "PXR_BUILD_OPENIMAGEIO_PLUGIN": "OFF",
+            "PXR_BUILD_OPENCOLORIO_PLUGIN": "OFF",
+            "PXR_ENABLE_MATERIALX_SUPPORT": "OFF",
+            "PXR_ENABLE_OPENVDB_SUPPORT": "OFF",
+            "PXR_ENABLE_PTEX_SUPPORT": "OFF",
+            "PXR_ENABLE_GL_SUPPORT": "OFF",
+            "PXR_BUILD_ALEMBIC_PLUGIN": "ON",
+        },
+        "arnold_cmake": {
+            "BUILD_PROCEDURAL": "ON",
+            "BUILD_RENDER_DELEGATE": "OFF",
+            "BUILD_NDR_PLUGIN": "OFF",
+            "BUILD_USD_IMAGING_PLUGIN": "OFF",
+            "BUILD_SCENE_INDEX_PLUGIN": "OFF",
+        },
+        # 설치되는 package.py에서 제외할 requires (패키지 family 이름) / tools
+        "drop_requires": ["oiio", "materialx", "opensubdiv", "ptex", "pyside6",
+                          "pyopengl", "libjpeg", "qt"],
+        "drop_tools": ["usdview", "usdrecord"],
+    },
+}
+
+# 최적화 모드 (USD_BUILD_OPT): release = CMake Release 기본값,
+# perf = LTO + CPU baseline + 빠른 링커 + split DWARF (USD_BUILD_LTO 등으로 개별 조정)
+# perf 빌드는 release 배포 트리를 덮어쓰지 않도록 별도 패키지 <name>_perf[_<baseline>]로 설치
+# (CPU baseline은 기본값 없이 USD_BUILD_CPU_BASELINE으로 명시, 이름에 포함)
+DEFAULT_BUILD_OPT = "release"
+BUILD_OPTS = ("release", "perf")
+PERF_PACKAGE_SUFFIX = "_perf"
+# USD_BUILD_LINKER=auto 선택 순서 (lld는 GCC LTO plugin을 지원하지 않아 LTO 시 제외)
+LINKER_PREFERENCE = ("mold", "lld", "gold")
+
+# 메모리 allocator (USD_BUILD_ALLOCATOR: rez 요청 예) jemalloc-5.3.0, 또는 .so 절대 경로)
+# → PXR_MALLOC_LIBRARY. rez 패키지 family별 라이브러리 후보
+ALLOCATOR_LIBRARIES = {
+    "jemalloc": ["libjemalloc.so"],
+    "tcmalloc": ["libtcmalloc_minimal.so", "libtcmalloc.so"],
+    "gperftools": ["libtcmalloc_minimal.so", "libtcmalloc.so"],
+    "mimalloc": ["libmimalloc.so"],
+}
+# allocator 경로를 담아 variant 루트에 생성 → commands()가 USD_MALLOC_LIBRARY로 노출하고,
+# USD_MALLOC_PRELOAD=1 인 환경에서만 LD_PRELOAD (context의 다른 프로그램/DCC에 주입하지 않음)
+# Python 프로세스는 libc malloc을 먼저 쓰므로 PXR_MALLOC_LIBRARY 링크만으로는 교체되지 않음
+MALLOC_PRELOAD_MARKER = ".usd_malloc_preload"
+
+# Unity(jumbo) 빌드 + precompiled header (USD_BUILD_UNITY): CMake target 패턴 → (batch 크기, PCH 헤더)
+# _* 는 Boost.Python wrap 모듈 (_usd, _usdGeom, _usdPhysics ...)
+# 기본 대상은 없음: 같은 target의 TU들이 TF_DEFINE_PRIVATE_TOKENS(_tokens)나 익명 namespace
+# helper를 각자 정의하므로 묶으면 재정의 오류가 남. USD_BUILD_UNITY_TARGETS로 확인한 target만
+# 지정하고 (충돌하는 TU는 USD_BUILD_UNITY_EXCLUDE), 아래 값은 지정된 target의 batch/PCH 기본값
+PCH_PYTHON_HEADERS = ("pxr/pxr.h", "pxr/external/boost/python.hpp", "pxr/base/tf/pyUtils.h",
+                      "pxr/base/tf/token.h", "<vector>", "<string>", "<map>")
+PCH_IMAGING_HEADERS = ("pxr/pxr.h", "pxr/base/tf/token.h", "pxr/base/vt/value.h",
+                       "pxr/base/gf/matrix4d.h", "pxr/usd/sdf/path.h", "<tbb/concurrent_hash_map.h>",
+                       "<vector>", "<string>", "<unordered_map>", "<memory>")
+UNITY_TARGET_SETTINGS = {
+    "_*": (8, PCH_PYTHON_HEADERS),
+    "hd": (16, PCH_IMAGING_HEADERS),
+    "hdSt": (16, PCH_IMAGING_HEADERS),
+    "hdsi": (16, PCH_IMAGING_HEADERS),
+    "usdImaging": (16, PCH_IMAGING_HEADERS),
+}
+# unity에 넣으면 깨지는 TU ("<target>/<파일 glob>", target 생략 시 모든 target)
+# module.cpp: TF_WRAP_MODULE이 익명 namespace 심볼을 정의해 다른 wrap TU와 충돌
+UNITY_EXCLUDE = ("module.cpp", "moduleDeps.cpp")
+UNITY_SCRIPT = "usd_unity.cmake"
+
+# USD CMake가 읽지 않는 변수 (log.txt "Manually-specified variables were not used")
+CMAKE_UNUSED_VARIABLES = {
+    "JPEG_ROOT": "USD itself does not look up libjpeg",
+    "OPENSUBDIV_ROOT_DIR": "OpenSubdiv is found through CMAKE_PREFIX_PATH",
+    "Qt6_DIR": "usdview only uses PySide6, not Qt6 CMake packages",
+    "TBB_ROOT_DIR": "TBB is found through Tbb_DIR / TBB_ROOT",
+}
+
+
+def _env_flag(name, default=False):
+    """환경변수 on/off 플래그 해석"""
+    val = os.environ.get(name)
+    if val is None or val == "":
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _cache_root():
+    """빌드 간 공유 캐시 루트 (compiler cache 등)"""
+    return os.environ.get("USD_BUILD_CACHE_ROOT") or \
+        os.path.join(os.path.expanduser("~"), ".cache", "usd-rezbuild")
 
 
 def clean_build_dir(path):
@@ -35,11 +381,2290 @@ def clean_build_dir(path):
                 os.remove(full)
 
 
-def clean_install_dir(path):
-    """설치 디렉토리 제거"""
+def reset_stage_dir(path):
+    """staging 디렉토리(DESTDIR) 초기화"""
     if os.path.isdir(path):
-        print(f"Removing install directory: {path}")
         shutil.rmtree(path)
+    os.makedirs(path)
+
+
+def _cmake_var_name(arg):
+    """-DNAME[:TYPE]=VALUE 인자의 NAME (정의가 아니면 None)"""
+    if not arg.startswith("-D") or "=" not in arg:
+        return None
+    return arg[2:].split("=", 1)[0].split(":", 1)[0]
+
+
+def _cmake_definitions(cmake_args):
+    """cmake 인자 목록에서 -DNAME[:TYPE]=VALUE 정의 추출"""
+    defs = {}
+    for arg in cmake_args:
+        name = _cmake_var_name(arg)
+        if name:
+            defs[name] = arg.split("=", 1)[1].strip("\"'")
+    return defs
+
+
+def build_profile():
+    """(profile 이름, 설정) - USD_BUILD_PROFILE, 기본 full"""
+    name = os.environ.get("USD_BUILD_PROFILE", "").strip() or DEFAULT_BUILD_PROFILE
+    if name not in BUILD_PROFILES:
+        sys.exit(f"Unknown USD_BUILD_PROFILE '{name}' "
+                 f"(available: {', '.join(sorted(BUILD_PROFILES))})")
+    return name, BUILD_PROFILES[name]
+
+
+def apply_cmake_overrides(cmake_args, overrides):
+    """-DNAME=VALUE 정의를 overrides 값으로 교체 (없는 변수는 추가)"""
+    remaining = dict(overrides)
+    result = []
+    for arg in cmake_args:
+        name = _cmake_var_name(arg)
+        if name in remaining:
+            arg = f"-D{name}={remaining.pop(name)}"
+        result.append(arg)
+    result.extend(f"-D{name}={value}" for name, value in remaining.items())
+    return result
+
+
+def build_opt():
+    """최적화 모드 - USD_BUILD_OPT, 기본 release"""
+    opt = os.environ.get("USD_BUILD_OPT", "").strip() or DEFAULT_BUILD_OPT
+    if opt not in BUILD_OPTS:
+        sys.exit(f"Unknown USD_BUILD_OPT '{opt}' (available: {', '.join(BUILD_OPTS)})")
+    return opt
+
+
+def cpu_baseline():
+    """perf 모드 -march 값 - USD_BUILD_CPU_BASELINE 필수 ('none'이면 ''), release 모드는 ''.
+    ISA 하한을 올린 바이너리가 구형 노드에서 SIGILL을 내지 않도록 기본값을 두지 않음"""
+    if build_opt() != "perf":
+        return ""
+    baseline = os.environ.get("USD_BUILD_CPU_BASELINE", "").strip()
+    if not baseline:
+        sys.exit("USD_BUILD_OPT=perf requires an explicit USD_BUILD_CPU_BASELINE "
+                 "(e.g. x86-64-v3 for AVX2-only farms, or 'none' for the generic ISA)")
+    return "" if baseline == "none" else baseline
+
+
+def package_name(profile):
+    """설치할 rez 패키지 이름: profile 패키지(usd, usd_farm),
+    perf 모드는 <이름>_perf[_<baseline>] (예: usd_perf_x86_64_v3)"""
+    name = profile.get("package") or os.environ.get("REZ_BUILD_PROJECT_NAME", "usd")
+    if build_opt() == "perf":
+        name += PERF_PACKAGE_SUFFIX
+        if cpu_baseline():
+            name += "_" + re.sub(r"\W", "_", cpu_baseline())
+    return name
+
+
+def build_flavor():
+    """기본값이 아닌 profile/최적화 모드 조합 (빌드 트리, telemetry 이력 분리용, 기본은 '')"""
+    parts = []
+    profile_name, _ = build_profile()
+    if profile_name != DEFAULT_BUILD_PROFILE:
+        parts.append(f"profile-{profile_name}")
+    opt = build_opt()
+    if opt != DEFAULT_BUILD_OPT:
+        parts.append(f"opt-{opt}")
+    return "_".join(parts)
+
+
+def resolve_allocator():
+    """USD_BUILD_ALLOCATOR → (rez 요청 또는 None, 라이브러리 경로), 미지정이면 (None, "")"""
+    value = os.environ.get("USD_BUILD_ALLOCATOR", "").strip()
+    if not value:
+        return None, ""
+    if os.path.isabs(value):
+        if not os.path.isfile(value):
+            sys.exit(f"USD_BUILD_ALLOCATOR: library not found: {value}")
+        return None, value
+    family = value.split("-", 1)[0]
+    root = os.environ.get(f"REZ_{family.upper()}_ROOT", "")
+    if not root:
+        sys.exit(f"USD_BUILD_ALLOCATOR={value}: REZ_{family.upper()}_ROOT not set "
+                 f"(the allocator package is not in the build environment)")
+    for libname in ALLOCATOR_LIBRARIES.get(family, [f"lib{family}.so"]):
+        for libdir in ("lib64", "lib"):
+            candidate = os.path.join(root, libdir, libname)
+            if os.path.isfile(candidate):
+                return value, candidate
+    sys.exit(f"USD_BUILD_ALLOCATOR={value}: no allocator library found under {root}")
+
+
+def write_malloc_preload(stage_root, allocator_lib):
+    """variant 루트에 MALLOC_PRELOAD_MARKER 기록"""
+    with open(os.path.join(stage_root, MALLOC_PRELOAD_MARKER), "w") as f:
+        f.write(allocator_lib + "\n")
+
+
+def malloc_preload(root):
+    """설치 트리 root의 LD_PRELOAD 대상 allocator 경로 (없으면 "")"""
+    try:
+        with open(os.path.join(root, MALLOC_PRELOAD_MARKER), "r") as f:
+            lib = f.read().strip()
+    except OSError:
+        return ""
+    return lib if os.path.isfile(lib) else ""
+
+
+def unity_config():
+    """unity/PCH 설정 (USD_BUILD_UNITY 꺼짐이면 None).
+
+    USD_BUILD_UNITY_TARGETS="hdSt:32 _usd*:4 usdImaging" 로 target 패턴/batch 크기 지정
+    (필수, batch 생략 시 UNITY_TARGET_SETTINGS 값 또는 8, 0이면 해당 target 제외),
+    USD_BUILD_UNITY_EXCLUDE="_usdPhysics/wrapParseUtils.cpp hdSt/materialX*.cpp" 는
+    UNITY_EXCLUDE에 추가, USD_BUILD_PCH=0 이면 unity만 사용.
+    pch_options: PCH target에만 붙는 compile 옵션 (ccache의 -fpch-preprocess 등)"""
+    if not _env_flag("USD_BUILD_UNITY"):
+        return None
+    targets = {}
+    for item in os.environ.get("USD_BUILD_UNITY_TARGETS", "").split():
+        pattern, _, batch = item.partition(":")
+        default_batch, headers = UNITY_TARGET_SETTINGS.get(pattern, (8, PCH_IMAGING_HEADERS))
+        if pattern.startswith("_") and pattern not in UNITY_TARGET_SETTINGS:
+            headers = PCH_PYTHON_HEADERS
+        batch = int(batch) if batch.isdigit() else default_batch
+        if batch > 0:
+            targets[pattern] = (batch, headers)
+    if not targets:
+        print("WARNING: USD_BUILD_UNITY set without USD_BUILD_UNITY_TARGETS, unity build disabled")
+        return None
+    exclude = list(UNITY_EXCLUDE) + os.environ.get("USD_BUILD_UNITY_EXCLUDE", "").split()
+    return {"targets": targets, "exclude": exclude, "pch": _env_flag("USD_BUILD_PCH", True),
+            "pch_options": []}
+
+
+def _cmake_regex(pattern):
+    """glob → CMake 정규식 (전체 일치, 따옴표 인자 안에서 쓰도록 '\\' 이중 escape)"""
+    return "^" + "".join(".*" if c == "*" else "." if c == "?" else
+                         ("\\\\" + c if c in ".+^$()[]{}|\\" else c) for c in pattern) + "$"
+
+
+def write_unity_script(build_path, unity):
+    """CMAKE_PROJECT_INCLUDE 스크립트 생성 → 경로 반환 (내용 해시가 파일 이름에 들어감).
+
+    project() 직후 include 되어 최상위 디렉토리 처리가 끝날 때(모든 target 생성 후)
+    target별 UNITY_BUILD/UNITY_BUILD_BATCH_SIZE/PRECOMPILE_HEADERS(+ pch_options)와 제외 TU의
+    SKIP_UNITY_BUILD_INCLUSION을 설정"""
+    lines = [
+        "# rezbuild.py 가 생성 (USD_BUILD_UNITY)",
+        "include_guard(GLOBAL)",
+        "function(_usd_rezbuild_collect_targets dir out)",
+        "    get_property(targets DIRECTORY \"${dir}\" PROPERTY BUILDSYSTEM_TARGETS)",
+        "    get_property(subdirs DIRECTORY \"${dir}\" PROPERTY SUBDIRECTORIES)",
+        "    foreach(sub IN LISTS subdirs)",
+        "        _usd_rezbuild_collect_targets(\"${sub}\" sub_targets)",
+        "        list(APPEND targets ${sub_targets})",
+        "    endforeach()",
+        "    set(${out} ${targets} PARENT_SCOPE)",
+        "endfunction()",
+        "",
+        "function(_usd_rezbuild_unity)",
+        "    _usd_rezbuild_collect_targets(\"${CMAKE_SOURCE_DIR}\" all_targets)",
+        "    foreach(target IN LISTS all_targets)",
+        "        get_target_property(type ${target} TYPE)",
+        "        if(NOT type MATCHES \"^(SHARED|MODULE|STATIC|OBJECT)_LIBRARY$\")",
+        "            continue()",
+        "        endif()",
+        "        set(batch \"\")",
+    ]
+    for pattern, (batch, headers) in unity["targets"].items():
+        lines += [
+            f"        if(batch STREQUAL \"\" AND target MATCHES \"{_cmake_regex(pattern)}\")",
+            f"            set(batch {batch})",
+        ]
+        if unity["pch"]:
+            quoted = " ".join(f'"$<$<COMPILE_LANGUAGE:CXX>:{h}>"' for h in headers)
+            lines.append(f"            set(pch {quoted})")
+        lines.append("        endif()")
+    lines += [
+        "        if(batch STREQUAL \"\")",
+        "            continue()",
+        "        endif()",
+        "        set_target_properties(${target} PROPERTIES",
+        "            UNITY_BUILD ON UNITY_BUILD_MODE BATCH UNITY_BUILD_BATCH_SIZE ${batch})",
+    ]
+    if unity["pch"]:
+        lines.append("        set_property(TARGET ${target} APPEND PROPERTY PRECOMPILE_HEADERS ${pch})")
+        for option in unity.get("pch_options", []):
+            lines.append("        set_property(TARGET ${target} APPEND PROPERTY COMPILE_OPTIONS "
+                         f"\"$<$<COMPILE_LANGUAGE:CXX>:{option}>\")")
+    lines += [
+        "        get_target_property(source_dir ${target} SOURCE_DIR)",
+        "        get_target_property(sources ${target} SOURCES)",
+        "        set(excluded \"\")",
+        "        foreach(src IN LISTS sources)",
+        "            get_filename_component(name \"${src}\" NAME)",
+    ]
+    for item in unity["exclude"]:
+        target_pattern, _, file_pattern = item.rpartition("/")
+        condition = f'name MATCHES "{_cmake_regex(file_pattern)}"'
+        if target_pattern:
+            condition = f'target MATCHES "{_cmake_regex(target_pattern)}" AND ' + condition
+        lines += [f"            if({condition})",
+                  "                list(APPEND excluded \"${src}\")",
+                  "            endif()"]
+    lines += [
+        "        endforeach()",
+        "        if(excluded)",
+        "            set_source_files_properties(${excluded} DIRECTORY \"${source_dir}\"",
+        "                PROPERTIES SKIP_UNITY_BUILD_INCLUSION ON)",
+        "        endif()",
+        "        message(STATUS \"rezbuild unity: ${target} (batch ${batch}, excluded: ${excluded})\")",
+        "    endforeach()",
+        "endfunction()",
+        "",
+        "cmake_language(DEFER DIRECTORY \"${CMAKE_SOURCE_DIR}\" CALL _usd_rezbuild_unity)",
+        "",
+    ]
+    text = "\n".join(lines)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(os.path.dirname(os.path.abspath(build_path)),
+                        f"{os.path.splitext(UNITY_SCRIPT)[0]}-{digest}.cmake")
+    if not os.path.isfile(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+    return path
+
+
+def build_jobs():
+    """빌드 병렬 job 수 (USD_BUILD_JOBS 또는 CPU 수)"""
+    jobs = os.environ.get("USD_BUILD_JOBS", "")
+    if jobs.isdigit() and int(jobs) > 0:
+        return int(jobs)
+    return multiprocessing.cpu_count()
+
+
+def _find_dep_files(root, patterns):
+    """루트 기준 glob 패턴별 존재 여부 검사 → 누락 목록"""
+    missing = []
+    for pattern in patterns:
+        if not glob.glob(os.path.join(root, pattern)) and \
+                not glob.glob(os.path.join(root, "include", pattern)):
+            missing.append(pattern)
+    return missing
+
+
+def _find_dep_libs(root, libs):
+    missing = []
+    for lib in libs:
+        found = False
+        for libdir in ("lib", "lib64"):
+            base = os.path.join(root, libdir, f"lib{lib}")
+            if glob.glob(base + "*.so*") or glob.glob(base + "*.a"):
+                found = True
+                break
+        if not found:
+            missing.append(f"lib{lib}")
+    return missing
+
+
+def _find_dep_cmake_dirs(root, packages):
+    missing = []
+    for pkg in packages:
+        found = False
+        for libdir in ("lib", "lib64", "share"):
+            cmake_dir = os.path.join(root, libdir, "cmake", pkg)
+            if glob.glob(os.path.join(cmake_dir, "*onfig.cmake")):
+                found = True
+                break
+        if not found:
+            missing.append(f"cmake/{pkg}")
+    return missing
+
+
+def _root_signature(root):
+    """의존 패키지 root의 stat 서명 (재릴리스하면 디렉토리가 새로 만들어져 바뀜)"""
+    try:
+        st = os.stat(root)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_ctime_ns]
+
+
+def load_dep_cache():
+    """의존성 탐색 결과 캐시 (<cache root>/dep_cache.json, 모든 variant 공유).
+    USD_BUILD_DEP_CACHE=0이면 매번 탐색하고 저장/seed도 하지 않음"""
+    path = os.path.join(_cache_root(), DEP_CACHE_FILE)
+    enabled = _env_flag("USD_BUILD_DEP_CACHE", True)
+    roots = {}
+    if enabled:
+        try:
+            with open(path, "r") as f:
+                roots = json.load(f).get("roots", {})
+        except (OSError, ValueError):
+            roots = {}
+    return {"path": path, "enabled": enabled, "roots": roots, "checked": {}, "dirty": set(),
+            "hits": 0, "misses": 0}
+
+
+def _dep_entry(cache, var, root):
+    """root의 캐시 항목. REZ_<PKG>_VERSION 이나 root stat이 바뀌었으면 비우고 다시 탐색"""
+    if root in cache["checked"]:
+        return cache["checked"][root]
+    sig = {"version": os.environ.get(var[:-len("_ROOT")] + "_VERSION", ""),
+           "stat": _root_signature(root)}
+    entry = cache["roots"].get(root)
+    if not entry or entry.get("sig") != sig:
+        if entry:
+            print(f"  dep cache: {var} changed (re-released?), probing again")
+        entry = {"sig": sig, "probes": {}}
+        cache["roots"][root] = entry
+        cache["dirty"].add(root)
+    cache["checked"][root] = entry
+    return entry
+
+
+def dep_probe(cache, var, candidates, kind="dir"):
+    """$var 기준 후보 상대 경로 중 처음 존재하는 절대 경로 ('' = 없음), 결과는 캐시"""
+    root = os.environ.get(var, "")
+    if not root:
+        return ""
+    entry = _dep_entry(cache, var, root)
+    key = f"{kind}:{'|'.join(candidates)}"
+    if key in entry["probes"]:
+        cache["hits"] += 1
+    else:
+        cache["misses"] += 1
+        test = os.path.isdir if kind == "dir" else os.path.exists
+        entry["probes"][key] = next(
+            (c for c in candidates if test(os.path.join(root, c))), "")
+        cache["dirty"].add(root)
+    rel = entry["probes"][key]
+    return os.path.join(root, rel) if rel else ""
+
+
+def save_dep_cache(cache):
+    """이번 빌드에서 바뀐 root 항목만 디스크 캐시에 병합 (동시 variant 빌드 대비 flock)"""
+    if not cache["enabled"] or not cache["dirty"]:
+        return
+    os.makedirs(os.path.dirname(cache["path"]), exist_ok=True)
+    with open(cache["path"] + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(cache["path"], "r") as f:
+                roots = json.load(f).get("roots", {})
+        except (OSError, ValueError):
+            roots = {}
+        for root in cache["dirty"]:
+            roots[root] = cache["roots"][root]
+        tmp = f"{cache['path']}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump({"roots": roots}, f, indent=1, sort_keys=True)
+        os.replace(tmp, cache["path"])
+    cache["dirty"] = set()
+
+
+def cmake_seed_key(cache, dep_vars, cmake_args, env):
+    """CMake 초기 캐시(seed) key: 의존 root별 version/stat + compiler + cmake 인자
+    (launcher, 설치 경로처럼 check 결과와 무관한 인자 제외)"""
+    exclude = CONFIGURE_ONLY_CMAKE_VARS | {"CMAKE_INSTALL_PREFIX"}
+    deps = {v: _dep_entry(cache, v, os.environ[v])["sig"] for v in dep_vars if os.environ.get(v)}
+    inputs = {"deps": deps, "compiler": _compiler_identity(env),
+              "cmake_args": [a for a in cmake_args if _cmake_var_name(a) not in exclude]}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+
+
+def harvest_cmake_seed(build_path, source_dir, key, explicit_vars):
+    """configure 후 CMakeCache.txt에서 다시 탐색할 필요 없는 결과를 seed로 저장.
+
+    - INTERNAL check 결과: HAVE_*, CMAKE_HAVE_* (check_include_file, pthread 등),
+      X11_LIB_X11_SOLO ("Looking for XOpenDisplay")
+    - find_library/find_path/find_package 결과 (FILEPATH/PATH, 빌드/소스 트리 밖의 실제 경로)
+    -D로 직접 넘긴 변수와 CMAKE_* (compiler/도구 탐색)는 제외"""
+    entries = []
+    local_prefixes = tuple(os.path.abspath(p) + os.sep for p in (build_path, source_dir))
+    with open(os.path.join(build_path, "CMakeCache.txt"), "r", errors="replace") as f:
+        for line in f:
+            match = CMAKE_CACHE_LINE_RE.match(line.rstrip("\n"))
+            if not match:
+                continue
+            var, var_type, value = match.groups()
+            if var in explicit_vars:
+                continue
+            if var_type == "INTERNAL":
+                if CMAKE_SEED_INTERNAL_RE.match(var):
+                    entries.append([var, var_type, value])
+            elif var_type in ("FILEPATH", "PATH") and not var.startswith("CMAKE_"):
+                if value and not value.endswith("NOTFOUND") and os.path.isabs(value) and \
+                        not (value + os.sep).startswith(local_prefixes) and os.path.exists(value):
+                    entries.append([var, var_type, value])
+    seed_dir = os.path.join(_cache_root(), CMAKE_SEED_DIR)
+    os.makedirs(seed_dir, exist_ok=True)
+    path = os.path.join(seed_dir, f"{key}.json")
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump({"entries": entries, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=1)
+    os.replace(tmp, path)
+    print(f"  CMake seed: {len(entries)} cached discovery result(s) -> {path}")
+    return len(entries)
+
+
+def write_cmake_seed(build_path, key):
+    """저장된 seed를 `cmake -C` 용 스크립트로 기록 → 경로 (없거나 경로가 사라졌으면 None)"""
+    path = os.path.join(_cache_root(), CMAKE_SEED_DIR, f"{key}.json")
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)["entries"]
+    except (OSError, ValueError, KeyError):
+        return None
+    stale = [var for var, var_type, value in entries
+             if var_type != "INTERNAL" and not os.path.exists(value)]
+    if stale:
+        print(f"  CMake seed {key} is stale ({stale[0]} no longer exists), not using it")
+        os.remove(path)
+        return None
+    script = os.path.join(build_path, "rezbuild_seed.cmake")
+    with open(script, "w") as f:
+        f.write(f"# rezbuild.py dependency discovery seed {key}\n")
+        for var, var_type, value in entries:
+            escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+            f.write(f'set({var} "{escaped}" CACHE {var_type} "rezbuild seed")\n')
+    print(f"  CMake seed: preloading {len(entries)} discovery result(s) ({key})")
+    return script
+
+
+def preflight_check(cmake_args):
+    """configure 전 의존 패키지 검사.
+
+    활성화된 PXR_* 기능이 필요로 하는 헤더/라이브러리/CMake 설정 디렉토리를
+    REZ_*_ROOT 아래에서 확인하고, 누락이 있으면 수 시간짜리 컴파일을 시작하기
+    전에 보고서를 출력하고 중단."""
+    defs = _cmake_definitions(cmake_args)
+    print("=== Preflight dependency check ===")
+
+    errors = []
+    for feature, reqs in PREFLIGHT_REQUIREMENTS.items():
+        if feature is not None and defs.get(feature, "OFF").upper() != "ON":
+            continue
+        label = feature or "core"
+        for req in reqs:
+            root_var = req["root"]
+            root = os.environ.get(root_var, "")
+            if not root or not os.path.isdir(root):
+                msg = f"{root_var} not set" if not root else f"{root_var} missing: {root}"
+                errors.append((label, msg))
+                print(f"  [MISS] {label}: {msg}")
+                continue
+            missing = (_find_dep_files(root, req.get("headers", []) + req.get("files", []))
+                       + _find_dep_libs(root, req.get("libs", []))
+                       + _find_dep_cmake_dirs(root, req.get("cmake", [])))
+            if missing:
+                for item in missing:
+                    errors.append((label, f"{root_var}: {item} not found under {root}"))
+                print(f"  [MISS] {label}: {root_var} -> {', '.join(missing)}")
+            else:
+                print(f"  [ OK ] {label}: {root_var}")
+
+    # 효과 없는 CMake 변수 경고
+    unused = [name for name in defs if name in CMAKE_UNUSED_VARIABLES]
+    if unused:
+        print("  Variables not read by the USD CMake project (no effect):")
+        for name in unused:
+            print(f"    -D{name}: {CMAKE_UNUSED_VARIABLES[name]}")
+
+    if errors:
+        print(f"=== Preflight FAILED: {len(errors)} missing item(s) ===")
+        for label, msg in errors:
+            print(f"  {label}: {msg}")
+        sys.exit(f"Preflight dependency check failed ({len(errors)} missing item(s))")
+    print("=== Preflight OK ===")
+
+
+def _cpu_seconds():
+    """자신 + 회수된 자식 프로세스의 누적 CPU 시간"""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+@contextlib.contextmanager
+def telemetry_phase(telemetry, name):
+    """빌드 단계 wall/CPU 시간, peak RSS를 telemetry에 기록"""
+    record = {"name": name, "peak_rss_mb": 0}
+    cpu_start = _cpu_seconds()
+    start = time.time()
+    _ACTIVE_PHASES.append(record)
+    try:
+        yield record
+    finally:
+        _ACTIVE_PHASES.remove(record)
+        record["wall_s"] = round(time.time() - start, 3)
+        record["cpu_s"] = round(_cpu_seconds() - cpu_start, 3)
+        telemetry["phases"].append(record)
+        print(f"  [{name}] {record['wall_s']:.1f}s wall, {record['cpu_s']:.1f}s CPU, "
+              f"peak RSS {record['peak_rss_mb']} MB")
+
+
+def new_telemetry():
+    return {
+        "package": os.environ.get("REZ_BUILD_PROJECT_NAME", "usd"),
+        "version": os.environ.get("REZ_BUILD_PROJECT_VERSION", ""),
+        "variant": os.environ.get("REZ_BUILD_VARIANT_SUBPATH", ""),
+        "host": socket.gethostname(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "status": "running",
+        "phases": [],
+        "ninja": {},
+        "ninja_log_marks": {},
+    }
+
+
+def write_telemetry(build_path, telemetry):
+    """build_telemetry.json 기록 + 캐시 루트에 이력 보관 (clean 빌드 후에도 비교 가능)"""
+    telemetry["finished"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for label, log_dir in (("usd", build_path),
+                           ("arnold-usd", os.path.join(build_path, "arnold-usd"))):
+        ninja = rezbuild_telemetry.analyze_ninja_log(
+            os.path.join(log_dir, ".ninja_log"),
+            mark=telemetry.get("ninja_log_marks", {}).get(label))
+        if ninja:
+            telemetry["ninja"][label] = ninja
+
+    variant_key = (telemetry["variant"] or "default").replace(os.sep, "_")
+    if telemetry.get("flavor"):
+        variant_key += f"-{telemetry['flavor']}"
+    history_dir = os.path.join(_cache_root(), "telemetry", variant_key)
+    if telemetry.get("unity") and telemetry.get("full_build") and telemetry["ninja"].get("usd"):
+        baseline = _unity_baseline(history_dir)
+        if baseline:
+            telemetry["unity"]["baseline"] = baseline["started"]
+            telemetry["unity"]["savings"] = rezbuild_telemetry.library_savings(
+                baseline["ninja"]["usd"], telemetry["ninja"]["usd"],
+                list(telemetry["unity"]["targets"]))
+            rezbuild_telemetry.print_unity_savings(telemetry["unity"])
+        else:
+            print("  unity: no earlier full non-unity build in telemetry history to compare with")
+
+    os.makedirs(build_path, exist_ok=True)
+    path = os.path.join(build_path, TELEMETRY_FILE)
+    with open(path, "w") as f:
+        json.dump(telemetry, f, indent=2)
+
+    os.makedirs(history_dir, exist_ok=True)
+    stamp = telemetry["started"].replace(":", "").replace("-", "")
+    shutil.copy(path, os.path.join(history_dir, f"{stamp}.json"))
+    print(f"Build telemetry: {path}")
+    print(f"  compare: python rezbuild_telemetry.py compare <before.json> {path}")
+
+
+def _unity_baseline(history_dir):
+    """telemetry 이력 중 가장 최근의 unity 없는 전체 빌드 (unity 절감량 비교 기준)"""
+    for name in sorted(glob.glob(os.path.join(history_dir, "*.json")), reverse=True):
+        try:
+            with open(name, "r") as f:
+                past = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if past.get("status") == "success" and past.get("full_build") and \
+                not past.get("unity") and past.get("ninja", {}).get("usd"):
+            return past
+    return None
+
+
+def _available_memory_mb():
+    """MemAvailable (MB), /proc/meminfo가 없으면 물리 메모리 전체"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+
+def _memory_history_path():
+    return os.path.join(_cache_root(), MEMORY_HISTORY_FILE)
+
+
+def load_memory_history():
+    """이전 빌드에서 기록한 job peak RSS (label → 최근 MB 샘플 목록)"""
+    try:
+        with open(_memory_history_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _history_samples(history, label):
+    """label의 role별 peak RSS 샘플 {"compile": [...], "link": [...]}
+    (예전 형식: 단일 목록 = 전체 job 최대값 → link 샘플로 취급)"""
+    entry = history.get(label, {})
+    if isinstance(entry, list):
+        entry = {"link": entry}
+    return entry
+
+
+def job_rss_log(log_dir, name):
+    """job slot launcher가 job별 peak RSS를 기록할 파일 (USD_BUILD_JOB_RSS=0 이면 '')"""
+    if not _env_flag("USD_BUILD_JOB_RSS", default=True):
+        return ""
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, f"{name}.job_rss")
+    if os.path.isfile(path):
+        os.remove(path)
+    return path
+
+
+def record_peak_rss(label, rss_log, roles=("compile", "link")):
+    """job slot launcher가 기록한 job별 RSS("<role> <KB>")에서 role별 최대값을 기록
+    (다음 빌드의 compile/link job 추정치로 사용). 반환: {role: peak MB}"""
+    if not rss_log or not os.path.isfile(rss_log):
+        return {}
+    peaks, counts = {}, {}
+    with open(rss_log, "r") as f:
+        for line in f:
+            role, _, kb = line.partition(" ")
+            if role in roles and kb.strip().isdigit():
+                peaks[role] = max(peaks.get(role, 0), int(kb) // 1024)  # Linux: KB
+                counts[role] = counts.get(role, 0) + 1
+    # 몇 개 TU만 다시 컴파일한 incremental 빌드는 compile 추정치를 대표하지 못함
+    peaks = {role: mb for role, mb in peaks.items()
+             if counts[role] >= MEMORY_SAMPLE_MIN_JOBS.get(role, 1)}
+    if not peaks:
+        return {}
+    print(f"  Peak job RSS ({label}): " +
+          ", ".join(f"{role} {mb} MB" for role, mb in sorted(peaks.items())))
+    history = load_memory_history()
+    entry = _history_samples(history, label)
+    for role, mb in peaks.items():
+        entry[role] = (entry.get(role, []) + [mb])[-MEMORY_HISTORY_SAMPLES:]
+    history[label] = entry
+    path = _memory_history_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return peaks
+
+
+def memory_budget_mb():
+    """이 variant 빌드가 쓸 수 있는 메모리 (MB).
+    rezbuild_driver.py가 동시 variant 수로 나눈 예산을 USD_BUILD_MEMORY_MB 로 넘기며,
+    지금의 MemAvailable이 더 작으면 그 값 사용"""
+    avail_mb = _available_memory_mb()
+    budget = os.environ.get("USD_BUILD_MEMORY_MB")
+    return min(avail_mb, int(budget)) if budget else avail_mb
+
+
+def _job_mb(var, samples, default):
+    """job 1개 메모리 추정치: 환경변수 > 기록된 peak RSS 최대값 + 10% > 기본값"""
+    if os.environ.get(var):
+        return int(os.environ[var]), "env"
+    if samples:
+        return int(max(samples) * 1.1), "history"
+    return default, "default"
+
+
+def plan_parallelism(label, max_jobs):
+    """메모리 예산과 job당 메모리 추정치로 compile/link 동시 실행 수 결정.
+
+    compile: min(max_jobs, 예산 / compile job MB)
+    link:    min(compile, 예산 / link job MB)
+    job MB는 USD_BUILD_COMPILE_JOB_MB / USD_BUILD_LINK_JOB_MB, 없으면 이전 빌드에서
+    role별로 기록한 peak RSS, 그것도 없으면 기본 추정치"""
+    budget_mb = memory_budget_mb()
+    samples = _history_samples(load_memory_history(), label)
+    compile_mb, compile_src = _job_mb("USD_BUILD_COMPILE_JOB_MB", samples.get("compile"),
+                                      DEFAULT_COMPILE_JOB_MB)
+    link_mb, link_src = _job_mb("USD_BUILD_LINK_JOB_MB", samples.get("link"),
+                                DEFAULT_LINK_JOB_MB)
+
+    compile_jobs = max(1, min(max_jobs, budget_mb // max(compile_mb, 1)))
+    link_jobs = max(1, min(compile_jobs, budget_mb // max(link_mb, 1)))
+    print(f"=== Parallelism ({label}): {compile_jobs} compile / {link_jobs} link jobs "
+          f"(memory budget {budget_mb} MB, ~{compile_mb} MB/compile ({compile_src}), "
+          f"~{link_mb} MB/link ({link_src}), max {max_jobs}) ===")
+    return {"compile": compile_jobs, "link": link_jobs}
+
+
+def job_pool_args(parallelism, quoted=True):
+    """Ninja job pool CMake 인자 (link job을 compile과 별도로 제한)"""
+    pools = f"compile={parallelism['compile']};link={parallelism['link']}"
+    if quoted:
+        pools = f'"{pools}"'
+    return [
+        f"-DCMAKE_JOB_POOLS={pools}",
+        "-DCMAKE_JOB_POOL_COMPILE=compile",
+        "-DCMAKE_JOB_POOL_LINK=link",
+    ]
+
+
+def _gcc_major(env):
+    """빌드에 사용할 GCC major 버전 (확인 실패 시 0)"""
+    try:
+        out = subprocess.run([env.get("CXX", "g++"), "-dumpversion"], env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             universal_newlines=True).stdout
+        return int(out.strip().split(".")[0])
+    except (OSError, ValueError):
+        return 0
+
+
+def linker_flags(name, env):
+    """링커 선택 플래그 (사용할 수 없으면 None)"""
+    path = env.get("PATH")
+    if name == "mold":
+        exe = shutil.which("mold", path=path)
+        if not exe:
+            return None
+        if _gcc_major(env) >= 12:
+            return ["-fuse-ld=mold"]
+        # GCC 11은 -fuse-ld=mold 미지원: mold가 제공하는 ld 래퍼 디렉토리를 -B로 지정
+        libexec = os.path.join(os.path.dirname(os.path.dirname(exe)), "libexec", "mold")
+        return [f"-B{libexec}"] if os.path.isfile(os.path.join(libexec, "ld")) else None
+    tool = {"gold": "ld.gold", "lld": "ld.lld", "bfd": "ld.bfd"}.get(name)
+    if tool and shutil.which(tool, path=path):
+        return [f"-fuse-ld={name}"]
+    return None
+
+
+def optimization_flags(opt, env, link_jobs):
+    """(compile flags, link flags, 요약) - perf 모드와 USD_BUILD_LINKER 반영"""
+    compile_flags = []
+    link_flags = []
+    info = {"opt": opt}
+    perf = opt == "perf"
+
+    baseline = cpu_baseline() if perf else ""
+    if baseline:
+        compile_flags.append(f"-march={baseline}")
+        info["cpu_baseline"] = baseline
+
+    lto = perf and _env_flag("USD_BUILD_LTO", default=True)
+    if lto:
+        # LTO 병렬도: link job pool이 동시에 돌리는 link 수로 전체 job 수를 나눔
+        lto_jobs = os.environ.get("USD_BUILD_LTO_JOBS", "")
+        lto_jobs = int(lto_jobs) if lto_jobs.isdigit() and int(lto_jobs) > 0 else \
+            max(1, build_jobs() // max(1, link_jobs))
+        compile_flags.append("-flto")
+        link_flags.append(f"-flto={lto_jobs}")
+        info["lto_jobs"] = lto_jobs
+
+    linker = os.environ.get("USD_BUILD_LINKER", "auto" if perf else "").strip()
+    if linker == "auto":
+        candidates = [n for n in LINKER_PREFERENCE if not (lto and n == "lld")]
+        linker = next((n for n in candidates if linker_flags(n, env)), "")
+    if linker:
+        if lto and linker == "lld":
+            sys.exit("USD_BUILD_LINKER=lld cannot link GCC LTO objects; "
+                     "use mold or gold, or set USD_BUILD_LTO=0")
+        flags = linker_flags(linker, env)
+        if flags is None:
+            sys.exit(f"USD_BUILD_LINKER={linker}: linker not found in PATH")
+        link_flags.extend(flags)
+        info["linker"] = linker
+
+    if perf and _env_flag("USD_BUILD_SPLIT_DWARF", default=True):
+        # 디버그 정보는 .dwo로 분리해 링커가 처리할 양을 줄임
+        compile_flags += ["-g", "-gsplit-dwarf"]
+        if info.get("linker") in ("gold", "lld", "mold"):
+            link_flags.append("-Wl,--gdb-index")
+        info["split_dwarf"] = True
+    return compile_flags, link_flags, info
+
+
+def compile_flag_args(compile_flags, link_flags, quoted=True):
+    """CMAKE_<LANG>_FLAGS / CMAKE_<KIND>_LINKER_FLAGS 인자"""
+    def value(flags):
+        text = " ".join(flags)
+        return f'"{text}"' if quoted else text
+
+    args = []
+    if compile_flags:
+        args += [f"-DCMAKE_C_FLAGS={value(compile_flags)}",
+                 f"-DCMAKE_CXX_FLAGS={value(compile_flags)}"]
+    if link_flags:
+        args += [f"-DCMAKE_{kind}_LINKER_FLAGS={value(link_flags)}"
+                 for kind in ("SHARED", "MODULE", "EXE")]
+    return args
+
+
+def config_fingerprint(cmake_args, dep_roots, exclude=()):
+    """CMake 인자 + 의존 패키지 루트로 구성 fingerprint 계산 (exclude 변수 제외)"""
+    args = [arg for arg in cmake_args if _cmake_var_name(arg) not in exclude]
+    payload = json.dumps({"cmake_args": args, "dep_roots": dep_roots}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_build_state(build_path):
+    """이전 configure 상태 읽기 (없거나 손상되면 빈 dict)"""
+    state_file = os.path.join(build_path, BUILD_STATE_FILE)
+    if not os.path.isfile(state_file):
+        return {}
+    try:
+        with open(state_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_build_state(build_path, state):
+    """configure 성공 후 상태 기록"""
+    state_file = os.path.join(build_path, BUILD_STATE_FILE)
+    tmp = state_file + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, state_file)
+
+
+def _print_state_diff(old_state, cmake_args, dep_roots):
+    """fingerprint 변경 원인 출력"""
+    old_args = old_state.get("cmake_args", [])
+    for arg in old_args:
+        if arg not in cmake_args:
+            print(f"  - {arg}")
+    for arg in cmake_args:
+        if arg not in old_args:
+            print(f"  + {arg}")
+    old_roots = old_state.get("dep_roots", {})
+    for var in sorted(set(old_roots) | set(dep_roots)):
+        if old_roots.get(var, "") != dep_roots.get(var, ""):
+            print(f"  {var}: {old_roots.get(var, '') or '(not set)'}"
+                  f" -> {dep_roots.get(var, '') or '(not set)'}")
+
+
+def prepare_build_dir(build_path, cmake_args, dep_roots, clean_requested):
+    """incremental 빌드 판단: clean/configure 필요 여부 반환.
+
+    - clean 요청 또는 fingerprint 변경 → 빌드 트리 삭제 후 재구성
+    - launcher 등 CONFIGURE_ONLY_CMAKE_VARS 만 변경 → 빌드 트리 유지, 재구성
+    - fingerprint 동일 + build.ninja 존재 → configure 생략, ninja가 실패 지점부터 재개
+    """
+    fingerprint = config_fingerprint(cmake_args, dep_roots,
+                                     exclude=CONFIGURE_ONLY_CMAKE_VARS)
+    configure_fingerprint = config_fingerprint(cmake_args, dep_roots)
+    state = load_build_state(build_path)
+    has_tree = os.path.isfile(os.path.join(build_path, "build.ninja"))
+
+    if clean_requested:
+        print("=== Clean build requested ===")
+        need_clean = True
+    elif not state:
+        if has_tree:
+            print("=== No configure state found, starting clean build ===")
+        need_clean = True
+    elif state.get("fingerprint") != fingerprint:
+        print("=== Configuration fingerprint changed, starting clean build ===")
+        _print_state_diff(state, cmake_args, dep_roots)
+        need_clean = True
+    else:
+        need_clean = False
+
+    if need_clean:
+        clean_build_dir(build_path)
+    os.makedirs(build_path, exist_ok=True)
+
+    need_configure = need_clean or not has_tree
+    if not need_configure and state.get("configure_fingerprint") != configure_fingerprint:
+        print("=== Launcher settings changed, reconfiguring in place ===")
+        _print_state_diff(state, cmake_args, dep_roots)
+        need_configure = True
+    if not need_configure:
+        print(f"=== Incremental build: configuration unchanged ({fingerprint[:12]}) ===")
+    return fingerprint, configure_fingerprint, need_configure
+
+
+def setup_compiler_cache(env, source_path, build_path):
+    """ccache/sccache compiler launcher 설정.
+
+    USD_BUILD_COMPILER_CACHE=ccache|sccache|auto 로 활성화.
+    8개 variant가 같은 캐시 디렉토리를 공유하며, ccache는 base_dir/nohashdir로
+    variant별 빌드 경로(build/python-3.x/...) 차이가 캐시 키에 들어가지 않도록 함.
+    반환: {"tool", "exe", "stats_log"} 또는 None"""
+    choice = os.environ.get("USD_BUILD_COMPILER_CACHE", "").strip().lower()
+    if choice in ("", "0", "off", "none", "false"):
+        return None
+
+    candidates = ("ccache", "sccache") if choice == "auto" else (choice,)
+    tool = exe = None
+    for candidate in candidates:
+        exe = shutil.which(candidate, path=env.get("PATH"))
+        if exe:
+            tool = candidate
+            break
+    if not tool:
+        print(f"WARNING: compiler cache '{choice}' not found in PATH, building without it")
+        return None
+
+    cache_dir = os.environ.get("USD_BUILD_COMPILER_CACHE_DIR") or \
+        os.path.join(_cache_root(), tool)
+    cache_size = os.environ.get("USD_BUILD_COMPILER_CACHE_SIZE", "50G")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    stats_log = ""
+    if tool == "ccache":
+        # 소스/빌드 경로의 공통 상위를 base_dir로 → 절대경로가 상대경로로 치환됨
+        base_dir = os.path.commonpath([os.path.abspath(source_path),
+                                       os.path.abspath(build_path)])
+        if base_dir == os.sep:
+            base_dir = os.path.dirname(os.path.abspath(source_path))
+        # variant 빌드별 통계: 이번 빌드의 컴파일 결과만 남도록 초기화
+        stats_log = os.path.join(build_path, "ccache_stats.log")
+        if os.path.isfile(stats_log):
+            os.remove(stats_log)
+        env["CCACHE_DIR"] = cache_dir
+        env["CCACHE_MAXSIZE"] = cache_size
+        env["CCACHE_BASEDIR"] = base_dir
+        env["CCACHE_NOHASHDIR"] = "1"
+        env["CCACHE_COMPILERCHECK"] = "content"
+        env["CCACHE_SLOPPINESS"] = "include_file_ctime,include_file_mtime"
+        env["CCACHE_STATSLOG"] = stats_log
+        print(f"=== Compiler cache: ccache ({exe}) dir={cache_dir} base_dir={base_dir} ===")
+    else:
+        env["SCCACHE_DIR"] = cache_dir
+        env["SCCACHE_CACHE_SIZE"] = cache_size
+        print(f"=== Compiler cache: sccache ({exe}) dir={cache_dir} ===")
+        print("  NOTE: sccache does not rewrite absolute paths; "
+              "cross-variant hits need identical build paths")
+        subprocess.run([exe, "--zero-stats"], env=env, stdout=subprocess.DEVNULL)
+
+    return {"tool": tool, "exe": exe, "stats_log": stats_log}
+
+
+def _parse_distcc_host(spec):
+    """distcc host 항목 → dict, 전역 옵션("--randomize", "--localslots=N", "+zeroconf")은 None.
+    TCP "host[:port][/slots][,options]", ssh "[user]@host[/slots][:distccd 경로][,options]" 형식"""
+    if spec.startswith(("-", "+")):
+        return None
+    host_part, _, options = spec.partition(",")
+    user, at, rest = host_part.rpartition("@")
+    if at:
+        rest, _, command = rest.partition(":")
+        name, _, slots = rest.partition("/")
+        port = ""
+    else:
+        command = ""
+        rest, _, slots = rest.partition("/")
+        name, _, port = rest.partition(":")
+    local = not at and name == "localhost"
+    return {
+        "spec": spec,
+        "host": name,
+        "user": user,
+        "port": int(port) if port.isdigit() else DISTCC_PORT,
+        "command": command,
+        "slots": int(slots) if slots.isdigit() else (2 if local else 4),
+        "options": [o for o in options.split(",") if o],
+        "ssh": bool(at),
+        "local": local,
+    }
+
+
+def _format_distcc_host(host):
+    """_parse_distcc_host 결과 → DISTCC_HOSTS 항목"""
+    if host["local"]:
+        spec = f"localhost/{host['slots']}"
+    elif host["ssh"]:
+        spec = f"{host['user']}@{host['host']}/{host['slots']}"
+        if host["command"]:
+            spec += f":{host['command']}"
+    else:
+        spec = host["host"]
+        if host["port"] != DISTCC_PORT:
+            spec += f":{host['port']}"
+        spec += f"/{host['slots']}"
+    return ",".join([spec] + host["options"])
+
+
+def distcc_local_options(global_options, local_jobs):
+    """DISTCC_HOSTS 전역 옵션: --localslots/--localslots_cpp를 local_jobs 이하로 제한
+    (사용자가 더 작게 지정했으면 그 값), 나머지(--randomize 등)는 그대로"""
+    limits = {"--localslots": local_jobs, "--localslots_cpp": local_jobs}
+    options = []
+    for option in global_options:
+        name, _, value = option.partition("=")
+        if name in limits:
+            if value.isdigit() and int(value) > 0:
+                limits[name] = min(limits[name], int(value))
+        else:
+            options.append(option)
+    return [f"{name}={value}" for name, value in limits.items()] + options
+
+
+def local_slot_dir(path, jobs):
+    """jobs개 slot lock 파일을 가진 디렉토리 (rezbuild_driver.py 없이 빌드할 때 job slot 예산)"""
+    if os.path.isdir(path) and \
+            len([n for n in os.listdir(path) if n.startswith("slot.")]) == jobs:
+        return path
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    for i in range(jobs):
+        open(os.path.join(path, f"slot.{i:03d}"), "w").close()
+    return path
+
+
+def _host_reachable(host, port, timeout):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def setup_distributed_compile(env, cache, local_jobs, build_path):
+    """distcc로 컴파일을 팜 노드에 분산.
+
+    USD_BUILD_DISTCC_HOSTS="node01/16 node02/16 127.0.0.1/8" 로 활성화 (distcc host 문법,
+    "user@host" ssh 항목과 "--randomize" 같은 전역 옵션 포함).
+    전처리는 로컬에서 하고(pump 모드 ",cpp" 옵션 제거) 컴파일만 원격 실행하며, 링크는
+    distcc를 거치지 않으므로 로컬 link job pool이 그대로 적용됨. 연결되지 않는 host는
+    제외하고, 남는 host가 없으면 로컬 빌드로 진행. "localhost"는 daemon 없이 로컬 실행,
+    "127.0.0.1"은 로컬 distccd를 통해 실행 (한 머신에서 분산 경로 검증용).
+    ccache와 함께 쓰면 CCACHE_PREFIX로 cache miss만 distcc로 보냄.
+
+    compile pool이 원격 slot 수로 늘어나도 로컬에서 실행되는 단계는 local_jobs(메모리 계획의
+    compile 병렬도)로 제한: distcc 전처리와 localhost/fallback 컴파일은 --localslots(_cpp)
+    (DISTCC_DIR lock이라 variant 간 공유), ccache 전처리는 CCACHE_PREFIX_CPP job slot
+    launcher (driver의 전역 예산, 없으면 build_path/_local_slots).
+    반환: {"exe", "hosts", "unreachable", "slots", "log"} 또는 None"""
+    specs = os.environ.get("USD_BUILD_DISTCC_HOSTS", "").split()
+    if not specs:
+        return None
+    exe = shutil.which("distcc", path=env.get("PATH"))
+    if not exe:
+        print("WARNING: USD_BUILD_DISTCC_HOSTS set but distcc not found in PATH, "
+              "compiling locally")
+        return None
+    if cache and cache["tool"] != "ccache":
+        print(f"WARNING: distcc cannot be chained behind {cache['tool']}, compiling locally")
+        return None
+
+    timeout = float(os.environ.get("USD_BUILD_DISTCC_TIMEOUT") or 2)
+    hosts, unreachable, global_options = [], [], []
+    for spec in specs:
+        host = _parse_distcc_host(spec)
+        if host is None:
+            if spec.startswith("+"):
+                print(f"WARNING: distcc {spec} ignored (hosts must be listed explicitly)")
+            else:
+                global_options.append(spec)
+            continue
+        if "cpp" in host["options"]:
+            print(f"  distcc {host['host']}: pump mode disabled, preprocessing stays local")
+            host["options"].remove("cpp")
+        if not (host["local"] or host["ssh"]) and \
+                not _host_reachable(host["host"], host["port"], timeout):
+            print(f"WARNING: distcc host {host['host']}:{host['port']} unreachable, skipping")
+            unreachable.append(spec)
+            continue
+        hosts.append(host)
+    remote = [h for h in hosts if not h["local"]]
+    if not remote:
+        print("WARNING: no distcc host reachable, compiling locally")
+        return None
+
+    # 슬롯 lock을 variant 빌드 간에 공유 → host별 동시 컴파일 수가 전체에서 slots로 제한됨
+    distcc_dir = os.environ.get("USD_BUILD_DISTCC_DIR") or os.path.join(_cache_root(), "distcc")
+    os.makedirs(distcc_dir, exist_ok=True)
+    log = os.path.join(distcc_dir, f"distcc-{os.getpid()}.log")
+    host_specs = [_format_distcc_host(h) for h in hosts]
+    env["DISTCC_HOSTS"] = " ".join(distcc_local_options(global_options, local_jobs) + host_specs)
+    env["DISTCC_DIR"] = distcc_dir
+    env["DISTCC_FALLBACK"] = "1"  # 원격 실패 시 로컬에서 다시 컴파일
+    env["DISTCC_LOG"] = log
+    env["DISTCC_VERBOSE"] = "0"
+    env.pop("DISTCC_POTENTIAL_HOSTS", None)
+    if cache:
+        env["CCACHE_PREFIX"] = exe
+        if not env.get("USD_BUILD_JOBSERVER"):
+            env["USD_BUILD_JOBSERVER"] = local_slot_dir(
+                os.path.join(build_path, "_local_slots"), local_jobs)
+        env["CCACHE_PREFIX_CPP"] = " ".join([sys.executable, JOBSLOT_LAUNCHER, "--role", "cpp"])
+
+    slots = sum(h["slots"] for h in hosts)
+    print(f"=== Distributed compile: distcc ({exe}) {len(remote)} remote host(s), "
+          f"{slots} slot(s): {env['DISTCC_HOSTS']} ===")
+    return {"exe": exe, "hosts": host_specs, "unreachable": unreachable,
+            "slots": slots, "log": log}
+
+
+def report_distributed_compile(distcc):
+    """distcc 로그에서 원격 실패 후 로컬로 다시 컴파일한 건수 집계"""
+    if not distcc:
+        return None
+    fallbacks = 0
+    if os.path.isfile(distcc["log"]):
+        with open(distcc["log"], "r", errors="replace") as f:
+            fallbacks = sum(1 for line in f
+                            if "failed to distribute" in line or "running locally" in line)
+        os.remove(distcc["log"])
+    print(f"=== Distributed compile: {fallbacks} local fallback(s) ===")
+    return {"hosts": distcc["hosts"], "unreachable": distcc["unreachable"],
+            "slots": distcc["slots"], "fallbacks": fallbacks}
+
+
+def compiler_launcher_args(cache, quoted=True, distcc=None):
+    """compiler/linker launcher CMake 인자.
+
+    job slot launcher를 앞에 두어 job별 peak RSS를 role(compile/link)별로 기록하고
+    (USD_BUILD_JOB_RSS), USD_BUILD_JOBSERVER (rezbuild_driver.py) 가 있으면
+    여러 variant의 컴파일/링크가 하나의 전역 job 예산을 나눠 쓰도록 하며,
+    compiler cache가 있으면 그 뒤에 연결. distcc는 cache가 있으면 CCACHE_PREFIX로,
+    없으면 launcher로 연결하며 원격 컴파일은 distcc slot이 제한하므로 job slot을 쓰지 않음.
+    quoted: 셸 문자열용 따옴표 처리"""
+    compile_launcher = []
+    link_launcher = []
+    if os.environ.get("USD_BUILD_JOBSERVER") or _env_flag("USD_BUILD_JOB_RSS", default=True):
+        if not distcc:
+            compile_launcher += [sys.executable, JOBSLOT_LAUNCHER, "--role", "compile"]
+        link_launcher += [sys.executable, JOBSLOT_LAUNCHER, "--role", "link"]
+    if cache:
+        compile_launcher.append(cache["exe"])
+    elif distcc:
+        compile_launcher.append(distcc["exe"])
+
+    args = []
+    for var, launcher in (("COMPILER_LAUNCHER", compile_launcher),
+                          ("LINKER_LAUNCHER", link_launcher)):
+        if not launcher:
+            continue
+        value = ";".join(launcher)
+        if quoted:
+            value = f'"{value}"'
+        args.append(f"-DCMAKE_C_{var}={value}")
+        args.append(f"-DCMAKE_CXX_{var}={value}")
+    return args
+
+
+def report_compiler_cache(cache, env):
+    """variant 빌드 종료 시 hit/miss 통계 출력 (ccache는 카운터 dict 반환)"""
+    if not cache:
+        return None
+    print(f"=== Compiler cache statistics ({cache['tool']}) ===")
+    if cache["tool"] == "ccache" and os.path.isfile(cache["stats_log"]):
+        # stats_log: 컴파일 1건마다 "# <file>" 다음 줄에 결과 카운터가 기록됨
+        counts = {}
+        with open(cache["stats_log"], "r", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    counts[line] = counts.get(line, 0) + 1
+        direct = counts.get("direct_cache_hit", 0)
+        preprocessed = counts.get("preprocessed_cache_hit", 0)
+        miss = counts.get("cache_miss", 0)
+        total = direct + preprocessed + miss
+        rate = 100.0 * (direct + preprocessed) / total if total else 0.0
+        print(f"  hits: {direct + preprocessed} (direct {direct}, preprocessed {preprocessed})")
+        print(f"  misses: {miss}")
+        print(f"  hit rate: {rate:.1f}% of {total} cacheable compilations")
+        others = {k: v for k, v in counts.items()
+                  if k not in ("direct_cache_hit", "preprocessed_cache_hit", "cache_miss")}
+        for key in sorted(others):
+            print(f"  {key}: {others[key]}")
+        return counts
+    subprocess.run([cache["exe"], "--show-stats"], env=env)
+    return None
+
+
+def _parse_size(text):
+    """'200G', '512M', '1T', 바이트 정수 → 바이트"""
+    text = text.strip().upper().rstrip("B")
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tree_digest(root):
+    """디렉토리 트리 내용 해시 (상대 경로 + 파일 내용 + 심볼릭 링크 대상)"""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in (".git", "__pycache__"))
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, root)
+            if os.path.islink(path):
+                digest.update(f"L {rel} {os.readlink(path)}\n".encode("utf-8"))
+            else:
+                digest.update(f"F {rel} {_file_sha256(path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _compiler_identity(env):
+    """CXX 경로 + 버전 문자열"""
+    cxx = env.get("CXX") or shutil.which("g++", path=env.get("PATH")) or "g++"
+    try:
+        out = subprocess.run([cxx, "--version"], env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+        version_line = out.splitlines()[0] if out else ""
+    except OSError:
+        version_line = ""
+    return {"cxx": os.path.realpath(cxx) if os.path.exists(cxx) else cxx,
+            "version": version_line}
+
+
+def artifact_inputs(src_dir, patched_files, arnold_usd_src, cmake_args, dep_roots, env):
+    """variant artifact fingerprint 입력: 소스 트리, 패치 파일, cmake 인자,
+    의존 패키지 루트/버전, 컴파일러, 빌드 스크립트와 설치 트리에 들어가는 도구(tools/*.py)"""
+    versions = {}
+    for var in dep_roots:
+        version_var = var[:-len("_ROOT")] + "_VERSION"
+        versions[version_var] = os.environ.get(version_var, "")
+    here = os.path.dirname(os.path.abspath(__file__))
+    return {
+        "source_tree": tree_digest(src_dir),
+        "patched_files": {os.path.relpath(p, src_dir): _file_sha256(p)
+                          for p in patched_files if os.path.isfile(p)},
+        "arnold_usd_tree": tree_digest(arnold_usd_src) if os.path.isdir(arnold_usd_src) else "",
+        "cmake_args": [a for a in cmake_args
+                       if _cmake_var_name(a) not in CONFIGURE_ONLY_CMAKE_VARS],
+        "dep_roots": dep_roots,
+        "dep_versions": versions,
+        "compiler": _compiler_identity(env),
+        "build_scripts": {os.path.relpath(p, here): _file_sha256(p) for p in
+                          [os.path.join(here, "rezbuild.py"),
+                           os.path.join(here, "rezbuild_telemetry.py")] +
+                          sorted(glob.glob(os.path.join(TOOLS_DIR, "*.py")))},
+    }
+
+
+def _artifact_entries(store):
+    """(fingerprint, 크기, 마지막 사용 시각) 목록"""
+    entries = []
+    for name in os.listdir(store):
+        meta_path = os.path.join(store, name, "meta.json")
+        if name.startswith(".") or not os.path.isfile(meta_path):
+            continue
+        try:
+            with open(meta_path, "r") as f:
+                size = json.load(f).get("size", 0)
+        except (OSError, ValueError):
+            size = 0
+        entries.append((name, size, os.path.getmtime(meta_path)))
+    return entries
+
+
+def restore_artifact(store, fingerprint, dest, debug_dest=None):
+    """store에 같은 fingerprint의 artifact가 있으면 dest로 복원 → True.
+    debug_dest: strip 때 분리한 debug 파일 트리도 함께 복원할 위치"""
+    entry = os.path.join(store, fingerprint)
+    meta_path = os.path.join(entry, "meta.json")
+    if not os.path.isfile(meta_path):
+        return False
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    print(f"=== Artifact hit {fingerprint[:12]} (built {meta.get('created')} "
+          f"on {meta.get('host')}), restoring {meta.get('size', 0) / (1 << 20):.0f} MB ===")
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    shutil.copytree(os.path.join(entry, "tree"), dest, symlinks=True)
+    if debug_dest:
+        shutil.rmtree(debug_dest, ignore_errors=True)
+        if os.path.isdir(os.path.join(entry, "debug")):
+            shutil.copytree(os.path.join(entry, "debug"), debug_dest, symlinks=True)
+    os.utime(meta_path)  # LRU
+    return True
+
+
+def save_artifact(store, fingerprint, src_tree, inputs, debug_tree=None):
+    """설치 트리(와 분리한 debug 파일 트리)를 artifact로 저장 (임시 디렉토리 → rename)
+    후 크기 기준 eviction"""
+    entry = os.path.join(store, fingerprint)
+    if os.path.isdir(entry):
+        return
+    os.makedirs(store, exist_ok=True)
+    tmp = os.path.join(store, f".tmp-{fingerprint}-{os.getpid()}")
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    shutil.copytree(src_tree, os.path.join(tmp, "tree"), symlinks=True)
+    if debug_tree and os.path.isdir(debug_tree):
+        shutil.copytree(debug_tree, os.path.join(tmp, "debug"), symlinks=True)
+    size = 0
+    for dirpath, _, filenames in os.walk(tmp):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if not os.path.islink(path):
+                size += os.path.getsize(path)
+    meta = {"fingerprint": fingerprint, "size": size, "host": socket.gethostname(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "variant": os.environ.get("REZ_BUILD_VARIANT_SUBPATH", ""), "inputs": inputs}
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # 다른 빌드가 같은 artifact를 먼저 저장함
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    print(f"=== Artifact stored {fingerprint[:12]} ({size / (1 << 20):.0f} MB) ===")
+    evict_artifacts(store, _parse_size(os.environ.get("USD_BUILD_ARTIFACT_STORE_SIZE")
+                                       or DEFAULT_ARTIFACT_STORE_SIZE), keep=fingerprint)
+
+
+def evict_artifacts(store, max_bytes, keep=None):
+    """오래 사용되지 않은 artifact부터 삭제해 store 크기를 max_bytes 이하로 유지"""
+    entries = sorted(_artifact_entries(store), key=lambda e: e[2])
+    total = sum(e[1] for e in entries)
+    for name, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        print(f"  Evicting artifact {name[:12]} ({size / (1 << 20):.0f} MB)")
+        shutil.rmtree(os.path.join(store, name), ignore_errors=True)
+        total -= size
+
+
+# staging 트리에 반드시 있어야 하는 파일 (publish 전 검증)
+STAGE_REQUIRED_FILES = [
+    "include/pxr/pxr.h",
+    "lib/libusd_tf.so",
+    "lib/libusd_sdf.so",
+    "lib/libusd_usd.so",
+    "lib/usd/plugInfo.json",
+    "lib/python/pxr/__init__.py",
+    "lib/python/pxr/Usd/__init__.py",
+    "bin/usdcat",
+    "pxrConfig.cmake",
+]
+
+
+def verify_stage(stage_root):
+    """publish 전 staging 트리 검증 (실패 시 서버 트리는 건드리지 않고 중단)"""
+    missing = [rel for rel in STAGE_REQUIRED_FILES
+               if not os.path.exists(os.path.join(stage_root, rel))]
+    if missing:
+        for rel in missing:
+            print(f"  [MISS] {rel}")
+        sys.exit(f"Staged install incomplete ({len(missing)} missing), "
+                 f"live tree left untouched: {stage_root}")
+    print(f"  Staged install verified: {stage_root}")
+
+
+def _same_file(src, ref):
+    """내용/권한이 같은 파일인지 (hardlink 재사용 가능 여부)"""
+    try:
+        src_st = os.stat(src)
+        ref_st = os.lstat(ref)
+    except OSError:
+        return False
+    if not os.path.isfile(ref) or os.path.islink(ref):
+        return False
+    if src_st.st_size != ref_st.st_size or src_st.st_mode != ref_st.st_mode:
+        return False
+    return filecmp.cmp(src, ref, shallow=False)
+
+
+def _copy_new(src, dst):
+    """src를 새 파일 dst로 복사 (dst가 이미 있으면 FileExistsError - 기존 파일에 쓰지 않음).
+    publish된 파일은 다른 release/variant, dedup pool과 inode를 공유할 수 있으므로
+    절대 제자리에서 다시 쓰면 안 됨"""
+    fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as fout, open(src, "rb") as fin:
+        shutil.copyfileobj(fin, fout, 1 << 20)
+    shutil.copystat(src, dst)
+
+
+def sync_tree(src, dst, reference=None):
+    """src 트리를 새 디렉토리 dst로 복사 (dst 안에 이미 있는 파일은 열지 않고 오류).
+    reference(현재 서버 트리)에 같은 파일이 있으면 복사 대신 hardlink → NFS 쓰기 최소화"""
+    stats = {"copied": 0, "copied_bytes": 0, "linked": 0, "linked_bytes": 0}
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel_dir = os.path.relpath(dirpath, src)
+        dst_dir = os.path.normpath(os.path.join(dst, rel_dir))
+        os.makedirs(dst_dir, exist_ok=True)
+        for name in dirnames + filenames:
+            src_path = os.path.join(dirpath, name)
+            dst_path = os.path.join(dst_dir, name)
+            if os.path.islink(src_path):
+                os.symlink(os.readlink(src_path), dst_path)
+                if name in dirnames:
+                    dirnames.remove(name)  # 심볼릭 링크 디렉토리는 따라가지 않음
+                continue
+            if name in dirnames:
+                continue
+            size = os.path.getsize(src_path)
+            ref_path = os.path.join(reference, rel_dir, name) if reference else ""
+            if ref_path and _same_file(src_path, ref_path):
+                try:
+                    os.link(ref_path, dst_path)
+                    stats["linked"] += 1
+                    stats["linked_bytes"] += size
+                    continue
+                except FileExistsError:
+                    raise
+                except OSError:
+                    pass  # 다른 파일 시스템 등: 복사
+            _copy_new(src_path, dst_path)
+            stats["copied"] += 1
+            stats["copied_bytes"] += size
+        shutil.copystat(dirpath, dst_dir)
+    return stats
+
+
+def _exchange_paths(a, b):
+    """a와 b를 원자적으로 맞바꿈 (Linux renameat2 RENAME_EXCHANGE).
+    libc/파일 시스템이 지원하지 않으면 False (NFS 등)"""
+    renameat2 = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+    if renameat2 is None:
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    if renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+        return False
+    raise OSError(err, os.strerror(err), a)
+
+
+def publish_install(stage_root, install_root):
+    """staging 트리를 서버 경로로 원자적 교체.
+
+    <parent>/.<variant>.<timestamp>-<random> 을 새로(배타적으로) 만들어 트리를 채우고
+    (변경 없는 파일은 현재 트리에서 hardlink), install_root 심볼릭 링크를 rename으로
+    교체한다. 이전 트리는 USD_BUILD_KEEP_RELEASES 개까지 rollback용으로 보존."""
+    parent, base = os.path.split(install_root.rstrip(os.sep))
+    os.makedirs(parent, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    # 같은 초/같은 pid(컨테이너, 재시도)로 publish해도 기존 release에 쓰지 않도록 새 디렉토리 보장
+    release = tempfile.mkdtemp(prefix=f".{base}.{stamp}-", dir=parent)
+    current = os.path.realpath(install_root) if os.path.exists(install_root) else None
+
+    print(f"=== Publishing {install_root} -> {os.path.basename(release)} ===")
+    stats = sync_tree(stage_root, release, reference=current)
+    print(f"  copied {stats['copied']} file(s), {stats['copied_bytes'] / (1 << 20):.1f} MB; "
+          f"hardlinked {stats['linked']} unchanged file(s), "
+          f"{stats['linked_bytes'] / (1 << 20):.1f} MB")
+
+    tmp_link = os.path.join(parent, f".{base}.link-{os.getpid()}")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)  # 중단된 이전 publish
+    os.symlink(os.path.basename(release), tmp_link)
+    if os.path.isdir(install_root) and not os.path.islink(install_root):
+        # 기존 실제 디렉토리(예전 방식 설치)는 한 번만 심볼릭 링크로 전환: 링크와 맞바꾼 뒤
+        # 옛 트리를 release 이름으로 옮김 (install_root가 없는 순간이 없음)
+        migrated = tempfile.mkdtemp(prefix=f".{base}.{stamp}-previous-", dir=parent)
+        if _exchange_paths(tmp_link, install_root):
+            os.rename(tmp_link, migrated)
+        else:
+            print("  WARNING: atomic exchange not supported here, "
+                  f"{install_root} is briefly missing during migration")
+            os.rename(install_root, migrated)
+            os.rename(tmp_link, install_root)
+        current = migrated
+    else:
+        os.replace(tmp_link, install_root)
+    print(f"  {install_root} -> {os.path.basename(release)}")
+    if current:
+        print(f"  previous tree kept for rollback: {current}")
+        print(f"    rollback: ln -sfn {os.path.basename(current)} {install_root}")
+
+    # 오래된 release 정리
+    keep = int(os.environ.get("USD_BUILD_KEEP_RELEASES", "2"))
+    releases = [p for p in glob.glob(os.path.join(parent, f".{base}.*"))
+                if os.path.isdir(p) and not os.path.islink(p) and p != release]
+    releases.sort(key=os.path.getmtime, reverse=True)
+    for old in releases[keep:]:
+        print(f"  Removing old release: {old}")
+        shutil.rmtree(old, ignore_errors=True)
+    return stats
+
+
+def _live_variant_roots(package_base):
+    """package_base 아래 publish된 variant 트리 (심볼릭 링크 → .<variant>.<timestamp>)"""
+    roots = []
+    for dirpath, dirnames, _ in os.walk(package_base):
+        for name in list(dirnames):
+            path = os.path.join(dirpath, name)
+            if name.startswith("."):
+                dirnames.remove(name)  # pool, release 디렉토리는 링크를 통해서만 접근
+            elif os.path.islink(path):
+                dirnames.remove(name)
+                target = os.path.realpath(path)
+                if os.path.basename(target).startswith(".") and os.path.isdir(target):
+                    roots.append(target)
+    return roots
+
+
+def dedup_package_tree(package_base):
+    """설치된 모든 variant에서 내용이 같은 파일을 공용 content pool의 hardlink로 교체.
+
+    pool: <package_base>/.pool/<sha[:2]>/<sha256>-<mode>
+    - publish된(심볼릭 링크가 가리키는) 트리만 다루므로 설치 중인 다른 variant와 충돌 없음
+    - 교체는 임시 hardlink + rename 이라 읽는 쪽은 항상 완전한 파일을 봄
+    - pool lock으로 동시에 여러 dedup이 실행돼도 안전
+    pool 항목은 publish된 모든 트리와 inode를 공유하므로 publish된 파일은 절대 제자리에서
+    쓰면 안 됨 (sync_tree는 새 파일만 만듦). pool 이름에 mode가 들어가고 publish가 mode로
+    hardlink 재사용 여부를 판단하므로 읽기 전용으로 바꾸는 대신 이 규칙으로 보호"""
+    pool = os.path.join(package_base, ".pool")
+    os.makedirs(pool, exist_ok=True)
+    lock_fd = os.open(os.path.join(pool, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    try:
+        # 이미 pool에 연결된 inode는 다시 해시하지 않음
+        pooled = set()
+        for dirpath, _, filenames in os.walk(pool):
+            for filename in filenames:
+                if filename != ".lock":
+                    st = os.lstat(os.path.join(dirpath, filename))
+                    pooled.add((st.st_dev, st.st_ino))
+
+        stats = {"files": 0, "already_shared": 0, "replaced": 0, "saved_bytes": 0}
+        for root in _live_variant_roots(package_base):
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    st = os.lstat(path)
+                    if not os.path.isfile(path) or os.path.islink(path) or st.st_size == 0:
+                        continue
+                    stats["files"] += 1
+                    if (st.st_dev, st.st_ino) in pooled:
+                        stats["already_shared"] += 1
+                        continue
+                    digest = _file_sha256(path)
+                    pool_dir = os.path.join(pool, digest[:2])
+                    pool_path = os.path.join(pool_dir, f"{digest}-{st.st_mode & 0o7777:o}")
+                    os.makedirs(pool_dir, exist_ok=True)
+                    try:
+                        os.link(path, pool_path)  # 첫 번째 사본이 pool 원본이 됨
+                        pooled.add((st.st_dev, st.st_ino))
+                        continue
+                    except FileExistsError:
+                        pass
+                    tmp = f"{path}.dedup-{os.getpid()}"
+                    os.link(pool_path, tmp)
+                    os.replace(tmp, path)
+                    stats["replaced"] += 1
+                    stats["saved_bytes"] += st.st_size
+
+        # 어느 트리에서도 참조하지 않는 pool 항목 정리, 전체 절감량 계산
+        pool_bytes = shared_bytes = 0
+        for dirpath, _, filenames in os.walk(pool):
+            for filename in filenames:
+                if filename == ".lock":
+                    continue
+                path = os.path.join(dirpath, filename)
+                st = os.lstat(path)
+                if st.st_nlink <= 1:
+                    os.remove(path)
+                    continue
+                pool_bytes += st.st_size
+                shared_bytes += st.st_size * (st.st_nlink - 2)
+    finally:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+    print(f"=== Dedup report: {package_base} ===")
+    print(f"  scanned {stats['files']} file(s), {stats['already_shared']} already shared")
+    print(f"  replaced {stats['replaced']} duplicate(s) with hardlinks this run: "
+          f"{stats['saved_bytes'] / (1 << 20):.1f} MB saved")
+    print(f"  content pool {pool_bytes / (1 << 20):.1f} MB, "
+          f"total saved across variants {shared_bytes / (1 << 20):.1f} MB")
+    stats.update({"pool_bytes": pool_bytes, "total_saved_bytes": shared_bytes})
+    return stats
+
+
+# === $ORIGIN RPATH 설치 (USD_BUILD_RPATH) ===
+RPATH_MARKER = ".usd_rpath_ok"  # 검사 통과 시 variant 루트에 생성 → commands()가 LD_LIBRARY_PATH 생략
+RPATH_LINKER_FLAGS = "-Wl,--disable-new-dtags"  # DT_RPATH: LD_LIBRARY_PATH보다 먼저 검색
+DT_NEEDED, DT_STRTAB, DT_SONAME, DT_RPATH, DT_RUNPATH = 1, 5, 14, 15, 29
+ET_EXEC, ET_DYN = 2, 3
+NT_GNU_BUILD_ID = 3
+
+
+def rpath_cmake_args(extra_rpaths=(), use_link_path=True, quoted=True):
+    """$ORIGIN 기준 INSTALL_RPATH 인자 (quoted: 셸 문자열에서 $ORIGIN, ';' 보호)
+    USD 자체 target은 pxr 매크로가 라이브러리/플러그인/Python 모듈마다 $ORIGIN 상대 경로를
+    설정하고, CMAKE_INSTALL_RPATH는 그 외 target(실행 파일, Arnold 플러그인)의 기본값.
+    링커 플래그(RPATH_LINKER_FLAGS)는 compile_flag_args()로 다른 플래그와 합쳐 전달."""
+    rpath = ";".join(["$ORIGIN/../lib"] + list(extra_rpaths))
+    if quoted:
+        rpath = f"'{rpath}'"
+    return [f"-DCMAKE_INSTALL_RPATH={rpath}",
+            f"-DCMAKE_INSTALL_RPATH_USE_LINK_PATH={'ON' if use_link_path else 'OFF'}"]
+
+
+def dependency_lib_dirs(roots):
+    """의존 패키지 루트들의 라이브러리 디렉토리 (lib64, lib, Arnold는 bin)"""
+    dirs = []
+    for root in roots:
+        for sub in ("lib64", "lib", "bin"):
+            path = os.path.join(root, sub)
+            if os.path.isdir(path) and glob.glob(os.path.join(path, "*.so*")):
+                dirs.append(path)
+    return dirs
+
+
+def _read_elf_header(f):
+    """ELF 헤더 → (is64, endian, e_type, program header 목록 [(type, offset, vaddr, filesz)])
+    ELF가 아니면 None"""
+    ident = f.read(16)
+    if len(ident) < 16 or ident[:4] != b"\x7fELF":
+        return None
+    is64 = ident[4] == 2
+    endian = "<" if ident[5] == 1 else ">"
+    if is64:
+        header = struct.unpack(endian + "HHIQQQIHHH", f.read(42))
+    else:
+        header = struct.unpack(endian + "HHIIIIIHHH", f.read(30))
+    e_type, phoff, phentsize, phnum = header[0], header[4], header[8], header[9]
+
+    segments = []
+    for i in range(phnum):
+        f.seek(phoff + i * phentsize)
+        if is64:
+            p_type, _, p_offset, p_vaddr, _, p_filesz = struct.unpack(
+                endian + "IIQQQQ", f.read(40))
+        else:
+            p_type, p_offset, p_vaddr, _, p_filesz = struct.unpack(
+                endian + "IIIII", f.read(20))
+        segments.append((p_type, p_offset, p_vaddr, p_filesz))
+    return is64, endian, e_type, segments
+
+
+def read_elf_build_id(path):
+    """PT_NOTE의 GNU build-id (hex), 없으면 ''. ELF가 아니면 None"""
+    with open(path, "rb") as f:
+        header = _read_elf_header(f)
+        if not header:
+            return None
+        _, endian, _, segments = header
+        for p_type, p_offset, _, p_filesz in segments:
+            if p_type != 4:  # PT_NOTE
+                continue
+            f.seek(p_offset)
+            raw = f.read(p_filesz)
+            off = 0
+            while off + 12 <= len(raw):
+                namesz, descsz, n_type = struct.unpack_from(endian + "III", raw, off)
+                name_end = off + 12 + ((namesz + 3) & ~3)
+                if n_type == NT_GNU_BUILD_ID and raw[off + 12:off + 12 + namesz] == b"GNU\0":
+                    return raw[name_end:name_end + descsz].hex()
+                off = name_end + ((descsz + 3) & ~3)
+    return ""
+
+
+def read_elf_sections(path):
+    """ELF section 이름 집합 (ELF가 아니면 None)"""
+    with open(path, "rb") as f:
+        header = _read_elf_header(f)
+        if not header:
+            return None
+        is64, endian, _, _ = header
+        if is64:
+            f.seek(0x28)
+            shoff, = struct.unpack(endian + "Q", f.read(8))
+            f.seek(0x3A)
+        else:
+            f.seek(0x20)
+            shoff, = struct.unpack(endian + "I", f.read(4))
+            f.seek(0x2E)
+        shentsize, shnum, shstrndx = struct.unpack(endian + "HHH", f.read(6))
+        if not shoff or shstrndx >= shnum:
+            return set()
+        sections = []
+        for i in range(shnum):
+            f.seek(shoff + i * shentsize)
+            raw = f.read(shentsize)
+            if is64:
+                sh_name, = struct.unpack_from(endian + "I", raw, 0)
+                sh_offset, sh_size = struct.unpack_from(endian + "QQ", raw, 0x18)
+            else:
+                sh_name, = struct.unpack_from(endian + "I", raw, 0)
+                sh_offset, sh_size = struct.unpack_from(endian + "II", raw, 0x10)
+            sections.append((sh_name, sh_offset, sh_size))
+        f.seek(sections[shstrndx][1])
+        names = f.read(sections[shstrndx][2])
+        return {names[n:names.index(b"\0", n)].decode("utf-8", "replace")
+                for n, _, _ in sections if n < len(names)}
+
+
+def read_elf_dynamic(path):
+    """ELF dynamic section의 NEEDED/SONAME/RPATH/RUNPATH (ELF가 아니면 None)"""
+    with open(path, "rb") as f:
+        header = _read_elf_header(f)
+        if not header:
+            return None
+        is64, endian, _, segments = header
+
+        dynamic = [s for s in segments if s[0] == 2]  # PT_DYNAMIC
+        if not dynamic:
+            return {"needed": [], "soname": "", "rpath": [], "runpath": []}
+        entry_fmt = endian + ("qQ" if is64 else "iI")
+        entry_size = struct.calcsize(entry_fmt)
+        f.seek(dynamic[0][1])
+        raw = f.read(dynamic[0][3])
+        entries = []
+        for off in range(0, len(raw) - entry_size + 1, entry_size):
+            tag, val = struct.unpack_from(entry_fmt, raw, off)
+            if tag == 0:
+                break
+            entries.append((tag, val))
+
+        strtab = next((val for tag, val in entries if tag == DT_STRTAB), None)
+        strtab_off = None
+        for p_type, p_offset, p_vaddr, p_filesz in segments:
+            if p_type == 1 and strtab is not None and p_vaddr <= strtab < p_vaddr + p_filesz:
+                strtab_off = strtab - p_vaddr + p_offset
+                break
+
+        def string_at(index):
+            f.seek(strtab_off + index)
+            data = b""
+            while b"\0" not in data:
+                chunk = f.read(256)
+                if not chunk:
+                    break
+                data += chunk
+            return data.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+        info = {"needed": [], "soname": "", "rpath": [], "runpath": []}
+        if strtab_off is None:
+            return info
+        for tag, val in entries:
+            if tag == DT_NEEDED:
+                info["needed"].append(string_at(val))
+            elif tag == DT_SONAME:
+                info["soname"] = string_at(val)
+            elif tag in (DT_RPATH, DT_RUNPATH):
+                key = "rpath" if tag == DT_RPATH else "runpath"
+                info[key].extend(p for p in string_at(val).split(":") if p)
+        return info
+
+
+def _system_libraries():
+    """ldconfig 캐시(soname → 경로), 64bit 항목만"""
+    libs = {}
+    try:
+        out = subprocess.run(["ldconfig", "-p"], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+    except OSError:
+        out = ""
+    for line in out.splitlines():
+        if "=>" not in line or "x86-64" not in line and "64bit" not in line:
+            continue
+        soname = line.split("(", 1)[0].strip()
+        libs.setdefault(soname, line.rsplit("=>", 1)[1].strip())
+    for libdir in ("/lib64", "/usr/lib64"):
+        if os.path.isdir(libdir):
+            for path in glob.glob(os.path.join(libdir, "*.so*")):
+                libs.setdefault(os.path.basename(path), path)
+    return libs
+
+
+def check_rpath_closure(stage_root, install_root, forbidden_prefixes=()):
+    """설치 트리의 모든 ELF가 LD_LIBRARY_PATH 없이 의존성을 찾는지 dynamic section으로 검사.
+
+    ld.so 검색 순서를 따라 DT_RUNPATH가 있으면 그것만, 없으면 자신과 로딩 체인의
+    DT_RPATH, 그 다음 ldconfig 캐시/시스템 디렉토리에서 찾는다. install_root 아래
+    절대 경로는 staging 트리로 바꿔 확인하고, 빌드/staging 경로를 가리키는 RPATH는 오류.
+    반환: {"elf_files", "unresolved", "transitive_unresolved", "leaks"}"""
+    system_libs = _system_libraries()
+    system_paths = set(system_libs.values())
+    install_root = install_root.rstrip(os.sep)
+    forbidden = [p.rstrip(os.sep) + os.sep for p in forbidden_prefixes if p]
+
+    def expand(entries, origin):
+        paths = []
+        for entry in entries:
+            entry = entry.replace("${ORIGIN}", origin).replace("$ORIGIN", origin)
+            if entry == install_root or entry.startswith(install_root + os.sep):
+                entry = stage_root + entry[len(install_root):]
+            paths.append(os.path.normpath(entry))
+        return paths
+
+    def search(name, dirs):
+        for d in dirs:
+            candidate = os.path.join(d, name)
+            if os.path.isfile(candidate):
+                return candidate
+        return system_libs.get(name)
+
+    report = {"elf_files": 0, "unresolved": [], "transitive_unresolved": [], "leaks": []}
+    visited = set()
+
+    def walk(path, info, inherited, direct):
+        origin = os.path.dirname(path)
+        own = expand(info["runpath"] or info["rpath"], origin)
+        dirs = own if info["runpath"] else own + inherited
+        chain = inherited if info["runpath"] else own + inherited
+        for name in info["needed"]:
+            found = search(name, dirs)
+            if not found:
+                key = "unresolved" if direct else "transitive_unresolved"
+                report[key].append((os.path.relpath(path, stage_root) if direct else path, name))
+                continue
+            memo = (found, tuple(chain))
+            if found in system_paths or memo in visited:
+                continue
+            visited.add(memo)
+            dep_info = read_elf_dynamic(found)
+            if dep_info:
+                walk(found, dep_info, chain, direct=found.startswith(stage_root + os.sep))
+
+    for dirpath, _, filenames in os.walk(stage_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            try:
+                info = read_elf_dynamic(path)
+            except (OSError, struct.error):
+                info = None
+            if info is None:
+                continue
+            report["elf_files"] += 1
+            rel = os.path.relpath(path, stage_root)
+            for entry in info["rpath"] + info["runpath"]:
+                if any(entry.startswith(prefix) or entry + os.sep == prefix for prefix in forbidden):
+                    report["leaks"].append((rel, entry))
+            walk(path, info, [], direct=True)
+    return report
+
+
+def verify_rpath_install(stage_root, install_root, forbidden_prefixes=()):
+    """RPATH 검사 결과 출력, 통과하면 variant 루트에 RPATH_MARKER 생성 (통과 여부 반환)"""
+    print("=== RPATH check (ELF dynamic section) ===")
+    marker = os.path.join(stage_root, RPATH_MARKER)
+    if os.path.exists(marker):
+        os.remove(marker)
+    report = check_rpath_closure(stage_root, install_root, forbidden_prefixes)
+    print(f"  {report['elf_files']} ELF file(s) checked")
+    for rel, entry in report["leaks"]:
+        print(f"  [LEAK] {rel}: RPATH points into build tree: {entry}")
+    for rel, name in report["unresolved"]:
+        print(f"  [ENV ] {rel}: {name} only resolvable via LD_LIBRARY_PATH")
+    for path, name in sorted(set(report["transitive_unresolved"])):
+        print(f"  [dep ] {path}: {name} resolved by its own package environment")
+    ok = not report["leaks"] and not report["unresolved"]
+    if ok:
+        with open(marker, "w") as f:
+            json.dump({"elf_files": report["elf_files"],
+                       "checked": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+            f.write("\n")
+        print(f"  OK: no library resolves through the environment -> {RPATH_MARKER}")
+    else:
+        print("  RPATH check failed: LD_LIBRARY_PATH stays enabled for this variant")
+    report["ok"] = ok
+    return report
+
+
+def _strip_binary(path, debug_dir, build_id, tools, split_dwarf):
+    """debug 정보를 .build-id/xx/yyyy.debug 로 분리하고 원본은 strip (크기 반환)"""
+    debug_file = os.path.join(debug_dir, ".build-id", build_id[:2], build_id[2:] + ".debug")
+    os.makedirs(os.path.dirname(debug_file), exist_ok=True)
+    before = os.path.getsize(path)
+    subprocess.run([tools["objcopy"], "--only-keep-debug", "--compress-debug-sections=zlib",
+                    path, debug_file], check=True)
+    if split_dwarf and tools.get("dwp"):
+        # -gsplit-dwarf: .dwo를 모아 .debug 옆 .dwp로 (gdb가 <debug 파일>.dwp 를 찾음)
+        result = subprocess.run([tools["dwp"], "-e", path, "-o", debug_file + ".dwp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        if result.returncode != 0 and os.path.exists(debug_file + ".dwp"):
+            os.remove(debug_file + ".dwp")
+    tmp = f"{path}.strip-{os.getpid()}"
+    subprocess.run([tools["objcopy"], "--strip-unneeded", "--remove-section=.comment",
+                    f"--add-gnu-debuglink={debug_file}", path, tmp], check=True)
+    shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+    debug_size = os.path.getsize(debug_file)
+    if os.path.exists(debug_file + ".dwp"):
+        debug_size += os.path.getsize(debug_file + ".dwp")
+    return before, os.path.getsize(path), debug_size
+
+
+def split_debug_info(stage_root, debug_dir, env, split_dwarf=False):
+    """설치 트리의 공유 라이브러리/Python 확장/Arnold 플러그인/실행 파일 debug 분리 + strip.
+
+    debug 파일은 variant 트리 밖 debug_dir/.build-id/ 에 GNU build-id 이름으로 두어
+    gdb/eu-stack 등이 core 파일의 build-id로 찾음 (debug-file-directory).
+    이미 .gnu_debuglink 가 있는 파일(artifact 복원 등)과 build-id가 없는 파일은 건너뜀"""
+    tools = {name: shutil.which(name, path=env.get("PATH")) for name in ("objcopy", "dwp")}
+    if not tools["objcopy"]:
+        print("WARNING: objcopy not found, installing unstripped binaries")
+        return None
+    shutil.rmtree(debug_dir, ignore_errors=True)
+
+    targets, skipped = [], []
+    for dirpath, _, filenames in os.walk(stage_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                header = _read_elf_header(f)
+            if not header or header[2] not in (ET_EXEC, ET_DYN):
+                continue
+            if ".gnu_debuglink" in read_elf_sections(path):
+                continue
+            build_id = read_elf_build_id(path)
+            if not build_id:
+                skipped.append(os.path.relpath(path, stage_root))
+                continue
+            targets.append((path, build_id))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=build_jobs()) as pool:
+        sizes = list(pool.map(lambda t: _strip_binary(t[0], debug_dir, t[1], tools, split_dwarf),
+                              targets))
+    before = sum(s[0] for s in sizes)
+    after = sum(s[1] for s in sizes)
+    debug = sum(s[2] for s in sizes)
+    print(f"  Stripped {len(targets)} binaries: {before / (1 << 20):.1f} MB -> "
+          f"{after / (1 << 20):.1f} MB (debug {debug / (1 << 20):.1f} MB in {debug_dir})")
+    for rel in skipped:
+        print(f"  WARNING: no GNU build-id, left unstripped: {rel}")
+    return {"binaries": len(targets), "before_bytes": before, "after_bytes": after,
+            "debug_bytes": debug, "no_build_id": skipped}
+
+
+def publish_debug_tree(debug_dir, debug_root):
+    """staging debug 파일을 공유 debug 트리로 복사 (build-id 이름이므로 이미 있으면 건너뜀)"""
+    copied = 0
+    for dirpath, _, filenames in os.walk(debug_dir):
+        for filename in filenames:
+            src = os.path.join(dirpath, filename)
+            dst = os.path.join(debug_root, os.path.relpath(src, debug_dir))
+            if os.path.exists(dst):
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = f"{dst}.tmp-{os.getpid()}"
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+            copied += 1
+    print(f"  Debug files: {copied} new -> {debug_root}")
+    return copied
+
+
+def install_footprint(stage_root):
+    """설치 트리 크기 요약 (공유 라이브러리 수, 전체 크기)"""
+    libs = [p for p in glob.glob(os.path.join(stage_root, "**", "*.so*"), recursive=True)
+            if os.path.isfile(p) and not os.path.islink(p)]
+    total = 0
+    for dirpath, _, filenames in os.walk(stage_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if not os.path.islink(path):
+                total += os.path.getsize(path)
+    footprint = {"shared_libs": len(libs), "bytes": total}
+    print(f"  Install footprint: {len(libs)} shared libraries, {total / (1 << 20):.1f} MB")
+    return footprint
+
+
+def installed_build_info(pkg_path):
+    """설치된 package.py의 usd_build_info → {variant subpath: 빌드 정보} (없으면 {})"""
+    try:
+        with open(pkg_path, "r") as f:
+            text = f.read()
+    except OSError:
+        return {}
+    for node in ast.parse(text, pkg_path).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and \
+                isinstance(node.targets[0], ast.Name) and node.targets[0].id == "usd_build_info":
+            try:
+                info = ast.literal_eval(node.value)
+            except ValueError:
+                return {}
+            # 예전 형식(variant 구분 없는 단일 dict)은 버림
+            return {k: v for k, v in info.items() if isinstance(v, dict)} \
+                if isinstance(info, dict) else {}
+    return {}
+
+
+def check_variant_consistency(pkg_path, variant, build_info):
+    """같은 버전의 다른 variant와 allocator가 다르면 중단 (requires는 버전 단위라 공유됨)"""
+    mismatched = sorted(
+        f"{other} ({info.get('allocator')})"
+        for other, info in installed_build_info(pkg_path).items()
+        if other != variant and info.get("allocator") != build_info["allocator"])
+    if mismatched:
+        sys.exit(f"USD_BUILD_ALLOCATOR mismatch: this variant uses {build_info['allocator']} "
+                 f"but {pkg_path} has variants built with another allocator: "
+                 f"{', '.join(mismatched)}; rebuild all variants with the same allocator")
+
+
+def write_package_py(src, dst, profile, extra_requires=(), metadata=None, variant=""):
+    """버전 루트에 package.py 설치.
+    profile이 별도 패키지면 name/description을 바꾸고 requires/tools에서 profile이 빼는
+    항목을 제거, extra_requires(allocator 등)를 requires에 추가하고 metadata는
+    usd_build_info[variant] 로 기록 - 다른 variant의 기록은 유지
+    (commands() 등 나머지는 그대로, 동시 variant 설치는 lock으로 직렬화)"""
+    with open(src, "r") as f:
+        text = f.read()
+    lock_fd = os.open(f"{dst}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        if metadata:
+            build_info = installed_build_info(dst)
+            build_info[variant] = metadata
+            metadata = build_info
+        _write_package_py(src, text, dst, profile, extra_requires, metadata)
+    finally:
+        os.close(lock_fd)
+
+
+def _write_package_py(src, text, dst, profile, extra_requires, metadata):
+    """write_package_py 본문 (package.py lock을 잡은 상태에서 호출)"""
+    if profile.get("package") or extra_requires or metadata:
+        drop_requires = set(profile.get("drop_requires", []))
+        drop_requires.update(r.split("-", 1)[0] for r in extra_requires)
+        drop_tools = set(profile.get("drop_tools", []))
+        lines = text.splitlines(keepends=True)
+        edits = []
+        for node in ast.parse(text, src).body:
+            if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and
+                    isinstance(node.targets[0], ast.Name)):
+                continue
+            key = node.targets[0].id
+            if key == "name" and profile.get("package"):
+                new = f'name = "{profile["package"]}"\n'
+            elif key == "description" and profile.get("description"):
+                new = f'description = "{profile["description"]}"\n'
+            elif key in ("requires", "tools"):
+                values = ast.literal_eval(node.value)
+                if key == "requires":
+                    values = [v for v in values if v.split("-", 1)[0] not in drop_requires]
+                    values += list(extra_requires)
+                else:
+                    values = [v for v in values if v not in drop_tools]
+                new = f"{key} = [\n" + "".join(f'    "{v}",\n' for v in values) + "]\n"
+            elif key == "usd_build_info":
+                new = ""  # 아래에서 다시 기록
+            else:
+                continue
+            edits.append((node.lineno - 1, node.end_lineno, new))
+        for start, end, new in reversed(edits):
+            lines[start:end] = [new]
+        text = "".join(lines)
+        if metadata:
+            text = text.rstrip("\n") + "\n\n# rezbuild.py 빌드 정보\nusd_build_info = " + \
+                json.dumps(metadata, indent=4, sort_keys=True) + "\n"
+    tmp = f"{dst}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, dst)
+
+
+def install_package_tools(stage_root):
+    """tools/*.py 를 설치 트리 bin/ 에 실행 파일로 복사"""
+    bin_dir = os.path.join(stage_root, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    installed = []
+    for path in sorted(glob.glob(os.path.join(TOOLS_DIR, "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        dst = os.path.join(bin_dir, name)
+        shutil.copy2(path, dst)
+        os.chmod(dst, 0o755)
+        installed.append(name)
+    print(f"  Installed tools: {', '.join(installed)}")
+    return installed
+
+
+# `python -X importtime` 측정 대상 (릴리스 간 import 회귀 비교용)
+# usdview 시작 경로: bin/usdview와 같이 Launcher().Run() → AppController 생성, stage 로드,
+# 첫 화면까지 진행 후 --quitAfterStartup으로 종료 (QT_QPA_PLATFORM=offscreen)
+USDVIEW_STARTUP = """\
+import sys, time
+start = time.perf_counter()
+from pxr import Usdviewq
+sys.argv = ["usdview", {stage!r}, "--quitAfterStartup"] + {extra!r}
+try:
+    Usdviewq.Launcher().Run()
+except SystemExit as exc:
+    if exc.code:
+        raise
+print("startup_s", time.perf_counter() - start)
+"""
+USDVIEW_STARTUP_STAGE = """#usda 1.0
+(
+    defaultPrim = "World"
+)
+
+def Xform "World"
+{
+    def Sphere "Sphere"
+    {
+        double radius = 1
+    }
+}
+"""
+IMPORT_PROFILES = {
+    "pxr_core": "import pxr.Usd, pxr.UsdGeom, pxr.Sdf",
+    "usdview": USDVIEW_STARTUP,
+}
+IMPORTTIME_RUNS = 3
+
+
+def precompile_python(python_exe, stage_root, install_root, env):
+    """variant 인터프리터로 설치된 Python 소스를 checked-hash pyc로 컴파일.
+    checked-hash pyc는 mtime 대신 소스 해시로 검증하므로 공유 스토리지에 복사/hardlink
+    되어도 유효하고, co_filename은 staging이 아닌 최종 설치 경로를 가리킨다."""
+    lib_python = os.path.join(stage_root, "lib", "python")
+    if not os.path.isdir(lib_python):
+        return 0
+    print(f"=== Precompiling Python sources ({python_exe}) ===")
+    cmd = [python_exe, "-m", "compileall", "-q", "-j", "0",
+           "--invalidation-mode", "checked-hash",
+           "-s", stage_root, "-p", install_root, lib_python]
+    rc, _ = _run_with_rusage(cmd, env=env)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
+    count = len(glob.glob(os.path.join(lib_python, "**", "__pycache__", "*.pyc"), recursive=True))
+    print(f"  {count} pyc file(s) under {lib_python}")
+    return count
+
+
+def usd_runtime_env(root, env, preload=None):
+    """설치(또는 staging) 트리 root의 pxr를 실행하기 위한 환경 (commands()와 같은 구성).
+    preload: MALLOC_PRELOAD_MARKER allocator를 LD_PRELOAD할지 - 기본은 commands()처럼
+    USD_MALLOC_PRELOAD=1 일 때만, False면 하지 않음 (allocator 비교용)"""
+    run_env = dict(env)
+    run_env.pop("DESTDIR", None)
+    run_env["USD_ROOT"] = root
+    run_env["PYTHONDONTWRITEBYTECODE"] = "1"
+    run_env["QT_QPA_PLATFORM"] = "offscreen"
+    run_env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (os.path.join(root, "lib", "python"), env.get("PYTHONPATH", "")) if p)
+    run_env["LD_LIBRARY_PATH"] = os.pathsep.join(
+        p for p in (os.path.join(root, "lib"), env.get("LD_LIBRARY_PATH", "")) if p)
+    run_env["PXR_PLUGINPATH_NAME"] = os.pathsep.join(usdplugindex.registration_roots(root))
+    run_env.pop("PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH", None)
+    if preload is None:
+        preload = env.get("USD_MALLOC_PRELOAD", "") == "1"
+    allocator_lib = malloc_preload(root)
+    if allocator_lib:
+        run_env["USD_MALLOC_LIBRARY"] = allocator_lib
+    if allocator_lib and preload:
+        run_env["LD_PRELOAD"] = os.pathsep.join(
+            p for p in (allocator_lib, env.get("LD_PRELOAD", "")) if p)
+    return run_env
+
+
+def _measure_imports(python_exe, label, code, import_env, build_path):
+    """code를 `-X importtime` 으로 IMPORTTIME_RUNS번 실행 → 가장 빠른 실행 요약.
+    stdout의 "startup_s <초>" 는 startup_ms로 기록"""
+    best = None
+    for _ in range(IMPORTTIME_RUNS):
+        result = subprocess.run([python_exe, "-X", "importtime", "-c", code],
+                                env=import_env, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else \
+                f"exit {result.returncode}"
+            return {"error": error}
+        summary = rezbuild_telemetry.summarize_importtime(
+            rezbuild_telemetry.parse_importtime(result.stderr))
+        for line in result.stdout.splitlines():
+            if line.startswith("startup_s "):
+                summary["startup_ms"] = round(float(line.split()[1]) * 1000.0, 2)
+        key = "startup_ms" if "startup_ms" in summary else "total_ms"
+        if best is None or summary[key] < best[key]:
+            best = summary
+            with open(os.path.join(build_path, f"importtime_{label}.log"), "w") as f:
+                f.write(result.stderr)
+    return best
+
+
+def import_time_report(python_exe, stage_root, env, build_path, skip=()):
+    """IMPORT_PROFILES별 `-X importtime` 측정 (가장 빠른 실행 기준), build_path에 원본 로그 저장.
+    usdview는 import만이 아니라 실제 시작 경로(AppController 생성, stage 로드)를 offscreen으로
+    실행해 시작 시간(startup_ms)을 기록 - GL을 못 쓰는 빌드 호스트면 --norender로 다시 측정"""
+    import_env = usd_runtime_env(stage_root, env)
+
+    print("=== Python import time ===")
+    reports = {}
+    for label, statement in IMPORT_PROFILES.items():
+        if label in skip:
+            continue
+        if label == "usdview":
+            stage = os.path.join(build_path, "usdview_startup.usda")
+            with open(stage, "w") as f:
+                f.write(USDVIEW_STARTUP_STAGE)
+            display = f"usdview --quitAfterStartup {os.path.basename(stage)}"
+            best = _measure_imports(python_exe, label, statement.format(stage=stage, extra=[]),
+                                    import_env, build_path)
+            if best.get("error"):
+                print(f"  {label}: startup with rendering failed ({best['error']}), "
+                      f"retrying with --norender")
+                display += " --norender"
+                best = _measure_imports(
+                    python_exe, label, statement.format(stage=stage, extra=["--norender"]),
+                    import_env, build_path)
+        else:
+            display = statement
+            best = _measure_imports(python_exe, label, statement, import_env, build_path)
+        best["statement"] = display
+        reports[label] = best
+        if best.get("error"):
+            print(f"  {label}: '{display}' failed: {best['error']}")
+            continue
+        startup = f", startup {best['startup_ms']:.1f}ms" if "startup_ms" in best else ""
+        print(f"  {label}: '{display}' imports {best['total_ms']:.1f}ms{startup} "
+              f"({best['modules']} modules, slowest: {best['slowest'][0]['module']})")
+    return reports
+
+
+def benchmark_against_live(python_exe, stage_root, install_root, env, build_path):
+    """usdbench로 현재 publish된 트리(before)와 새 staging 트리(after) 비교.
+    결과는 build_path/bench_{before,after}.json, 느려진 벤치마크 목록 포함 요약 반환"""
+    live_root = os.path.realpath(install_root)
+    stage_bench = os.path.join(stage_root, "bin", "usdbench")
+    runs = [("after", stage_root)]
+    if os.path.isfile(os.path.join(live_root, "lib", "python", "pxr", "__init__.py")):
+        runs.insert(0, ("before", live_root))
+    else:
+        print(f"  no published tree at {install_root}, benchmarking the new build only")
+
+    print("=== Runtime benchmark (usdbench) ===")
+    results = {}
+    for label, root in runs:
+        out = os.path.join(build_path, f"bench_{label}.json")
+        print(f"--- {label}: {root} ---")
+        cmd = [python_exe, stage_bench, "run", "--out", out,
+               "--workdir", os.path.join(build_path, "bench_scenes")]
+        rc = subprocess.run(cmd, env=usd_runtime_env(root, env)).returncode
+        if rc != 0:
+            print(f"WARNING: usdbench failed for {label} (exit {rc})")
+            return {"error": f"usdbench {label} exit {rc}"}
+        with open(out, "r") as f:
+            results[label] = json.load(f)
+
+    summary = {"after": results["after"]["results"]}
+    if "before" in results:
+        summary["before"] = results["before"]["results"]
+        summary["regressions"] = usdbench.compare(results["before"], results["after"])
+    return summary
+
+
+def allocator_gate(python_exe, stage_root, env, build_path, allocator_lib):
+    """usdbench allocators로 시스템 allocator와 선택한 allocator를 비교 (LD_PRELOAD,
+    설치된 패키지에서 USD_MALLOC_PRELOAD=1 로 켜는 구성).
+    최대 thread 수에서 stage open이 USD_BUILD_ALLOCATOR_GATE_MIN_GAIN(기본 0) 이상
+    빨라지지 않으면 설치 중단"""
+    out = os.path.join(build_path, "bench_allocators.json")
+    cmd = [python_exe, os.path.join(stage_root, "bin", "usdbench"), "allocators",
+           "--lib", allocator_lib, "--out", out,
+           "--workdir", os.path.join(build_path, "bench_scenes")]
+    min_gain = os.environ.get("USD_BUILD_ALLOCATOR_GATE_MIN_GAIN", "0")
+    cmd += ["--min-gain", min_gain]
+    print("=== Allocator benchmark gate ===")
+    if os.path.exists(out):
+        os.remove(out)
+    rc = subprocess.run(cmd, env=usd_runtime_env(stage_root, env, preload=False)).returncode
+    if not os.path.isfile(out):
+        sys.exit(f"Allocator gate failed: usdbench allocators exited {rc} without writing {out}")
+    with open(out, "r") as f:
+        report = json.load(f)
+    if rc != 0:
+        sys.exit(f"Allocator gate failed: {allocator_lib} is not faster than the system "
+                 f"allocator (see {out}); unset USD_BUILD_ALLOCATOR_GATE to install anyway")
+    return report
 
 
 def _patch_file(filepath, replacements):
@@ -73,7 +2698,7 @@ def patch_usd_metal_msl(src_dir):
     import platform
     if platform.system() == "Darwin":
         print("=== macOS: MaterialXGenMsl patch not needed ===")
-        return
+        return []
 
     print("=== Patching USD source: disable MaterialXGenMsl on Linux ===")
     hdst = os.path.join(src_dir, "pxr", "imaging", "hdSt")
@@ -150,12 +2775,43 @@ def patch_usd_metal_msl(src_dir):
          '#endif\n'),
     ])
 
+    # artifact fingerprint용 패치 대상 파일 목록
+    return [os.path.join(hdst, filename) for filename in (
+        "CMakeLists.txt", "materialXShaderGen.h", "materialXShaderGen.cpp",
+        "materialXFilter.cpp")]
+
 
 def build(source_path, build_path, install_path_env, targets):
-    name = os.environ.get("REZ_BUILD_PROJECT_NAME", "usd")
+    """variant 빌드 (실패한 빌드도 telemetry 기록)"""
+    flavor = build_flavor()
+    if flavor:
+        # profile/최적화 모드마다 빌드 트리를 분리해 전환할 때마다 전체 재빌드하지 않도록 함
+        build_path = os.path.join(build_path, flavor)
+    telemetry = new_telemetry()
+    telemetry["profile"] = build_profile()[0]
+    telemetry["opt"] = build_opt()
+    telemetry["flavor"] = flavor
+    try:
+        _build(source_path, build_path, install_path_env, targets, telemetry)
+        telemetry["status"] = "success"
+    except BaseException:
+        telemetry["status"] = "failed"
+        raise
+    finally:
+        write_telemetry(build_path, telemetry)
+
+
+def _build(source_path, build_path, install_path_env, targets, telemetry):
+    profile_name, profile = build_profile()
+    # perf 빌드는 별도 패키지로 설치, 벤치마크 기준은 같은 profile의 release 배포본
+    live_name = profile.get("package") or os.environ.get("REZ_BUILD_PROJECT_NAME", "usd")
+    name = package_name(profile)
+    if name != live_name:
+        profile = dict(profile, package=name)
     version = os.environ.get("REZ_BUILD_PROJECT_VERSION")
     if not version:
         sys.exit("REZ_BUILD_PROJECT_VERSION not set")
+    print(f"=== Build profile: {profile_name} (package {name}) ===")
 
     # Python 버전 (rez variant가 제공)
     py_major = os.environ.get("REZ_PYTHON_MAJOR_VERSION", "3")
@@ -163,31 +2819,25 @@ def build(source_path, build_path, install_path_env, targets):
     py_version = f"{py_major}.{py_minor}"
     print(f"Building USD {version} for Python {py_version}")
 
+    # 의존성 탐색 결과 캐시 (REZ_*_ROOT 경로 + version 단위, 재릴리스되면 다시 탐색)
+    dep_cache = load_dep_cache()
+
     # Python executable
     python_root = os.environ.get("REZ_PYTHON_ROOT", "")
-    python_exe = os.path.join(python_root, "bin", f"python{py_version}") if python_root else ""
-    if not python_exe or not os.path.exists(python_exe):
-        python_exe = os.path.join(python_root, "bin", "python3") if python_root else ""
-    if not python_exe or not os.path.exists(python_exe):
+    python_exe = dep_probe(dep_cache, "REZ_PYTHON_ROOT",
+                           (f"bin/python{py_version}", "bin/python3"), kind="file")
+    if not python_exe:
         python_exe = shutil.which("python3") or sys.executable
         print(f"Warning: Rez Python not found, using: {python_exe}")
     else:
         print(f"Using Python: {python_exe}")
 
     # Python library / include 탐색
-    python_lib = ""
-    python_include = ""
-    if python_root:
-        for libname in (f"libpython{py_version}.so", f"libpython{py_version}m.so"):
-            candidate = os.path.join(python_root, "lib", libname)
-            if os.path.exists(candidate):
-                python_lib = candidate
-                break
-        for incdir in (f"python{py_version}", f"python{py_version}m"):
-            candidate = os.path.join(python_root, "include", incdir)
-            if os.path.isdir(candidate):
-                python_include = candidate
-                break
+    python_lib = dep_probe(dep_cache, "REZ_PYTHON_ROOT",
+                           (f"lib/libpython{py_version}.so", f"lib/libpython{py_version}m.so"),
+                           kind="file")
+    python_include = dep_probe(dep_cache, "REZ_PYTHON_ROOT",
+                               (f"include/python{py_version}", f"include/python{py_version}m"))
 
     # variant subpath
     variant_subpath = os.environ.get("REZ_BUILD_VARIANT_SUBPATH", "")
@@ -197,15 +2847,21 @@ def build(source_path, build_path, install_path_env, targets):
     if not os.path.isdir(src_dir):
         raise FileNotFoundError(f"Source not found: {src_dir}")
 
-    # 빌드/설치 디렉토리 준비
-    clean_build_dir(build_path)
-    os.makedirs(build_path, exist_ok=True)
-
+    # 설치 경로 (빌드 디렉토리는 configure 직전에 incremental 여부 판단)
+    # install target: 빌드 디렉토리의 staging 트리(DESTDIR)에 먼저 설치하고
+    # 검증 후 publish_install()이 서버 경로로 원자적으로 교체
     install_root = install_path_env
+    stage_dir = ""
+    stage_root = install_root
+    server_base = f"/core/Linux/APPZ/packages/{name}/{version}"
+    live_root = f"/core/Linux/APPZ/packages/{live_name}/{version}/{variant_subpath}"
     if "install" in targets:
-        install_root = f"/core/Linux/APPZ/packages/{name}/{version}/{variant_subpath}"
-        clean_install_dir(install_root)
-        os.makedirs(install_root, exist_ok=True)
+        install_root = f"{server_base}/{variant_subpath}"
+        stage_dir = os.path.join(build_path, "_stage")
+        stage_root = os.path.join(stage_dir, install_root.lstrip(os.sep))
+    # strip한 바이너리의 debug 파일: variant 트리 밖 공유 .build-id 트리 (모든 variant 공용)
+    debug_stage = os.path.join(build_path, "_debug_stage")
+    debug_root = os.environ.get("USD_BUILD_DEBUG_ROOT") or f"{server_base}/.debug"
 
     # === REZ 의존 패키지 경로 수집 ===
     boost_root = os.environ.get("REZ_BOOST_ROOT", "")
@@ -237,7 +2893,8 @@ def build(source_path, build_path, install_path_env, targets):
         print(f"  REZ_{var_name}_ROOT = {val}")
 
     # === 소스 패치 (Linux Metal/MSL 비활성화) ===
-    patch_usd_metal_msl(src_dir)
+    with telemetry_phase(telemetry, "patch_msl"):
+        patched_files = patch_usd_metal_msl(src_dir)
 
     # === CMAKE_PREFIX_PATH 구성 ===
     dep_env_vars = [
@@ -263,40 +2920,19 @@ def build(source_path, build_path, install_path_env, targets):
     # === 개별 CMake 의존성 경로 변수 ===
 
     # TBB: Find + CONFIG 모드
-    tbb_cmake_dir = ""
-    if tbb_root:
-        for libdir in ("lib/cmake/tbb", "lib64/cmake/tbb", "lib/cmake/TBB"):
-            candidate = os.path.join(tbb_root, libdir)
-            if os.path.isdir(candidate):
-                tbb_cmake_dir = candidate
-                break
+    tbb_cmake_dir = dep_probe(dep_cache, "REZ_TBB_ROOT",
+                              ("lib/cmake/tbb", "lib64/cmake/tbb", "lib/cmake/TBB"))
 
     # Imath: CONFIG 모드
-    imath_cmake_dir = ""
-    if imath_root:
-        for libdir in ("lib/cmake/Imath", "lib64/cmake/Imath"):
-            candidate = os.path.join(imath_root, libdir)
-            if os.path.isdir(candidate):
-                imath_cmake_dir = candidate
-                break
+    imath_cmake_dir = dep_probe(dep_cache, "REZ_IMATH_ROOT",
+                                ("lib/cmake/Imath", "lib64/cmake/Imath"))
 
     # MaterialX: CONFIG 모드
-    materialx_cmake_dir = ""
-    if materialx_root:
-        for libdir in ("lib/cmake/MaterialX", "lib64/cmake/MaterialX"):
-            candidate = os.path.join(materialx_root, libdir)
-            if os.path.isdir(candidate):
-                materialx_cmake_dir = candidate
-                break
+    materialx_cmake_dir = dep_probe(dep_cache, "REZ_MATERIALX_ROOT",
+                                    ("lib/cmake/MaterialX", "lib64/cmake/MaterialX"))
 
     # Qt6: CONFIG 모드
-    qt6_cmake_dir = ""
-    if qt_root:
-        for libdir in ("lib/cmake/Qt6", "lib64/cmake/Qt6"):
-            candidate = os.path.join(qt_root, libdir)
-            if os.path.isdir(candidate):
-                qt6_cmake_dir = candidate
-                break
+    qt6_cmake_dir = dep_probe(dep_cache, "REZ_QT_ROOT", ("lib/cmake/Qt6", "lib64/cmake/Qt6"))
 
     # === CMake 구성 인자 ===
     cmake_args = [
@@ -359,15 +2995,24 @@ def build(source_path, build_path, install_path_env, targets):
     if qt6_cmake_dir:
         cmake_args.append(f"-DQt6_DIR={qt6_cmake_dir}")
 
+    # build profile 기능 설정 (farm: imaging/Qt/GL/usdview 제외)
+    cmake_args = apply_cmake_overrides(cmake_args, profile.get("cmake", {}))
+
+    # 메모리 allocator (PXR_MALLOC_LIBRARY, 미지정 시 시스템 allocator)
+    allocator_request, allocator_lib = resolve_allocator()
+    if allocator_lib:
+        print(f"=== Allocator: {allocator_request or allocator_lib} ({allocator_lib}) ===")
+        cmake_args.append(f"-DPXR_MALLOC_LIBRARY={allocator_lib}")
+    telemetry["allocator"] = {"request": allocator_request, "library": allocator_lib}
+
     # === 환경 설정 ===
     env = os.environ.copy()
 
     # GCC
     gcc_bin = ""
     if gcc_root:
-        gcc_bin = os.path.join(gcc_root, "bin")
-        if not os.path.isdir(gcc_bin):
-            gcc_bin = os.path.join(gcc_root, "platform_linux", "bin")
+        gcc_bin = dep_probe(dep_cache, "REZ_GCC_ROOT", ("bin",)) or \
+            os.path.join(gcc_root, "platform_linux", "bin")
         env["CC"] = os.path.join(gcc_bin, "gcc")
         env["CXX"] = os.path.join(gcc_bin, "g++")
 
@@ -402,9 +3047,7 @@ def build(source_path, build_path, install_path_env, targets):
     if qt_root:
         ld_paths.append(os.path.join(qt_root, "lib"))
     if tbb_root:
-        tbb_lib = os.path.join(tbb_root, "lib64")
-        if not os.path.isdir(tbb_lib):
-            tbb_lib = os.path.join(tbb_root, "lib")
+        tbb_lib = dep_probe(dep_cache, "REZ_TBB_ROOT", ("lib64",)) or os.path.join(tbb_root, "lib")
         ld_paths.append(tbb_lib)
     if opensubdiv_root:
         ld_paths.append(os.path.join(opensubdiv_root, "lib"))
@@ -415,51 +3058,283 @@ def build(source_path, build_path, install_path_env, targets):
     if tbb_root:
         env["TBB_ROOT"] = tbb_root
 
-    # === CMake Configure → Build → Install ===
-    print("=== USD CMake configure ===")
-    cmd_str = " ".join(cmake_args)
-    print(f"CMake args ({len(cmake_args)}):")
-    for i, arg in enumerate(cmake_args):
-        print(f"  [{i}] {arg}")
+    save_dep_cache(dep_cache)
+    telemetry["dep_cache"] = {"hits": dep_cache["hits"], "misses": dep_cache["misses"]}
+    print(f"=== Dependency discovery: {dep_cache['hits']} cached, "
+          f"{dep_cache['misses']} probed ({dep_cache['path']}) ===")
 
-    run_cmd(cmd_str, cwd=build_path, env=env)
+    # === 메모리 기반 병렬도 (Ninja job pool), LTO link는 메모리 이력을 따로 관리 ===
+    opt = build_opt()
+    memory_label = "usd" if opt == DEFAULT_BUILD_OPT else f"usd-{opt}"
+    parallelism = plan_parallelism(memory_label, build_jobs())
+    max_jobs = build_jobs()
 
-    print("=== USD CMake build ===")
-    run_cmd(f"cmake --build . --parallel {multiprocessing.cpu_count()}", cwd=build_path, env=env)
+    # === Compiler cache (ccache/sccache) + distcc + job slot launcher ===
+    # distcc: 원격 slot 수만큼 compile job을 늘리고, 로컬 단계와 link는 로컬 메모리 기준 그대로
+    compiler_cache = setup_compiler_cache(env, source_path, build_path)
+    distcc = setup_distributed_compile(env, compiler_cache, parallelism["compile"], build_path)
+    cmake_args.extend(compiler_launcher_args(compiler_cache, distcc=distcc))
+    if distcc:
+        parallelism["compile"] = max(parallelism["compile"], distcc["slots"])
+        max_jobs = max(max_jobs, distcc["slots"])
+        print(f"  distcc: {parallelism['compile']} compile / {parallelism['link']} local link jobs")
+    cmake_args.extend(job_pool_args(parallelism))
 
-    if "install" in targets:
-        print("=== USD CMake install ===")
-        run_cmd("cmake --install .", cwd=build_path, env=env)
+    # === $ORIGIN RPATH 설치: 의존 라이브러리는 링크 경로(rez 패키지)로 고정 ===
+    rpath_mode = _env_flag("USD_BUILD_RPATH")
+    arnold_extra_args = compiler_launcher_args(compiler_cache, quoted=False, distcc=distcc)
+    arnold_extra_args += [f"-D{k}={v}" for k, v in profile.get("arnold_cmake", {}).items()]
+    if rpath_mode:
+        cmake_args.extend(rpath_cmake_args())
+        # Arnold 플러그인은 staging USD에 링크하므로 링크 경로 대신 명시적 목록 사용
+        arnold_rpaths = dependency_lib_dirs(
+            [os.environ[v] for v in dep_env_vars if os.environ.get(v)] +
+            ([arnold_root] if arnold_root else []))
+        arnold_extra_args += rpath_cmake_args(arnold_rpaths, use_link_path=False, quoted=False)
+
+    # === 최적화 모드 (perf: LTO, CPU baseline, 링커, split DWARF) ===
+    compile_flags, link_flags, opt_info = optimization_flags(opt, env, parallelism["link"])
+    if rpath_mode:
+        link_flags.append(RPATH_LINKER_FLAGS)
+    # 설치 시 debug 분리: build-id로 .debug 파일을 찾으므로 toolchain 기본값에 맡기지 않음
+    strip_mode = _env_flag("USD_BUILD_STRIP", default=True)
+    if strip_mode:
+        link_flags.append("-Wl,--build-id=sha1")
+    if compile_flags or link_flags:
+        print(f"=== Optimization: {opt_info} ===")
+    # === Unity(jumbo) 빌드 + precompiled header: 무거운 wrap/imaging target만 ===
+    unity = unity_config()
+    if unity:
+        if unity["pch"] and compiler_cache and compiler_cache["tool"] == "ccache":
+            # PCH를 쓰는 TU도 캐시되도록 (ccache 문서의 PCH 요구 사항), 옵션은 PCH target에만
+            env["CCACHE_SLOPPINESS"] += ",pch_defines,time_macros"
+            unity["pch_options"].append("-fpch-preprocess")
+        unity_script = write_unity_script(build_path, unity)
+        cmake_args.append(f"-DCMAKE_PROJECT_INCLUDE={unity_script}")
+        print(f"=== Unity build: {', '.join(f'{t}:{b}' for t, (b, _) in unity['targets'].items())} "
+              f"(PCH {'on' if unity['pch'] else 'off'}, excluded: {' '.join(unity['exclude'])}) ===")
+        telemetry["unity"] = {"targets": {t: b for t, (b, _) in unity["targets"].items()},
+                              "exclude": unity["exclude"], "pch": unity["pch"]}
 
-    print(f"USD {version} build completed successfully")
+    cmake_args.extend(compile_flag_args(compile_flags, link_flags))
+    arnold_extra_args += compile_flag_args(compile_flags, link_flags, quoted=False)
+    telemetry["optimization"] = opt_info
 
-    # === Arnold USD 플러그인 빌드 (선택) ===
+    # === Artifact store: 입력이 같은 variant는 빌드 대신 복원 ===
+    dep_roots = {v: os.environ.get(v, "") for v in dep_env_vars + ["REZ_GCC_ROOT"]}
     arnold_usd_src = os.path.join(source_path, "source", "arnold-usd")
-    if arnold_root and os.path.isdir(arnold_usd_src):
-        print("=== Arnold USD plugin build ===")
-        build_arnold_usd(arnold_usd_src, build_path, install_root, env, arnold_root)
-    else:
-        print("Arnold USD source not found, skipping Arnold plugin build")
+    artifact_store = os.environ.get("USD_BUILD_ARTIFACT_STORE", "")
+    artifact_fingerprint = ""
+    restored = False
+    if artifact_store and "install" in targets:
+        with telemetry_phase(telemetry, "artifact_lookup"):
+            inputs = artifact_inputs(src_dir, patched_files, arnold_usd_src, cmake_args,
+                                     dict(dep_roots, REZ_ARNOLD_ROOT=arnold_root), env)
+            artifact_fingerprint = hashlib.sha256(
+                json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+            print(f"=== Artifact fingerprint: {artifact_fingerprint} ===")
+            restored = restore_artifact(artifact_store, artifact_fingerprint, stage_root,
+                                        debug_dest=debug_stage)
+        telemetry["artifact"] = {"fingerprint": artifact_fingerprint, "hit": restored}
+
+    if not restored:
+        # === Preflight: 수 시간짜리 빌드 전에 의존성 누락 확인 ===
+        if _env_flag("USD_BUILD_SKIP_PREFLIGHT"):
+            print("=== Preflight dependency check skipped (USD_BUILD_SKIP_PREFLIGHT) ===")
+        else:
+            with telemetry_phase(telemetry, "preflight"):
+                preflight_check(cmake_args)
+
+        # === 빌드 디렉토리 준비 (incremental / clean) ===
+        clean_requested = "clean" in targets or _env_flag("USD_BUILD_CLEAN")
+        fingerprint, configure_fingerprint, need_configure = prepare_build_dir(
+            build_path, cmake_args, dep_roots, clean_requested)
+        # 단계별 로그 (줄마다 시각, 실패 시 <phase>.failure.txt): 이번 실행분만 남김
+        log_dir = os.path.join(build_path, "logs")
+        shutil.rmtree(log_dir, ignore_errors=True)
+        telemetry.update({"cmake_args": cmake_args, "dep_roots": dep_roots,
+                          "parallelism": parallelism, "incremental": not need_configure,
+                          "full_build": not os.path.isfile(os.path.join(build_path, "build.ninja"))})
+
+        # === CMake Configure → Build → Install ===
+        if need_configure:
+            print("=== USD CMake configure ===")
+            cmd_str = " ".join(cmake_args)
+            # 새 configure: 같은 의존성/compiler로 이전에 얻은 탐색 결과를 -C로 미리 채움
+            # (fingerprint에 안 들어가도록 cmake_args가 아닌 명령에만 추가)
+            seed_key = cmake_seed_key(dep_cache, dep_env_vars + ["REZ_GCC_ROOT", "REZ_CMAKE_ROOT"],
+                                      cmake_args, env)
+            seed_script = None
+            if dep_cache["enabled"] and \
+                    not os.path.isfile(os.path.join(build_path, "CMakeCache.txt")):
+                seed_script = write_cmake_seed(build_path, seed_key)
+            if seed_script:
+                cmd_str += f" -C {shlex.quote(seed_script)}"
+            telemetry["dep_cache"].update({"seed_key": seed_key, "seeded": bool(seed_script)})
+            print(f"CMake args ({len(cmake_args)}):")
+            for i, arg in enumerate(cmake_args):
+                print(f"  [{i}] {arg}")
+
+            with telemetry_phase(telemetry, "configure"):
+                run_cmd(cmd_str, cwd=build_path, env=env,
+                        log_path=os.path.join(log_dir, "configure.log"))
+            if dep_cache["enabled"]:
+                telemetry["dep_cache"]["seed_entries"] = harvest_cmake_seed(
+                    build_path, src_dir, seed_key, set(_cmake_definitions(cmake_args)))
+                save_dep_cache(dep_cache)
+            save_build_state(build_path, {
+                "fingerprint": fingerprint,
+                "configure_fingerprint": configure_fingerprint,
+                "cmake_args": cmake_args,
+                "dep_roots": dep_roots,
+            })
+
+        print("=== USD CMake build ===")
+        # job pool이 compile/link 동시 실행 수를 제한, --parallel은 상한
+        env["USD_BUILD_JOB_RSS_LOG"] = job_rss_log(log_dir, "build")
+        # configure(CMake가 .ninja_log를 recompact)가 끝난 뒤 위치 → 이번 빌드분만 분석
+        telemetry["ninja_log_marks"]["usd"] = rezbuild_telemetry.ninja_log_mark(
+            os.path.join(build_path, ".ninja_log"))
+        with telemetry_phase(telemetry, "build"):
+            run_cmd(f"cmake --build . --parallel {max_jobs}",
+                    cwd=build_path, env=env,
+                    log_path=os.path.join(log_dir, "build.log"))
+        # distcc 컴파일은 원격에서 실행되므로 로컬 compile 추정치에 넣지 않음
+        telemetry["job_peak_rss_mb"] = record_peak_rss(
+            memory_label, env.pop("USD_BUILD_JOB_RSS_LOG"),
+            roles=("link",) if distcc else ("compile", "link"))
+
+        if "install" in targets:
+            print(f"=== USD CMake install (staging: {stage_dir}) ===")
+            reset_stage_dir(stage_dir)
+            env["DESTDIR"] = stage_dir
+            with telemetry_phase(telemetry, "install"):
+                run_cmd("cmake --install .", cwd=build_path, env=env,
+                        log_path=os.path.join(log_dir, "install.log"))
+
+        print(f"USD {version} build completed successfully")
+
+        # === Arnold USD 플러그인 빌드 (선택) ===
+        arnold_ok = True
+        if arnold_root and os.path.isdir(arnold_usd_src):
+            print("=== Arnold USD plugin build ===")
+            with telemetry_phase(telemetry, "arnold"):
+                arnold_ok = build_arnold_usd(
+                    arnold_usd_src, build_path, install_root, env, arnold_root,
+                    extra_cmake_args=arnold_extra_args, usd_root=stage_root,
+                    ninja_log_marks=telemetry["ninja_log_marks"])
+        else:
+            print("Arnold USD source not found, skipping Arnold plugin build")
+
+        telemetry["compiler_cache"] = report_compiler_cache(compiler_cache, env)
+        telemetry["distcc"] = report_distributed_compile(distcc)
+
+        if rpath_mode and "install" in targets:
+            with telemetry_phase(telemetry, "rpath_check"):
+                rpath_report = verify_rpath_install(stage_root, install_root,
+                                                    [build_path, stage_dir])
+            telemetry["rpath"] = {"ok": rpath_report["ok"],
+                                  "elf_files": rpath_report["elf_files"],
+                                  "unresolved": rpath_report["unresolved"],
+                                  "leaks": rpath_report["leaks"]}
+
+        if strip_mode and "install" in targets:
+            with telemetry_phase(telemetry, "strip"):
+                telemetry["strip"] = split_debug_info(stage_root, debug_stage, env,
+                                                      split_dwarf=opt_info.get("split_dwarf", False))
+
+        if "install" in targets:
+            # 패키지 도구 + lib/usd/plugInfo.json 병합 (Arnold 플러그인 설치 이후)
+            with telemetry_phase(telemetry, "plugin_index"):
+                install_package_tools(stage_root)
+                telemetry["plugin_index"] = {"plugins": usdplugindex.build_index(stage_root)}
+                problems = usdplugindex.check_index(stage_root)
+                if problems:
+                    sys.exit("plugInfo index check failed: " + "; ".join(problems))
+            if allocator_lib:
+                write_malloc_preload(stage_root, allocator_lib)
+
+            # pxr / usdview / 생성된 schema Python 파일 pyc 사전 컴파일 + import 시간 기록
+            with telemetry_phase(telemetry, "precompile"):
+                telemetry["pyc_files"] = precompile_python(python_exe, stage_root,
+                                                           install_root, env)
+            skip_imports = () if _cmake_definitions(cmake_args).get("PXR_BUILD_USDVIEW") == "ON" \
+                else ("usdview",)
+            telemetry["import_time"] = import_time_report(python_exe, stage_root, env,
+                                                          build_path, skip=skip_imports)
+            telemetry["footprint"] = install_footprint(stage_root)
+
+            # allocator 벤치마크 gate: 시스템 allocator보다 빠르지 않으면 publish 중단
+            if allocator_lib and _env_flag("USD_BUILD_ALLOCATOR_GATE"):
+                with telemetry_phase(telemetry, "allocator_gate"):
+                    telemetry["allocator"]["benchmark"] = allocator_gate(
+                        python_exe, stage_root, env, build_path, allocator_lib)
+
+            # perf 모드: release 배포본 대비 런타임 비교, 느려진 벤치마크가 있으면 publish 중단
+            if _env_flag("USD_BUILD_BENCH", default=opt == "perf"):
+                with telemetry_phase(telemetry, "benchmark"):
+                    telemetry["benchmark"] = benchmark_against_live(
+                        python_exe, stage_root, live_root, env, build_path)
+                regressions = telemetry["benchmark"].get("regressions")
+                if regressions and not _env_flag("USD_BUILD_BENCH_ALLOW_REGRESSIONS"):
+                    sys.exit(f"Benchmark regressions vs {live_root}: {', '.join(regressions)} "
+                             f"(set USD_BUILD_BENCH_ALLOW_REGRESSIONS=1 to publish anyway)")
+
+            # 노드 로컬 캐시(usdlocalize)용 manifest: 설치 트리를 바꾸는 마지막 단계
+            with telemetry_phase(telemetry, "manifest"):
+                telemetry["manifest"] = usdlocalize.write_manifest(
+                    stage_root, f"{name}-{version} {variant_subpath}".strip())
+
+        # Arnold 플러그인이 빠진 설치 트리는 artifact로 남기지 않음
+        if artifact_fingerprint and arnold_ok:
+            with telemetry_phase(telemetry, "artifact_store"):
+                save_artifact(artifact_store, artifact_fingerprint, stage_root, inputs,
+                              debug_tree=debug_stage if strip_mode else None)
 
     # === 설치 후처리 ===
     if "install" in targets:
-        # package.py 복사 (버전 루트에 1개)
-        server_base = f"/core/Linux/APPZ/packages/{name}/{version}"
-        os.makedirs(server_base, exist_ok=True)
         dst_pkg = os.path.join(server_base, "package.py")
-        print(f"Copying package.py -> {dst_pkg}")
-        shutil.copy(os.path.join(source_path, "package.py"), dst_pkg)
+        build_info = {"profile": profile_name, "opt": opt,
+                      "cpu_baseline": opt_info.get("cpu_baseline", ""),
+                      "allocator": allocator_request or allocator_lib or "system"}
+        # staging 트리 검증 → 서버 경로로 원자적 교체 (이전 트리는 rollback용으로 보존)
+        with telemetry_phase(telemetry, "publish"):
+            verify_stage(stage_root)
+            check_variant_consistency(dst_pkg, variant_subpath, build_info)
+            publish_install(stage_root, install_root)
+            if strip_mode and os.path.isdir(debug_stage):
+                publish_debug_tree(debug_stage, debug_root)
+
+        # variant 간 동일 파일 hardlink dedup (헤더, plugInfo.json, 리소스 등)
+        if _env_flag("USD_BUILD_DEDUP", default=True):
+            with telemetry_phase(telemetry, "dedup"):
+                telemetry["dedup"] = dedup_package_tree(server_base)
+
+        # package.py 복사 (버전 루트에 1개, usd_build_info는 variant별)
+        os.makedirs(server_base, exist_ok=True)
+        print(f"Installing package.py ({profile_name} profile) -> {dst_pkg}")
+        write_package_py(os.path.join(source_path, "package.py"), dst_pkg, profile,
+                         extra_requires=[allocator_request] if allocator_request else [],
+                         metadata=build_info, variant=variant_subpath)
 
         # 빌드 마커
+        os.makedirs(build_path, exist_ok=True)
         marker = os.path.join(build_path, "build.rxt")
         open(marker, "a").close()
 
     print(f"usd-{version} (Python {py_version}) build/install complete: {install_root}")
 
 
-def build_arnold_usd(arnold_usd_src, build_path, install_root, env, arnold_root):
-    """Arnold USD 플러그인 빌드"""
+def build_arnold_usd(arnold_usd_src, build_path, install_root, env, arnold_root,
+                     extra_cmake_args=None, usd_root=None, ninja_log_marks=None):
+    """Arnold USD 플러그인 빌드 (성공 여부 반환)
+    usd_root: 빌드에 사용할 USD 설치 트리 (staging 설치 시 DESTDIR 아래 경로)
+    ninja_log_marks: 빌드 직전 .ninja_log 위치를 기록할 telemetry dict"""
     arnold_usd_build = os.path.join(build_path, "arnold-usd")
+    # 예전 Makefile 생성기 트리는 Ninja로 다시 구성
+    if os.path.isfile(os.path.join(arnold_usd_build, "CMakeCache.txt")) and \
+            not os.path.isfile(os.path.join(arnold_usd_build, "build.ninja")):
+        shutil.rmtree(arnold_usd_build)
     os.makedirs(arnold_usd_build, exist_ok=True)
 
     cmake_root = os.environ.get("REZ_CMAKE_ROOT", "")
@@ -469,35 +3344,62 @@ def build_arnold_usd(arnold_usd_src, build_path, install_root, env, arnold_root)
         cmake_bin,
         arnold_usd_src,
         f"-DCMAKE_INSTALL_PREFIX={install_root}",
-        f"-DUSD_ROOT={install_root}",
+        f"-DUSD_ROOT={usd_root or install_root}",
         f"-DARNOLD_ROOT={arnold_root}",
         f"-DARNOLD_BINARY_DIR={arnold_root}/bin",
         f"-DARNOLD_LIBRARY={arnold_root}/bin/libai.so",
         f"-DARNOLD_INCLUDE_DIR={arnold_root}/include",
         "-DCMAKE_BUILD_TYPE=Release",
+        "-G", "Ninja",
         "-Wno-dev",
     ]
+    parallelism = plan_parallelism("arnold-usd", build_jobs())
+    cmake_args.extend(job_pool_args(parallelism, quoted=False))
+    cmake_args.extend(extra_cmake_args or [])
 
+    log_dir = os.path.join(build_path, "logs")
     print(f"Configuring Arnold USD: {' '.join(cmake_args)}")
-    result = subprocess.run(cmake_args, cwd=arnold_usd_build, env=env)
-    if result.returncode != 0:
+    log_path = os.path.join(log_dir, "arnold-configure.log")
+    returncode, _ = _run_with_rusage(cmake_args, cwd=arnold_usd_build, env=env,
+                                     log_path=log_path)
+    if returncode != 0:
+        failures = summarize_failure(log_path)
+        if failures:
+            write_failure_summary(log_path, failures)
         print("WARNING: Arnold USD cmake configure failed, skipping")
-        return
+        return False
 
     print("Building Arnold USD...")
-    build_cmd = [cmake_bin, "--build", ".", "--parallel"]
-    result = subprocess.run(build_cmd, cwd=arnold_usd_build, env=env)
-    if result.returncode != 0:
+    if ninja_log_marks is not None:
+        ninja_log_marks["arnold-usd"] = rezbuild_telemetry.ninja_log_mark(
+            os.path.join(arnold_usd_build, ".ninja_log"))
+    build_cmd = [cmake_bin, "--build", ".", "--parallel", str(build_jobs())]
+    log_path = os.path.join(log_dir, "arnold.log")
+    rss_log = job_rss_log(os.path.dirname(log_path), "arnold")
+    returncode, _ = _run_with_rusage(build_cmd, cwd=arnold_usd_build,
+                                     env=dict(env, USD_BUILD_JOB_RSS_LOG=rss_log),
+                                     log_path=log_path)
+    if returncode != 0:
+        failures = summarize_failure(log_path)
+        if failures:
+            write_failure_summary(log_path, failures)
         print("WARNING: Arnold USD build failed, skipping")
-        return
+        return False
+    record_peak_rss("arnold-usd", rss_log)
 
     # 플러그인 설치
     install_cmd = [cmake_bin, "--install", "."]
-    result = subprocess.run(install_cmd, cwd=arnold_usd_build, env=env)
-    if result.returncode == 0:
+    log_path = os.path.join(log_dir, "arnold-install.log")
+    returncode, _ = _run_with_rusage(install_cmd, cwd=arnold_usd_build, env=env,
+                                     log_path=log_path)
+    if returncode == 0:
         print("Arnold USD plugin installed successfully")
-    else:
-        print("WARNING: Arnold USD install failed")
+        return True
+    failures = summarize_failure(log_path)
+    if failures:
+        write_failure_summary(log_path, failures)
+    print("WARNING: Arnold USD install failed")
+    return False
 
 
 if __name__ == "__main__":
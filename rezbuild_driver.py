@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 rezbuild_driver.py - 멀티 variant 병렬 빌드 driver
+package.py의 variant들을 `rez-build --variants <i>` 로 동시에 빌드하되,
+전역 job 예산(slot lock 파일, rezbuild_jobslot.py)을 공유해 머신이 과부하되거나
+configure/link 단계에서 놀지 않도록 한다.
+
+사용:
+    python rezbuild_driver.py [--install] [--jobs N] [--concurrency M]
+                              [--variants 0 1 ...] [-- extra rez-build args]
+"""
+import os
+import re
+import ast
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# rezbuild.py 출력에서 단계/진행률 추출 (banner 앞부분 일치: "=== USD CMake install (staging: ...) ===")
+PHASE_MARKERS = [
+    ("=== Preflight dependency check ===", "preflight"),
+    ("=== USD CMake configure ===", "configure"),
+    ("=== USD CMake build ===", "build"),
+    ("=== USD CMake install", "install"),
+    ("=== Arnold USD plugin build ===", "arnold"),
+]
+NINJA_PROGRESS_RE = re.compile(r"^\[(\d+)/(\d+)\]")
+
+
+def phase_of(line):
+    """rezbuild.py 출력 한 줄 → 시작된 단계 이름 (banner가 아니면 None)"""
+    for marker, phase in PHASE_MARKERS:
+        if line.lstrip().startswith(marker):
+            return phase
+    return None
+
+
+def load_variants(package_py):
+    """package.py의 variants 리스트 (실행하지 않고 AST로 읽음)"""
+    with open(package_py, "r") as f:
+        tree = ast.parse(f.read(), package_py)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and \
+                any(isinstance(t, ast.Name) and t.id == "variants" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def available_memory_mb():
+    """MemAvailable (MB), /proc/meminfo가 없으면 물리 메모리 전체"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+
+def create_slot_dir(jobs):
+    """전역 job 예산만큼 slot lock 파일 생성"""
+    slot_dir = tempfile.mkdtemp(prefix="usd-jobserver-")
+    for i in range(jobs):
+        open(os.path.join(slot_dir, f"slot.{i:03d}"), "w").close()
+    return slot_dir
+
+
+def _format_elapsed(seconds):
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{sec:02d}s" if hours else f"{minutes}m{sec:02d}s"
+
+
+class VariantBuild(object):
+    """rez-build 자식 프로세스 1개 (variant 1개)"""
+
+    def __init__(self, index, variant, log_dir):
+        self.index = index
+        self.label = "/".join(variant)
+        self.log_path = os.path.join(log_dir, f"variant-{index}.log")
+        self.proc = None
+        self.log_file = None
+        self.start = None
+        self.end = None
+        self.phase = "queued"
+        self.progress = None
+        self._offset = 0
+
+    def launch(self, cmd, env):
+        self.log_file = open(self.log_path, "wb")
+        self.proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=self.log_file,
+                                     stderr=subprocess.STDOUT)
+        self.start = time.time()
+        self.phase = "starting"
+
+    def poll(self):
+        """로그 새 부분을 읽어 단계/진행률 갱신, 종료 여부 반환"""
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # 마지막 줄이 아직 쓰이는 중일 수 있으므로 완성된 줄까지만 소비
+        cut = chunk.rfind(b"\n") + 1
+        self._offset += cut
+        for raw in chunk[:cut].splitlines():
+            line = raw.decode("utf-8", "replace")
+            phase = phase_of(line)
+            if phase:
+                self.phase = phase
+                self.progress = None
+            match = NINJA_PROGRESS_RE.match(line)
+            if match:
+                self.progress = (int(match.group(1)), int(match.group(2)))
+        if self.proc.poll() is None:
+            return False
+        if self.end is None:
+            self.end = time.time()
+            self.log_file.close()
+            self.phase = "done" if self.proc.returncode == 0 else "FAILED"
+        return True
+
+    @property
+    def elapsed(self):
+        if self.start is None:
+            return 0.0
+        return (self.end or time.time()) - self.start
+
+    def status_line(self):
+        detail = self.phase
+        if self.progress:
+            done, total = self.progress
+            detail += f" {done}/{total} ({100.0 * done / total:.0f}%)"
+        return f"  [{self.index}] {self.label:<58} {detail:<28} {_format_elapsed(self.elapsed)}"
+
+
+def print_progress(builds, jobs):
+    running = [b for b in builds if b.proc is not None and b.end is None]
+    finished = [b for b in builds if b.end is not None]
+    print(f"=== {time.strftime('%H:%M:%S')} running {len(running)}, "
+          f"finished {len(finished)}/{len(builds)}, job budget {jobs} ===")
+    for b in builds:
+        if b.proc is not None:
+            print(b.status_line())
+    sys.stdout.flush()
+
+
+def print_summary(builds, wall):
+    print("=== Variant build summary ===")
+    for b in builds:
+        if b.proc is None:
+            status = "SKIPPED"
+        elif b.proc.returncode == 0:
+            status = "PASS"
+        else:
+            status = f"FAIL (exit {b.proc.returncode})"
+        print(f"  [{b.index}] {b.label:<58} {status:<16} {_format_elapsed(b.elapsed):>10}"
+              f"  {b.log_path}")
+    serial = sum(b.elapsed for b in builds)
+    print(f"  wall clock {_format_elapsed(wall)} (sum of variant times {_format_elapsed(serial)})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build several usd variants in parallel "
+                                                 "under one global job budget")
+    parser.add_argument("--install", "-i", action="store_true",
+                        help="pass -i to rez-build")
+    parser.add_argument("--jobs", "-j", type=int, default=multiprocessing.cpu_count(),
+                        help="global compile/link job budget (default: CPU count)")
+    parser.add_argument("--concurrency", "-c", type=int, default=2,
+                        help="number of variants built at the same time (default: 2)")
+    parser.add_argument("--memory", type=int, default=None,
+                        help="total memory budget in MB shared by concurrent variants "
+                             "(default: MemAvailable)")
+    parser.add_argument("--variants", type=int, nargs="+",
+                        help="variant indices to build (default: all)")
+    parser.add_argument("--log-dir", default=os.path.join(HERE, "build", "driver"),
+                        help="per-variant log directory")
+    parser.add_argument("--interval", type=float, default=15.0,
+                        help="seconds between progress reports")
+    parser.add_argument("--rez-build", default="rez-build", help="rez-build executable")
+    parser.add_argument("extra", nargs=argparse.REMAINDER,
+                        help="extra rez-build arguments after --")
+    args = parser.parse_args(argv)
+
+    variants = load_variants(os.path.join(HERE, "package.py"))
+    indices = args.variants if args.variants is not None else list(range(len(variants)))
+    for i in indices:
+        if not 0 <= i < len(variants):
+            parser.error(f"variant index out of range: {i} (0..{len(variants) - 1})")
+    if not shutil.which(args.rez_build):
+        parser.error(f"{args.rez_build} not found in PATH")
+
+    os.makedirs(args.log_dir, exist_ok=True)
+    slot_dir = create_slot_dir(args.jobs)
+    env = os.environ.copy()
+    env["USD_BUILD_JOBSERVER"] = slot_dir
+    # ninja에는 예산 전체를 주고 실제 동시 실행 수는 slot lock이 제한
+    env["USD_BUILD_JOBS"] = str(args.jobs)
+    # 각 variant는 메모리 예산의 1/concurrency 안에서 compile/link job pool 크기를 정함
+    memory_mb = args.memory or available_memory_mb()
+    per_variant_mb = memory_mb // max(1, min(args.concurrency, len(indices)))
+    env["USD_BUILD_MEMORY_MB"] = str(per_variant_mb)
+
+    extra = [a for a in args.extra if a != "--"]
+    builds = [VariantBuild(i, variants[i], args.log_dir) for i in indices]
+    print(f"=== Building {len(builds)} variant(s), {args.concurrency} at a time, "
+          f"job budget {args.jobs}, memory {per_variant_mb} MB per variant "
+          f"(slots: {slot_dir}) ===")
+
+    wall_start = time.time()
+    pending = list(builds)
+    last_report = 0.0
+    try:
+        while True:
+            running = [b for b in builds if b.proc is not None and b.end is None]
+            while pending and len(running) < args.concurrency:
+                b = pending.pop(0)
+                cmd = [args.rez_build] + (["-i"] if args.install else []) + \
+                    ["--variants", str(b.index)] + extra
+                print(f"[START] [{b.index}] {b.label}: {' '.join(cmd)}")
+                b.launch(cmd, env)
+                running.append(b)
+            for b in running:
+                if b.poll():
+                    result = "PASS" if b.proc.returncode == 0 else "FAIL"
+                    print(f"[{result}] [{b.index}] {b.label} "
+                          f"({_format_elapsed(b.elapsed)}) log: {b.log_path}")
+            if not pending and all(b.end is not None for b in builds):
+                break
+            if time.time() - last_report >= args.interval:
+                print_progress(builds, args.jobs)
+                last_report = time.time()
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("Interrupted, terminating variant builds...")
+        for b in builds:
+            if b.proc is not None and b.proc.poll() is None:
+                b.proc.terminate()
+        raise
+    finally:
+        shutil.rmtree(slot_dir, ignore_errors=True)
+
+    print_summary(builds, time.time() - wall_start)
+    return 0 if all(b.proc.returncode == 0 for b in builds) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
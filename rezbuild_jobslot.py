@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 rezbuild_jobslot.py - 컴파일/링크 job slot launcher
+CMAKE_<LANG>_COMPILER_LAUNCHER / LINKER_LAUNCHER 로 삽입되어, 여러 variant 빌드가
+rezbuild_driver.py 가 만든 slot 디렉토리(USD_BUILD_JOBSERVER)의 lock 파일을
+하나씩 잡은 상태에서만 컴파일러를 실행하도록 한다 (GNU make jobserver 방식).
+
+USD_BUILD_JOB_RSS_LOG 가 있으면 command를 자식으로 실행해 peak RSS를
+"<role> <KB>" 한 줄로 기록한다 (rezbuild.py가 compile/link 메모리 추정치로 사용).
+
+사용: python rezbuild_jobslot.py [--role compile|link|cpp] <command> [args...]
+(cpp: distcc 빌드에서 CCACHE_PREFIX_CPP로 ccache 전처리만 slot 안에서 실행)
+USD_BUILD_JOBSERVER 와 USD_BUILD_JOB_RSS_LOG 가 모두 없으면 command를 그대로 실행한다.
+"""
+import os
+import sys
+import time
+import fcntl
+import random
+
+SLOT_PREFIX = "slot."
+
+
+def acquire_slot(slot_dir):
+    """빈 slot lock을 잡을 때까지 대기 → lock이 걸린 fd 반환"""
+    slots = sorted(name for name in os.listdir(slot_dir) if name.startswith(SLOT_PREFIX))
+    if not slots:
+        return None
+    delay = 0.02
+    while True:
+        # 매번 같은 slot부터 경쟁하지 않도록 시작 위치를 섞음
+        start = random.randrange(len(slots))
+        for name in slots[start:] + slots[:start]:
+            fd = os.open(os.path.join(slot_dir, name), os.O_RDWR)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+
+
+def run_measured(argv, role, rss_log):
+    """command를 자식으로 실행하고 peak RSS 기록 → 종료 코드.
+    wait4 rusage의 ru_maxrss는 자식 트리(g++ → cc1plus, ccache → compiler)의 최대값"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execvp(argv[0], argv)
+        except OSError as exc:
+            sys.stderr.write(f"rezbuild_jobslot: {argv[0]}: {exc}\n")
+        os._exit(127)
+    while True:
+        try:
+            _, status, rusage = os.wait4(pid, 0)
+            break
+        except InterruptedError:
+            continue
+    # O_APPEND 한 줄 쓰기는 동시 job 사이에서 섞이지 않음
+    fd = os.open(rss_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, f"{role} {rusage.ru_maxrss}\n".encode("ascii"))
+    finally:
+        os.close(fd)
+    return os.waitstatus_to_exitcode(status)
+
+
+def main(argv):
+    role = "job"
+    if argv[:1] == ["--role"] and len(argv) > 1:
+        role, argv = argv[1], argv[2:]
+    if not argv:
+        sys.exit("usage: rezbuild_jobslot.py [--role compile|link|cpp] <command> [args...]")
+    slot_dir = os.environ.get("USD_BUILD_JOBSERVER", "")
+    if slot_dir and os.path.isdir(slot_dir):
+        fd = acquire_slot(slot_dir)
+        if fd is not None:
+            # exec 후에도 lock fd가 유지되도록 상속 허용 → 컴파일러 종료 시 slot 반환
+            os.set_inheritable(fd, True)
+    rss_log = os.environ.get("USD_BUILD_JOB_RSS_LOG", "")
+    if rss_log:
+        sys.exit(run_measured(argv, role, rss_log))
+    os.execvp(argv[0], argv)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
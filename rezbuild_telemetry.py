@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 rezbuild_telemetry.py - 빌드 telemetry 분석/비교
+rezbuild.py 가 빌드 디렉토리에 남기는 build_telemetry.json (단계별 wall/CPU 시간,
+peak RSS, .ninja_log 분석, pxr import 시간)을 읽고 두 빌드를 비교한다.
+
+사용:
+    python rezbuild_telemetry.py show <telemetry.json>
+    python rezbuild_telemetry.py compare <before.json> <after.json>
+    python rezbuild_telemetry.py ninja-log <build_dir/.ninja_log>
+"""
+import os
+import re
+import sys
+import json
+import bisect
+import fnmatch
+import argparse
+
+LIBRARY_RE = re.compile(r"CMakeFiles/([^/]+)\.dir/")
+LINK_SUFFIXES = (".so", ".a", ".dylib")
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+MARK_TAIL_BYTES = 256
+
+
+def ninja_log_mark(path):
+    """빌드 직전의 .ninja_log 위치 {"offset", "tail"} (이번 빌드가 추가한 줄만 읽는 기준).
+    tail: offset 직전 바이트 - ninja가 로그를 recompact 해 다시 썼는지 확인용"""
+    if not os.path.isfile(path):
+        return {"offset": 0, "tail": ""}
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.seek(max(0, offset - MARK_TAIL_BYTES))
+        return {"offset": offset, "tail": f.read(offset - f.tell()).hex()}
+
+
+def _mark_valid(f, mark):
+    if mark["offset"] == 0:
+        return True
+    f.seek(0, os.SEEK_END)
+    if f.tell() < mark["offset"]:
+        return False
+    tail = bytes.fromhex(mark["tail"])
+    f.seek(mark["offset"] - len(tail))
+    return f.read(len(tail)) == tail
+
+
+def parse_ninja_log(path, mark=None):
+    """.ninja_log에서 이번 빌드분 항목 [(start_ms, end_ms, [outputs])].
+
+    mark (빌드 전 ninja_log_mark())가 있으면 그 뒤에 추가된 줄만 읽음.
+    mark가 없거나 ninja가 그 사이 로그를 recompact 했으면 추정으로 대신함:
+    ninja는 실행마다 시간을 0부터 다시 세고 완료 순서대로 기록하므로 end 시간이 줄어드는
+    지점을 새 실행의 시작으로 봄 (이전 실행이 짧았으면 두 실행이 합쳐질 수 있음)."""
+    runs = [[]]
+    last_end = -1
+    edges = {}
+    with open(path, "rb") as f:
+        if mark and _mark_valid(f, mark):
+            f.seek(mark["offset"])
+            boundaries = False
+        else:
+            f.seek(0)
+            boundaries = True
+        for raw in f:
+            line = raw.decode("utf-8", "replace")
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 5:
+                continue
+            start, end, output, cmd_hash = int(fields[0]), int(fields[1]), fields[3], fields[4]
+            if boundaries and end < last_end:
+                runs.append([])
+                edges = {}
+            last_end = end
+            # 출력이 여러 개인 edge는 같은 (start, end, hash)로 반복 기록됨
+            key = (start, end, cmd_hash)
+            if key in edges:
+                edges[key][2].append(output)
+                continue
+            entry = (start, end, [output])
+            edges[key] = entry
+            runs[-1].append(entry)
+    return runs[-1]
+
+
+def classify_target(output):
+    """compile / link / other (precompiled header .gch는 compile)"""
+    if output.endswith((".o", ".gch")):
+        return "compile"
+    base = os.path.basename(output)
+    if base.endswith(LINK_SUFFIXES) or ".so." in base or "." not in base:
+        return "link"
+    return "other"
+
+
+def target_library(output):
+    """오브젝트 파일이 속한 CMake target 이름 (…/CMakeFiles/<target>.dir/…)"""
+    match = LIBRARY_RE.search(output)
+    return match.group(1) if match else None
+
+
+def critical_path(entries):
+    """타임라인 기반 critical path 근사 (실제 의존 경로가 아님).
+
+    마지막에 끝난 target부터, 시작 시점 이전에 끝난 target 중 가장 늦게 끝난 것을
+    거슬러 올라가며 연결 (의존 그래프 없이 .ninja_log만으로 계산). 그 target이 실제로
+    의존하던 것이 아닐 수 있으므로 "이 target들을 줄이면 빌드가 짧아진다"는 보장은 없음."""
+    if not entries:
+        return []
+    ordered = sorted(entries, key=lambda e: e[1])
+    ends = [e[1] for e in ordered]
+    chain = [ordered[-1]]
+    while True:
+        idx = bisect.bisect_right(ends, chain[-1][0]) - 1
+        if idx < 0:
+            break
+        chain.append(ordered[idx])
+    chain.reverse()
+    return chain
+
+
+def analyze_ninja_log(path, top=20, mark=None):
+    """.ninja_log 분석 결과 dict (파일이 없으면 None). mark: parse_ninja_log 참고"""
+    if not os.path.isfile(path):
+        return None
+    entries = parse_ninja_log(path, mark)
+    if not entries:
+        return None
+
+    def describe(entry):
+        start, end, outputs = entry
+        return {"target": outputs[0], "seconds": round((end - start) / 1000.0, 3),
+                "start": round(start / 1000.0, 3)}
+
+    by_kind = {"compile": [], "link": [], "other": []}
+    libraries = {}
+    for entry in entries:
+        kind = classify_target(entry[2][0])
+        by_kind[kind].append(entry)
+        if kind == "compile":
+            lib = target_library(entry[2][0]) or "(other)"
+            stats = libraries.setdefault(lib, {"compile_s": 0.0, "objects": 0})
+            stats["compile_s"] += (entry[1] - entry[0]) / 1000.0
+            stats["objects"] += 1
+    for stats in libraries.values():
+        stats["compile_s"] = round(stats["compile_s"], 3)
+
+    def slowest(items):
+        items = sorted(items, key=lambda e: e[1] - e[0], reverse=True)[:top]
+        return [describe(e) for e in items]
+
+    chain = critical_path(entries)
+    wall = max(e[1] for e in entries) - min(e[0] for e in entries)
+    return {
+        "targets": len(entries),
+        "wall_s": round(wall / 1000.0, 3),
+        "compile_s": round(sum(e[1] - e[0] for e in by_kind["compile"]) / 1000.0, 3),
+        "link_s": round(sum(e[1] - e[0] for e in by_kind["link"]) / 1000.0, 3),
+        "slowest_compile": slowest(by_kind["compile"]),
+        "slowest_link": slowest(by_kind["link"]),
+        "critical_path_method": "timeline-approximation",
+        "critical_path": [describe(e) for e in chain],
+        "critical_path_s": round(sum(e[1] - e[0] for e in chain) / 1000.0, 3),
+        "libraries": libraries,
+    }
+
+
+def library_savings(before, after, patterns):
+    """unity/PCH 대상 library(target glob 패턴)별 compile 시간 비교 {library: {...}}"""
+    libs_a, libs_b = before.get("libraries", {}), after.get("libraries", {})
+    savings = {}
+    for lib in sorted(libs_b):
+        if lib not in libs_a or not any(fnmatch.fnmatchcase(lib, p) for p in patterns):
+            continue
+        a, b = libs_a[lib], libs_b[lib]
+        savings[lib] = {"before_s": a["compile_s"], "after_s": b["compile_s"],
+                        "saved_s": round(a["compile_s"] - b["compile_s"], 3),
+                        "objects_before": a["objects"], "objects_after": b["objects"]}
+    return savings
+
+
+def print_unity_savings(unity, top=25):
+    savings = unity.get("savings", {})
+    total_a = sum(s["before_s"] for s in savings.values())
+    total_b = sum(s["after_s"] for s in savings.values())
+    print(f"--- unity/PCH compile time vs {unity.get('baseline')} "
+          f"({len(savings)} libraries, {total_a:.1f}s -> {total_b:.1f}s) ---")
+    print(f"  {'library':<32} {'before s':>10} {'after s':>10} {'saved s':>10} {'objects':>12}")
+    for lib, s in sorted(savings.items(), key=lambda kv: kv[1]["saved_s"], reverse=True)[:top]:
+        print(f"  {lib:<32} {s['before_s']:>10.1f} {s['after_s']:>10.1f} {s['saved_s']:>10.1f} "
+              f"{s['objects_before']:>5} -> {s['objects_after']:<4}")
+
+
+def parse_importtime(text):
+    """`python -X importtime` stderr → [(module, self_us, cumulative_us, depth)]"""
+    entries = []
+    for line in text.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def summarize_importtime(entries, top=25):
+    """import 시간 요약: 최상위 import 합계와 누적 시간이 큰 모듈"""
+    total_us = sum(e[2] for e in entries if e[3] == 0)
+    slowest = sorted(entries, key=lambda e: e[2], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000.0, 2),
+        "modules": len(entries),
+        "self_ms": {e[0]: round(e[1] / 1000.0, 2) for e in entries if e[0].startswith("pxr")},
+        "slowest": [{"module": e[0], "cumulative_ms": round(e[2] / 1000.0, 2),
+                     "self_ms": round(e[1] / 1000.0, 2)} for e in slowest],
+    }
+
+
+def load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _fmt_delta(before, after):
+    if before is None or after is None:
+        return ""
+    delta = after - before
+    pct = f" ({100.0 * delta / before:+.1f}%)" if before else ""
+    return f"{delta:+.1f}{pct}"
+
+
+def print_ninja_summary(ninja, top=10):
+    print(f"  targets: {ninja['targets']}  wall {ninja['wall_s']:.1f}s  "
+          f"compile {ninja['compile_s']:.1f}s  link {ninja['link_s']:.1f}s  "
+          f"critical path ~{ninja['critical_path_s']:.1f}s (approx.)")
+    for title, key in (("slowest compile", "slowest_compile"), ("slowest link", "slowest_link")):
+        print(f"  {title}:")
+        for item in ninja[key][:top]:
+            print(f"    {item['seconds']:8.1f}s  {item['target']}")
+    print(f"  critical path, timeline approximation - not dependency-based "
+          f"({len(ninja['critical_path'])} targets):")
+    for item in ninja["critical_path"]:
+        print(f"    {item['start']:8.1f}s +{item['seconds']:7.1f}s  {item['target']}")
+
+
+def show(telemetry):
+    print(f"=== {telemetry.get('package')}-{telemetry.get('version')} "
+          f"{telemetry.get('variant')} [{telemetry.get('status')}] "
+          f"{telemetry.get('started')} ===")
+    print(f"  {'phase':<16} {'wall s':>10} {'cpu s':>10} {'peak RSS MB':>12}")
+    for phase in telemetry.get("phases", []):
+        print(f"  {phase['name']:<16} {phase['wall_s']:>10.1f} {phase['cpu_s']:>10.1f} "
+              f"{phase.get('peak_rss_mb', 0):>12}")
+    for label, ninja in sorted(telemetry.get("ninja", {}).items()):
+        if ninja:
+            print(f"--- ninja: {label} ---")
+            print_ninja_summary(ninja)
+    if telemetry.get("unity", {}).get("savings"):
+        print_unity_savings(telemetry["unity"])
+    for label, report in sorted(telemetry.get("import_time", {}).items()):
+        print(f"--- import time: {label} ({report.get('statement', '')}) ---")
+        if report.get("error"):
+            print(f"  failed: {report['error']}")
+            continue
+        startup = f", startup {report['startup_ms']:.1f}ms" if "startup_ms" in report else ""
+        print(f"  total {report['total_ms']:.1f}ms{startup}, {report['modules']} modules")
+        for item in report["slowest"][:10]:
+            print(f"    {item['cumulative_ms']:8.1f}ms (self {item['self_ms']:6.1f}ms)  "
+                  f"{item['module']}")
+
+
+def compare(before, after, top=15):
+    """두 telemetry 비교 출력"""
+    print(f"=== before: {before.get('variant')} {before.get('started')}")
+    print(f"=== after:  {after.get('variant')} {after.get('started')}")
+
+    # 의존 패키지 변경 (예: openvdb 11 → 13)
+    roots_a = before.get("dep_roots", {})
+    roots_b = after.get("dep_roots", {})
+    changed = [v for v in sorted(set(roots_a) | set(roots_b)) if roots_a.get(v) != roots_b.get(v)]
+    if changed:
+        print("--- dependency changes ---")
+        for var in changed:
+            print(f"  {var}: {roots_a.get(var) or '(not set)'} -> {roots_b.get(var) or '(not set)'}")
+
+    print("--- phases ---")
+    print(f"  {'phase':<16} {'before s':>10} {'after s':>10} {'delta':>18} "
+          f"{'cpu delta':>18} {'RSS MB':>14}")
+    phases_a = {p["name"]: p for p in before.get("phases", [])}
+    phases_b = {p["name"]: p for p in after.get("phases", [])}
+    for name in list(phases_a) + [n for n in phases_b if n not in phases_a]:
+        a, b = phases_a.get(name), phases_b.get(name)
+        wall_a = a["wall_s"] if a else None
+        wall_b = b["wall_s"] if b else None
+        rss = f"{a.get('peak_rss_mb', 0) if a else '-'}->{b.get('peak_rss_mb', 0) if b else '-'}"
+        print(f"  {name:<16} {wall_a if wall_a is not None else '-':>10} "
+              f"{wall_b if wall_b is not None else '-':>10} {_fmt_delta(wall_a, wall_b):>18} "
+              f"{_fmt_delta(a and a['cpu_s'], b and b['cpu_s']):>18} {rss:>14}")
+
+    ninja_a = before.get("ninja", {})
+    ninja_b = after.get("ninja", {})
+    for label in sorted(set(ninja_a) | set(ninja_b)):
+        na, nb = ninja_a.get(label), ninja_b.get(label)
+        if not na or not nb:
+            continue
+        print(f"--- ninja: {label} ---")
+        for key, title in (("targets", "targets"), ("wall_s", "wall_s"),
+                           ("compile_s", "compile_s"), ("link_s", "link_s"),
+                           ("critical_path_s", "~critical_path_s")):
+            print(f"  {title:<16} {na[key]:>10} {nb[key]:>10} {_fmt_delta(na[key], nb[key]):>18}")
+        libs_a, libs_b = na.get("libraries", {}), nb.get("libraries", {})
+        deltas = []
+        for lib in set(libs_a) | set(libs_b):
+            ca = libs_a.get(lib, {}).get("compile_s", 0.0)
+            cb = libs_b.get(lib, {}).get("compile_s", 0.0)
+            deltas.append((cb - ca, lib, ca, cb))
+        deltas.sort(key=lambda d: abs(d[0]), reverse=True)
+        print(f"  compile time by library (top {top} changes):")
+        for delta, lib, ca, cb in deltas[:top]:
+            print(f"    {lib:<32} {ca:>10.1f} {cb:>10.1f} {_fmt_delta(ca, cb):>18}")
+
+    imports_a = before.get("import_time", {})
+    imports_b = after.get("import_time", {})
+    for label in sorted(set(imports_a) | set(imports_b)):
+        ia, ib = imports_a.get(label), imports_b.get(label)
+        if not ia or not ib or ia.get("error") or ib.get("error"):
+            continue
+        print(f"--- import time: {label} ---")
+        print(f"  {'total ms':<16} {ia['total_ms']:>10} {ib['total_ms']:>10} "
+              f"{_fmt_delta(ia['total_ms'], ib['total_ms']):>18}")
+        if "startup_ms" in ia and "startup_ms" in ib:
+            print(f"  {'startup ms':<16} {ia['startup_ms']:>10} {ib['startup_ms']:>10} "
+                  f"{_fmt_delta(ia['startup_ms'], ib['startup_ms']):>18}")
+        self_a, self_b = ia.get("self_ms", {}), ib.get("self_ms", {})
+        deltas = sorted(((self_b.get(m, 0.0) - self_a.get(m, 0.0), m)
+                         for m in set(self_a) | set(self_b)),
+                        key=lambda d: abs(d[0]), reverse=True)
+        print(f"  pxr module self time (top {top} changes):")
+        for delta, module in deltas[:top]:
+            ma, mb = self_a.get(module, 0.0), self_b.get(module, 0.0)
+            print(f"    {module:<32} {ma:>10.1f} {mb:>10.1f} {_fmt_delta(ma, mb):>18}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and compare usd build telemetry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_show = sub.add_parser("show", help="print a telemetry file")
+    p_show.add_argument("telemetry")
+    p_cmp = sub.add_parser("compare", help="diff two telemetry files")
+    p_cmp.add_argument("before")
+    p_cmp.add_argument("after")
+    p_cmp.add_argument("--top", type=int, default=15)
+    p_log = sub.add_parser("ninja-log", help="analyze a .ninja_log directly")
+    p_log.add_argument("ninja_log")
+    p_log.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        show(load(args.telemetry))
+    elif args.command == "compare":
+        compare(load(args.before), load(args.after), top=args.top)
+    else:
+        ninja = analyze_ninja_log(args.ninja_log, top=args.top)
+        if not ninja:
+            sys.exit(f"No entries in {args.ninja_log}")
+        print_ninja_summary(ninja, top=args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
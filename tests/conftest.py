@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""rezbuild*.py / tools/*.py 를 설치 없이 import"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "tools")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
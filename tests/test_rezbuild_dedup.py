@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""rezbuild.py: publish된 variant 트리 간 content pool hardlink dedup"""
+import hashlib
+import os
+
+import pytest
+
+import rezbuild
+
+SHARED = {"include/pxr/pxr.h": "#define PXR 1\n", "lib/usd/plugInfo.json": "{}\n"}
+
+
+def _stage(path, files):
+    for rel, content in files.items():
+        full = os.path.join(path, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+    return str(path)
+
+
+def _ino(path):
+    return os.stat(path).st_ino
+
+
+def _pool_files(base):
+    pool = os.path.join(base, ".pool")
+    return sorted(os.path.join(d, n) for d, _, names in os.walk(pool)
+                  for n in names if n != ".lock")
+
+
+@pytest.fixture
+def base(tmp_path):
+    """variant 두 개가 publish된 버전 루트"""
+    base = str(tmp_path / "usd" / "25.11")
+    for variant, lib in (("python-3.11", "py311"), ("python-3.12", "py312")):
+        stage = _stage(tmp_path / f"stage-{variant}", dict(SHARED, **{"lib/libusd.so": lib}))
+        rezbuild.publish_install(stage, os.path.join(base, variant))
+    return base
+
+
+def test_duplicates_share_one_pool_inode(base):
+    stats = rezbuild.dedup_package_tree(base)
+    assert stats["replaced"] == len(SHARED)
+    for rel in SHARED:
+        a = os.path.join(base, "python-3.11", rel)
+        b = os.path.join(base, "python-3.12", rel)
+        assert _ino(a) == _ino(b)
+        with open(a) as f:
+            assert f.read() == SHARED[rel]
+    # 내용이 다른 파일은 각자의 pool 항목
+    assert _ino(os.path.join(base, "python-3.11", "lib/libusd.so")) != \
+        _ino(os.path.join(base, "python-3.12", "lib/libusd.so"))
+    for path in _pool_files(base):
+        digest = os.path.basename(path).split("-")[0]
+        with open(path, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == digest
+
+
+def test_second_run_replaces_nothing(base):
+    rezbuild.dedup_package_tree(base)
+    stats = rezbuild.dedup_package_tree(base)
+    assert stats["replaced"] == 0
+    assert stats["already_shared"] == stats["files"]
+
+
+def test_unpublished_release_skipped(base):
+    # 설치 중인(아직 링크되지 않은) release 디렉토리
+    pending = _stage(os.path.join(base, ".python-3.13.20260101-000000-abc"), SHARED)
+    rezbuild.dedup_package_tree(base)
+    for rel in SHARED:
+        assert os.stat(os.path.join(pending, rel)).st_nlink == 1
+
+
+def test_unreferenced_pool_entries_removed(base, tmp_path, monkeypatch):
+    rezbuild.dedup_package_tree(base)
+    before = _pool_files(base)
+    # python-3.12의 libusd.so만 바뀐 release로 교체하고 이전 release는 정리
+    monkeypatch.setenv("USD_BUILD_KEEP_RELEASES", "0")
+    rezbuild.publish_install(_stage(tmp_path / "new", dict(SHARED, **{"lib/libusd.so": "v2"})),
+                             os.path.join(base, "python-3.12"))
+    rezbuild.dedup_package_tree(base)
+    after = _pool_files(base)
+    old_lib = hashlib.sha256(b"py312").hexdigest()
+    assert any(os.path.basename(p).startswith(old_lib) for p in before)
+    assert not any(os.path.basename(p).startswith(old_lib) for p in after)
+
+
+def test_publish_between_passes(base, tmp_path):
+    rezbuild.dedup_package_tree(base)
+    old_release = os.path.realpath(os.path.join(base, "python-3.11"))
+    changed = dict(SHARED, **{"include/pxr/pxr.h": "#define PXR 2\n", "lib/libusd.so": "py311"})
+    rezbuild.publish_install(_stage(tmp_path / "republish", changed),
+                             os.path.join(base, "python-3.11"))
+    rezbuild.dedup_package_tree(base)
+    new_root = os.path.join(base, "python-3.11")
+    for rel, content in changed.items():
+        with open(os.path.join(new_root, rel)) as f:
+            assert f.read() == content
+    # 이전 release와 다른 variant의 pool 파일은 바뀌지 않음
+    for root in (old_release, os.path.join(base, "python-3.12")):
+        with open(os.path.join(root, "include/pxr/pxr.h")) as f:
+            assert f.read() == SHARED["include/pxr/pxr.h"]
+    for path in _pool_files(base):
+        with open(path, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == os.path.basename(path).split("-")[0]
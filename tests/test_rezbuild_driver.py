@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""rezbuild_driver.py: rezbuild.py가 실제로 출력하는 banner로 단계 추적"""
+import ast
+import os
+
+import rezbuild_driver
+
+REZBUILD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "rezbuild.py")
+
+
+def _banners():
+    """rezbuild.py의 print("=== ... ===") 문자열 (f-string 치환 부분은 "X")"""
+    with open(REZBUILD, "r") as f:
+        tree = ast.parse(f.read(), REZBUILD)
+    banners = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and getattr(node.func, "id", "") == "print" and
+                node.args):
+            continue
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            text = arg.value
+        elif isinstance(arg, ast.JoinedStr):
+            text = "".join(v.value if isinstance(v, ast.Constant) else "X" for v in arg.values)
+        else:
+            continue
+        if text.startswith("=== "):
+            banners.append(text)
+    return banners
+
+
+def test_every_phase_has_a_banner():
+    phases = [rezbuild_driver.phase_of(line) for line in _banners()]
+    for _, phase in rezbuild_driver.PHASE_MARKERS:
+        assert phases.count(phase) >= 1, phase
+
+
+def test_install_banner_with_staging_dir():
+    assert rezbuild_driver.phase_of("=== USD CMake install (staging: /b/_stage) ===") == "install"
+    assert rezbuild_driver.phase_of("[12/40] Building CXX object ...") is None
+
+
+def test_banners_map_to_single_phase():
+    # 단계가 아닌 banner가 단계로 잘못 잡히지 않는지 (예: Preflight FAILED/OK)
+    mapped = {line: rezbuild_driver.phase_of(line) for line in _banners()}
+    assert mapped["=== Preflight OK ==="] is None
+    assert mapped["=== USD CMake build ==="] == "build"
+    assert mapped["=== Arnold USD plugin build ==="] == "arnold"
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""rezbuild.py: 버전 루트 package.py 설치 (profile 이름, variant별 usd_build_info)"""
+import os
+
+import pytest
+
+import rezbuild
+
+SOURCE_PACKAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "package.py")
+INFO = {"profile": "full", "opt": "release", "cpu_baseline": "", "allocator": "jemalloc-5.3.0"}
+
+
+def test_build_info_kept_per_variant(tmp_path):
+    dst = str(tmp_path / "package.py")
+    rezbuild.write_package_py(SOURCE_PACKAGE, dst, {}, extra_requires=["jemalloc-5.3.0"],
+                              metadata=INFO, variant="python-3.11/a")
+    rezbuild.write_package_py(SOURCE_PACKAGE, dst, {}, extra_requires=["jemalloc-5.3.0"],
+                              metadata=dict(INFO, opt="perf"), variant="python-3.12/b")
+    info = rezbuild.installed_build_info(dst)
+    assert info == {"python-3.11/a": INFO, "python-3.12/b": dict(INFO, opt="perf")}
+    with open(dst) as f:
+        text = f.read()
+    assert text.count('    "jemalloc-5.3.0",\n') == 1  # requires에 한 번만
+    assert text.count("usd_build_info =") == 1
+
+
+def test_profile_package_name(tmp_path):
+    dst = str(tmp_path / "package.py")
+    rezbuild.write_package_py(SOURCE_PACKAGE, dst, dict(rezbuild.BUILD_PROFILES["farm"],
+                                                        package="usd_farm_perf_x86_64_v3"))
+    with open(dst) as f:
+        text = f.read()
+    assert 'name = "usd_farm_perf_x86_64_v3"' in text
+    assert '"qt-' not in text and '"usdview",' not in text
+
+
+def test_allocator_mismatch_between_variants(tmp_path):
+    dst = str(tmp_path / "package.py")
+    rezbuild.write_package_py(SOURCE_PACKAGE, dst, {}, metadata=INFO, variant="python-3.11/a")
+    rezbuild.check_variant_consistency(dst, "python-3.11/a", dict(INFO, allocator="system"))
+    with pytest.raises(SystemExit):
+        rezbuild.check_variant_consistency(dst, "python-3.12/b", dict(INFO, allocator="system"))
+
+
+def test_malloc_preload_opt_in(tmp_path):
+    lib = tmp_path / "libjemalloc.so"
+    lib.write_text("")
+    root = str(tmp_path / "root")
+    os.makedirs(root)
+    rezbuild.write_malloc_preload(root, str(lib))
+    env = rezbuild.usd_runtime_env(root, {"LD_PRELOAD": "/x.so"})
+    assert env["LD_PRELOAD"] == "/x.so"
+    assert env["USD_MALLOC_LIBRARY"] == str(lib)
+    env = rezbuild.usd_runtime_env(root, {"USD_MALLOC_PRELOAD": "1"})
+    assert env["LD_PRELOAD"] == str(lib)
+    assert "LD_PRELOAD" not in rezbuild.usd_runtime_env(root, {"USD_MALLOC_PRELOAD": "1"},
+                                                        preload=False)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""rezbuild.py: ELF 읽기, unity 제외 glob → CMake 정규식, distcc host 문법, 실패 로그 요약"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import rezbuild
+
+needs_gcc = pytest.mark.skipif(not shutil.which("gcc"), reason="gcc not found")
+
+
+@pytest.fixture(scope="module")
+def shared_lib(tmp_path_factory):
+    """build-id, SONAME, RUNPATH가 있는 작은 .so"""
+    if not shutil.which("gcc"):
+        pytest.skip("gcc not found")
+    tmp = tmp_path_factory.mktemp("elf")
+    src = tmp / "foo.c"
+    src.write_text("#include <stdio.h>\nint foo(void) { return puts(\"foo\"); }\n")
+    lib = tmp / "libfoo.so"
+    subprocess.run(["gcc", "-shared", "-fPIC", "-o", str(lib), str(src),
+                    "-Wl,-soname,libfoo.so.1", "-Wl,--build-id=sha1",
+                    "-Wl,--enable-new-dtags", "-Wl,-rpath,$ORIGIN/../lib:/opt/x"],
+                   check=True)
+    return str(lib)
+
+
+def test_non_elf_files_return_none(tmp_path):
+    path = tmp_path / "plugInfo.json"
+    path.write_text("{}")
+    assert rezbuild.read_elf_dynamic(str(path)) is None
+    assert rezbuild.read_elf_build_id(str(path)) is None
+    assert rezbuild.read_elf_sections(str(path)) is None
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert rezbuild.read_elf_dynamic(str(empty)) is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ELF host only")
+def test_python_executable_sections():
+    sections = rezbuild.read_elf_sections(os.path.realpath(sys.executable))
+    assert ".text" in sections and ".dynamic" in sections
+
+
+@needs_gcc
+def test_dynamic_section(shared_lib):
+    info = rezbuild.read_elf_dynamic(shared_lib)
+    assert info["soname"] == "libfoo.so.1"
+    assert info["runpath"] == ["$ORIGIN/../lib", "/opt/x"]
+    assert info["rpath"] == []
+    assert any(name.startswith("libc.so") for name in info["needed"])
+
+
+@needs_gcc
+def test_build_id_matches_readelf(shared_lib):
+    build_id = rezbuild.read_elf_build_id(shared_lib)
+    assert re.fullmatch(r"[0-9a-f]{40}", build_id)
+    if shutil.which("readelf"):
+        out = subprocess.run(["readelf", "-n", shared_lib], capture_output=True,
+                             text=True).stdout
+        assert f"Build ID: {build_id}" in out
+
+
+def _python_regex(cmake_quoted):
+    """CMake 따옴표 인자의 escape를 푼 정규식 (CMake 정규식의 이 부분 문법은 Python과 같음)"""
+    return re.compile(cmake_quoted.replace("\\\\", "\\"))
+
+
+@pytest.mark.parametrize("pattern, matches, rejects", [
+    ("module.cpp", ["module.cpp"], ["moduleXcpp", "amodule.cpp", "module.cpp.o"]),
+    ("wrap*.cpp", ["wrapStage.cpp", "wrap.cpp"], ["wrapStage.h", "xwrap.cpp"]),
+    ("tokens?.cpp", ["tokens1.cpp"], ["tokens.cpp", "tokens12.cpp"]),
+    ("a+b(c).cpp", ["a+b(c).cpp"], ["aab(c).cpp", "a+bc.cpp"]),
+])
+def test_cmake_regex(pattern, matches, rejects):
+    regex = _python_regex(rezbuild._cmake_regex(pattern))
+    for name in matches:
+        assert regex.match(name), name
+    for name in rejects:
+        assert not regex.match(name), name
+
+
+@pytest.mark.skipif(not shutil.which("cmake"), reason="cmake not found")
+def test_cmake_regex_in_cmake(tmp_path):
+    script = tmp_path / "check.cmake"
+    script.write_text(
+        f'string(REGEX MATCH "{rezbuild._cmake_regex("wrap*.cpp")}" hit "wrapStage.cpp")\n'
+        f'string(REGEX MATCH "{rezbuild._cmake_regex("a.cpp")}" miss "abcpp")\n'
+        'message("hit=[${hit}] miss=[${miss}]")\n')
+    result = subprocess.run(["cmake", "-P", str(script)], capture_output=True, text=True)
+    assert "hit=[wrapStage.cpp] miss=[]" in result.stderr
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("node01/16", {"host": "node01", "port": 3632, "slots": 16, "ssh": False, "local": False}),
+    ("node02:3700/8,lzo", {"host": "node02", "port": 3700, "slots": 8, "options": ["lzo"]}),
+    ("localhost/4", {"host": "localhost", "slots": 4, "local": True}),
+    ("@node03/12", {"host": "node03", "user": "", "ssh": True, "slots": 12}),
+    ("builder@node04/24:/opt/distcc/bin/distccd,lzo",
+     {"host": "node04", "user": "builder", "ssh": True, "slots": 24,
+      "command": "/opt/distcc/bin/distccd", "options": ["lzo"]}),
+])
+def test_parse_distcc_host(spec, expected):
+    host = rezbuild._parse_distcc_host(spec)
+    assert {key: host[key] for key in expected} == expected
+    assert rezbuild._format_distcc_host(rezbuild._parse_distcc_host(
+        rezbuild._format_distcc_host(host))) == rezbuild._format_distcc_host(host)
+
+
+@pytest.mark.parametrize("spec", ["--randomize", "--localslots=4", "--localslots_cpp=8", "+zeroconf"])
+def test_distcc_global_options(spec):
+    assert rezbuild._parse_distcc_host(spec) is None
+
+
+def test_distcc_local_options():
+    assert rezbuild.distcc_local_options([], 6) == ["--localslots=6", "--localslots_cpp=6"]
+    assert rezbuild.distcc_local_options(["--randomize", "--localslots=2", "--localslots_cpp=99"],
+                                         6) == ["--localslots=2", "--localslots_cpp=6",
+                                                "--randomize"]
+
+
+FAILED_BUILD = """[1/3] Building CXX object pxr/base/tf/CMakeFiles/tf.dir/token.cpp.o
+FAILED: pxr/base/tf/CMakeFiles/tf.dir/diagnostic.cpp.o
+/usr/bin/c++ -c diagnostic.cpp -o diagnostic.cpp.o
+diagnostic.cpp:12:5: error: 'foo' was not declared in this scope
+   12 |     foo();
+      |     ^~~
+ninja: build stopped: subcommand failed.
+"""
+FAILED_CONFIGURE = """-- The CXX compiler identification is GNU 11.4.0
+CMake Error at CMakeLists.txt:3 (find_package):
+  Could not find a package configuration file provided by "pxr"
+-- Configuring incomplete, errors occurred!
+"""
+
+
+@pytest.mark.parametrize("output, target, errors", [
+    (FAILED_BUILD, "pxr/base/tf/CMakeFiles/tf.dir/diagnostic.cpp.o",
+     ["diagnostic.cpp:12:5: error: 'foo' was not declared in this scope",
+      "   12 |     foo();", "      |     ^~~"]),
+    (FAILED_CONFIGURE, "(cmake configure)",
+     ["CMake Error at CMakeLists.txt:3 (find_package):",
+      '  Could not find a package configuration file provided by "pxr"']),
+], ids=["ninja", "cmake"])
+def test_summarize_failure_from_tee_log(tmp_path, output, target, errors):
+    """_run_with_rusage가 실제로 쓴 로그(줄마다 시각 prefix)에서 실패 요약"""
+    log_path = str(tmp_path / "logs" / "arnold.log")
+    returncode, _ = rezbuild._run_with_rusage(
+        [sys.executable, "-c", f"import sys; sys.stdout.write({output!r}); sys.exit(1)"],
+        log_path=log_path)
+    assert returncode == 1
+    with open(log_path) as f:
+        assert any(rezbuild.LOG_PREFIX_RE.match(line) for line in f)
+    failures = rezbuild.summarize_failure(log_path)
+    assert [f["target"] for f in failures] == [target]
+    assert failures[0]["errors"] == errors
+    summary = rezbuild.write_failure_summary(log_path, failures)
+    assert summary == str(tmp_path / "logs" / "arnold.failure.txt")
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""rezbuild.py: staging 트리 publish (release 디렉토리, hardlink 재사용, 정리, 예전 설치 전환)"""
+import os
+
+import pytest
+
+import rezbuild
+
+
+def _stage(path, files):
+    for rel, content in files.items():
+        full = os.path.join(path, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+    return str(path)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.fixture
+def variant(tmp_path):
+    return str(tmp_path / "server" / "usd" / "25.11" / "python-3.11")
+
+
+def test_first_publish(tmp_path, variant):
+    stage = _stage(tmp_path / "stage1", {"lib/libusd_tf.so": "tf", "bin/usdcat": "cat"})
+    os.symlink("libusd_tf.so", os.path.join(stage, "lib", "libusd_tf.so.0"))
+    stats = rezbuild.publish_install(stage, variant)
+    assert os.path.islink(variant)
+    assert os.path.basename(os.readlink(variant)).startswith(".python-3.11.")
+    assert _read(os.path.join(variant, "lib", "libusd_tf.so")) == "tf"
+    assert os.readlink(os.path.join(variant, "lib", "libusd_tf.so.0")) == "libusd_tf.so"
+    assert stats["copied"] == 2 and stats["linked"] == 0
+
+
+def test_republish_links_unchanged_and_keeps_previous(tmp_path, variant, monkeypatch):
+    # 같은 초, 같은 pid의 재publish도 이전 release에 쓰지 않아야 함
+    monkeypatch.setattr(rezbuild.time, "strftime", lambda fmt, *a: "20260101-000000")
+    rezbuild.publish_install(_stage(tmp_path / "s1", {"a.so": "same", "b.so": "old"}), variant)
+    previous = os.path.realpath(variant)
+    stats = rezbuild.publish_install(_stage(tmp_path / "s2", {"a.so": "same", "b.so": "new"}),
+                                     variant)
+    current = os.path.realpath(variant)
+    assert current != previous
+    assert stats["linked"] == 1 and stats["copied"] == 1
+    assert os.stat(os.path.join(current, "a.so")).st_ino == \
+        os.stat(os.path.join(previous, "a.so")).st_ino
+    assert _read(os.path.join(previous, "b.so")) == "old"
+    assert _read(os.path.join(current, "b.so")) == "new"
+
+
+def test_old_releases_pruned(tmp_path, variant, monkeypatch):
+    monkeypatch.setenv("USD_BUILD_KEEP_RELEASES", "1")
+    releases = []
+    for i in range(3):
+        rezbuild.publish_install(_stage(tmp_path / f"s{i}", {"a.so": str(i)}), variant)
+        releases.append(os.path.realpath(variant))
+        os.utime(releases[-1], (i, i))  # 생성 순서대로 mtime
+    remaining = sorted(n for n in os.listdir(os.path.dirname(variant)) if n.startswith("."))
+    assert remaining == sorted(os.path.basename(r) for r in releases[1:])
+    assert _read(os.path.join(variant, "a.so")) == "2"
+
+
+@pytest.mark.parametrize("exchange", [True, False], ids=["renameat2", "rename"])
+def test_legacy_directory_migrated(tmp_path, variant, monkeypatch, exchange):
+    if not exchange:
+        monkeypatch.setattr(rezbuild, "_exchange_paths", lambda a, b: False)
+    _stage(variant, {"a.so": "legacy"})
+    rezbuild.publish_install(_stage(tmp_path / "s", {"a.so": "legacy", "b.so": "new"}), variant)
+    assert os.path.islink(variant)
+    assert _read(os.path.join(variant, "b.so")) == "new"
+    migrated = [n for n in os.listdir(os.path.dirname(variant)) if "-previous-" in n]
+    assert len(migrated) == 1
+    assert _read(os.path.join(os.path.dirname(variant), migrated[0], "a.so")) == "legacy"
+
+
+def test_sync_tree_never_writes_existing_files(tmp_path):
+    src = _stage(tmp_path / "src", {"a.so": "new"})
+    dst = _stage(tmp_path / "dst", {"a.so": "published"})
+    with pytest.raises(FileExistsError):
+        rezbuild.sync_tree(src, dst)
+    assert _read(os.path.join(dst, "a.so")) == "published"
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""rezbuild_telemetry: .ninja_log 파싱과 compare"""
+import json
+
+import rezbuild_telemetry as telemetry
+
+HEADER = "# ninja log v5\n"
+
+
+def _line(start, end, output, cmd_hash="h"):
+    return f"{start}\t{end}\t0\t{output}\t{cmd_hash}\n"
+
+
+def _write(path, lines):
+    path.write_text(HEADER + "".join(lines))
+    return str(path)
+
+
+def test_mark_reads_only_appended_run(tmp_path):
+    log = tmp_path / ".ninja_log"
+    # 긴 실행 → 짧은 incremental 실행 (end 300) 까지 기록된 상태
+    _write(log, [_line(0, 9000, "a.o"), _line(10, 9500, "libA.so"),
+                 _line(0, 300, "b.o")])
+    mark = telemetry.ninja_log_mark(str(log))
+    # 이번 실행: 첫 end가 이전 실행 마지막 end(300)보다 큼 → 추정으로는 경계를 못 찾음
+    with open(log, "a") as f:
+        f.write(_line(0, 400, "c.o") + _line(400, 800, "libC.so"))
+    entries = telemetry.parse_ninja_log(str(log), mark)
+    assert [e[2] for e in entries] == [["c.o"], ["libC.so"]]
+    merged = telemetry.parse_ninja_log(str(log))
+    assert [e[2][0] for e in merged] == ["b.o", "c.o", "libC.so"]
+
+
+def test_mark_on_missing_log_reads_everything(tmp_path):
+    log = tmp_path / ".ninja_log"
+    mark = telemetry.ninja_log_mark(str(log))
+    assert mark == {"offset": 0, "tail": ""}
+    _write(log, [_line(0, 100, "a.o"), _line(100, 200, "liba.so")])
+    assert len(telemetry.parse_ninja_log(str(log), mark)) == 2
+
+
+def test_recompacted_log_falls_back_to_run_boundaries(tmp_path):
+    log = tmp_path / ".ninja_log"
+    _write(log, [_line(0, 5000, "old%d.o" % i) for i in range(20)])
+    mark = telemetry.ninja_log_mark(str(log))
+    # recompact: 로그가 다시 쓰여 mark 위치의 내용이 달라짐
+    _write(log, [_line(0, 5000, "old0.o"), _line(0, 100, "new.o"), _line(100, 150, "new2.o")])
+    entries = telemetry.parse_ninja_log(str(log), mark)
+    assert [e[2][0] for e in entries] == ["new.o", "new2.o"]
+
+
+def test_multi_output_edge_is_one_entry(tmp_path):
+    log = _write(tmp_path / ".ninja_log",
+                 [_line(0, 100, "gen.h", "x"), _line(0, 100, "gen.cpp", "x"),
+                  _line(100, 300, "gen.o", "y")])
+    entries = telemetry.parse_ninja_log(log)
+    assert entries[0] == (0, 100, ["gen.h", "gen.cpp"])
+    assert len(entries) == 2
+
+
+def test_classify_target():
+    assert telemetry.classify_target("pxr/usd/CMakeFiles/usd.dir/stage.cpp.o") == "compile"
+    assert telemetry.classify_target("CMakeFiles/hd.dir/cmake_pch.hxx.gch") == "compile"
+    assert telemetry.classify_target("pxr/usd/libusd_usd.so") == "link"
+    assert telemetry.classify_target("lib/libfoo.so.1") == "link"
+    assert telemetry.classify_target("bin/usdcat") == "link"
+    assert telemetry.classify_target("pxr/usd/plugInfo.json") == "other"
+
+
+def test_analyze_ninja_log(tmp_path):
+    log = _write(tmp_path / ".ninja_log", [
+        _line(0, 1000, "pxr/usd/CMakeFiles/usd.dir/a.cpp.o"),
+        _line(0, 3000, "pxr/usd/CMakeFiles/usd.dir/b.cpp.o"),
+        _line(3000, 5000, "pxr/usd/libusd_usd.so"),
+    ])
+    ninja = telemetry.analyze_ninja_log(log)
+    assert ninja["targets"] == 3
+    assert ninja["wall_s"] == 5.0
+    assert ninja["compile_s"] == 4.0
+    assert ninja["link_s"] == 2.0
+    assert ninja["libraries"] == {"usd": {"compile_s": 4.0, "objects": 2}}
+    assert ninja["critical_path_method"] == "timeline-approximation"
+    assert [c["target"] for c in ninja["critical_path"]] == [
+        "pxr/usd/CMakeFiles/usd.dir/b.cpp.o", "pxr/usd/libusd_usd.so"]
+    assert ninja["critical_path_s"] == 5.0
+    assert telemetry.analyze_ninja_log(str(tmp_path / "missing")) is None
+
+
+def _telemetry(wall, compile_s, openvdb):
+    return {
+        "variant": "python-3.11/openvdb-" + openvdb, "started": "2025-01-01T00:00:00",
+        "dep_roots": {"REZ_OPENVDB_ROOT": "/pkg/openvdb/" + openvdb},
+        "phases": [{"name": "build", "wall_s": wall, "cpu_s": wall * 10, "peak_rss_mb": 900}],
+        "ninja": {"usd": {"targets": 10, "wall_s": wall, "compile_s": compile_s, "link_s": 5.0,
+                          "critical_path_s": 50.0,
+                          "libraries": {"usd": {"compile_s": compile_s, "objects": 9}}}},
+        "import_time": {},
+    }
+
+
+def test_compare_reports_dependency_phase_and_library_changes(capsys):
+    telemetry.compare(_telemetry(100.0, 80.0, "11"), _telemetry(150.0, 120.0, "13"))
+    out = capsys.readouterr().out
+    assert "REZ_OPENVDB_ROOT: /pkg/openvdb/11 -> /pkg/openvdb/13" in out
+    build_row = next(line for line in out.splitlines() if line.strip().startswith("build"))
+    assert "+50.0 (+50.0%)" in build_row
+    assert "~critical_path_s" in out
+    usd_row = next(line for line in out.splitlines() if line.strip().startswith("usd "))
+    assert "+40.0 (+50.0%)" in usd_row
+
+
+def test_compare_command(tmp_path, capsys):
+    before, after = tmp_path / "a.json", tmp_path / "b.json"
+    before.write_text(json.dumps(_telemetry(100.0, 80.0, "11")))
+    after.write_text(json.dumps(_telemetry(90.0, 70.0, "11")))
+    assert telemetry.main(["compare", str(before), str(after)]) == 0
+    out = capsys.readouterr().out
+    assert "dependency changes" not in out
+    assert "-10.0 (-10.0%)" in out
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""usdlocalize: 로컬 사본 생성과 사용 중인 항목의 eviction 보호"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import usdlocalize
+
+TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "tools", "usdlocalize.py")
+
+
+@pytest.fixture
+def shared_root(tmp_path):
+    root = tmp_path / "shared" / "python-3.11"
+    (root / "lib").mkdir(parents=True)
+    (root / "lib" / "libusd_ms.so").write_bytes(os.urandom(4096))
+    os.symlink("libusd_ms.so", str(root / "lib" / "libusd.so"))
+    usdlocalize.write_manifest(str(root), "usd-25.11 python-3.11")
+    return str(root)
+
+
+def test_populate_copies_verified_tree(shared_root, tmp_path):
+    cache = str(tmp_path / "cache")
+    entry = usdlocalize.populate(shared_root, cache, 1 << 30)
+    assert os.path.basename(entry) == usdlocalize.manifest_key(shared_root)
+    with open(os.path.join(shared_root, "lib", "libusd_ms.so"), "rb") as f:
+        with open(os.path.join(entry, "lib", "libusd_ms.so"), "rb") as g:
+            assert f.read() == g.read()
+    assert os.readlink(os.path.join(entry, "lib", "libusd.so")) == "libusd_ms.so"
+    assert usdlocalize.populate(shared_root, cache, 1 << 30) == entry
+
+
+def test_evict_skips_entries_in_use(shared_root, tmp_path):
+    cache = str(tmp_path / "cache")
+    entry = usdlocalize.populate(shared_root, cache, 1 << 30)
+    key = os.path.basename(entry)
+    fd = usdlocalize.acquire_use(cache, key)
+    try:
+        assert usdlocalize.in_use(cache, key)
+        assert usdlocalize.evict(cache, 0, min_idle=0) == []
+        assert os.path.isdir(entry)
+    finally:
+        os.close(fd)
+    assert not usdlocalize.in_use(cache, key)
+    assert usdlocalize.evict(cache, 0, min_idle=0) == [key]
+    assert not os.path.exists(entry)
+
+
+def test_exec_holds_use_lock(shared_root, tmp_path):
+    cache = str(tmp_path / "cache")
+    key = usdlocalize.manifest_key(shared_root)
+    check = (f"import sys; sys.path.insert(0, {os.path.dirname(TOOL)!r}); import usdlocalize; "
+             f"sys.exit(0 if usdlocalize.in_use({cache!r}, {key!r}) else 3)")
+    result = subprocess.run([sys.executable, TOOL, "exec", "--root", shared_root,
+                             "--cache-dir", cache, "--", sys.executable, "-c", check])
+    assert result.returncode == 0
+    assert not usdlocalize.in_use(cache, key)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""usdplugindex: 병합한 lib/usd/plugInfo.json이 Plug 디렉토리 스캔과 같은 plugin 집합을 등록하는지"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import usdplugindex
+
+STRAY_PLUGINS = {"exampleSchema", "testPlugin", "shareDocs"}
+
+
+def _plugin(name, **extra):
+    entry = {"Name": name, "Type": "resource", "Root": "..", "ResourcePath": "resources"}
+    entry.update(extra)
+    return entry
+
+
+def _write(root, rel, data):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# generated by test\n" + json.dumps(data))
+
+
+@pytest.fixture
+def install_tree(tmp_path):
+    """USD + Arnold USD 설치 트리 모양 (Include 되지 않는 plugInfo.json 포함)"""
+    root = str(tmp_path / "usd")
+    _write(root, "lib/usd/plugInfo.json", {"Includes": ["*/resources/"]})
+    for name in ("usd", "usdGeom", "hd"):
+        _write(root, f"lib/usd/{name}/resources/plugInfo.json", {"Plugins": [_plugin(name)]})
+    # 중첩 Includes
+    _write(root, "lib/usd/usdShaders/resources/plugInfo.json",
+           {"Plugins": [_plugin("usdShaders")], "Includes": ["shaders/"]})
+    _write(root, "lib/usd/usdShaders/resources/shaders/plugInfo.json",
+           {"Plugins": [_plugin("usdShadersNodes", Root=".", ResourcePath=".")]})
+    _write(root, "plugin/usd/plugInfo.json", {"Includes": ["*/resources/"]})
+    _write(root, "plugin/usd/hdEmbree/resources/plugInfo.json",
+           {"Plugins": [_plugin("hdEmbree")]})
+    # arnold-usd (PREFIX_PLUGINS=plugin)
+    _write(root, "plugin/plugInfo.json", {"Includes": ["*/resources/"]})
+    _write(root, "plugin/hdArnold/resources/plugInfo.json", {"Plugins": [_plugin("hdArnold")]})
+    # Plug가 등록하지 않는 파일
+    _write(root, "share/usd/examples/plugins/exampleSchema/plugInfo.json",
+           {"Plugins": [_plugin("exampleSchema")]})
+    _write(root, "lib/usd/usdGeom/tests/plugInfo.json", {"Plugins": [_plugin("testPlugin")]})
+    _write(root, "share/doc/plugInfo.json", {"Plugins": [_plugin("shareDocs")]})
+    for dirpath, _, _ in os.walk(root):
+        if dirpath.endswith("resources"):
+            open(os.path.join(dirpath, ".keep"), "w").close()
+    return root
+
+
+def _index_names(root):
+    data = usdplugindex.read_pluginfo(os.path.join(root, usdplugindex.INDEX_REL))
+    assert "Includes" not in data
+    return sorted(p["Name"] for p in data["Plugins"])
+
+
+def test_index_follows_includes_only(install_tree):
+    usdplugindex.build_index(install_tree)
+    assert _index_names(install_tree) == sorted(
+        ["usd", "usdGeom", "hd", "usdShaders", "usdShadersNodes", "hdEmbree", "hdArnold"])
+    assert not STRAY_PLUGINS & set(_index_names(install_tree))
+    assert usdplugindex.check_index(install_tree) == []
+
+
+def test_index_roots_resolve_to_original_plugin_dirs(install_tree):
+    usdplugindex.build_index(install_tree)
+    index_path = os.path.join(install_tree, usdplugindex.INDEX_REL)
+    roots = {p["Name"]: os.path.normpath(os.path.join(os.path.dirname(index_path), p["Root"]))
+             for p in usdplugindex.read_pluginfo(index_path)["Plugins"]}
+    assert roots["hdArnold"] == os.path.join(install_tree, "plugin", "hdArnold")
+    assert roots["usdShadersNodes"] == os.path.join(
+        install_tree, "lib", "usd", "usdShaders", "resources", "shaders")
+
+
+def test_stray_pluginfo_does_not_make_index_stale(install_tree):
+    usdplugindex.build_index(install_tree)
+    _write(install_tree, "share/usd/examples/other/plugInfo.json",
+           {"Plugins": [_plugin("other")]})
+    assert usdplugindex.check_index(install_tree) == []
+    _write(install_tree, "lib/usd/usdLux/resources/plugInfo.json",
+           {"Plugins": [_plugin("usdLux")]})
+    problems = usdplugindex.check_index(install_tree)
+    assert any("lib/usd/usdLux/resources/plugInfo.json" in p for p in problems)
+
+
+def test_merged_file_is_the_only_registration_root(install_tree):
+    usdplugindex.build_index(install_tree)
+    assert usdplugindex.registration_roots(install_tree) == [
+        os.path.join(install_tree, "lib", "usd")]
+    assert [os.path.relpath(p, install_tree) for p in usdplugindex.source_files(install_tree)] == [
+        os.path.join(r, usdplugindex.SOURCE_PLUGINFO) for r in ("lib/usd", "plugin/usd", "plugin")]
+    # 재생성은 plugInfo.source.json에서 같은 결과
+    names = _index_names(install_tree)
+    usdplugindex.build_index(install_tree)
+    assert _index_names(install_tree) == names
+    assert usdplugindex.check_index(install_tree) == []
+    # 설치가 다시 쓴 원본이 병합되지 않은 채 남으면 stale
+    _write(install_tree, "plugin/plugInfo.json", {"Includes": ["*/resources/"]})
+    assert any("unmerged plugInfo.json: plugin/plugInfo.json" in p
+               for p in usdplugindex.check_index(install_tree))
+
+
+def test_default_env_needs_no_search_path_override(install_tree, monkeypatch):
+    usdplugindex.build_index(install_tree)
+    monkeypatch.setenv("PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH", "1")
+    monkeypatch.setenv("PXR_PLUGINPATH_NAME", os.pathsep.join(
+        [os.path.join(install_tree, "plugin"), "/other/package/plugins"]))
+    env = usdplugindex.index_env(install_tree, True)
+    assert env["PXR_PLUGINPATH_NAME"].split(os.pathsep) == [
+        os.path.join(install_tree, "lib", "usd"), "/other/package/plugins"]
+    assert "PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH" not in env
+    scan = usdplugindex.index_env(install_tree, False)
+    assert scan["PXR_PLUGINPATH_NAME"].split(os.pathsep)[:3] == [
+        os.path.join(install_tree, r, usdplugindex.SOURCE_PLUGINFO)
+        for r in ("lib/usd", "plugin/usd", "plugin")]
+
+
+PLUG_NAMES = ("from pxr import Plug; import json; "
+              "print(json.dumps(sorted(p.name for p in Plug.Registry().GetAllPlugins())))")
+
+
+def _has_pxr():
+    try:
+        import pxr.Plug  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _has_pxr(), reason="pxr not importable")
+def test_index_registers_same_plugins_as_directory_scan(install_tree):
+    """실제 Plug로 원본 디렉토리 스캔과 병합 파일 등록 결과 비교"""
+    usdplugindex.build_index(install_tree)
+    ours = set(_index_names(install_tree))
+    registered = {}
+    for label, use_index in (("scan", False), ("index", True)):
+        env = usdplugindex.index_env(install_tree, use_index)
+        out = subprocess.run([sys.executable, "-c", PLUG_NAMES], env=env, check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True).stdout
+        registered[label] = set(json.loads(out.splitlines()[-1])) & (ours | STRAY_PLUGINS)
+    assert registered["scan"] == registered["index"] == ours
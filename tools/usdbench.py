@@ -0,0 +1,604 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 usdbench - 설치된 usd 패키지 런타임 벤치마크
+결정적인(seed 고정) 합성 stage(composed shot, 깊은 계층, 대량 instancing, 다수 sublayer,
+시간 샘플 xform, 대형 mesh)를 로컬에 생성하고 stage open, traversal, composition,
+여러 time code에서의 값 계산, usdcat crate↔usda 변환 시간을 thread 수별로 측정해
+JSON으로 남긴다. 저장해 둔 baseline(예: 이전 릴리스, 기본 빌드 vs perf 빌드)과 비교해
+회귀/개선을 확인한다.
+
+사용:
+    usdbench run [--out result.json] [--scale N] [--repeat R] [--threads 1 8 32]
+                 [--only open_deep ...] [--baseline baseline.json]
+    usdbench list
+    usdbench compare <before.json> <after.json> [--threshold 0.05]
+    usdbench allocators --lib /path/libjemalloc.so [--threads 1 4 16] [--scale 40]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import socket
+import hashlib
+import argparse
+import resource
+import statistics
+import subprocess
+import multiprocessing
+
+DEFAULT_WORKDIR = os.path.join(os.environ.get("TMPDIR", "/tmp"),
+                               f"usdbench-{os.environ.get('USER', 'user')}")
+SEED = 20250
+TIME_CODES = 48
+LONG_TIME_CODES = 240
+
+
+# === 합성 stage 생성 (usda 텍스트 직접 작성: pxr 없이도 결정적으로 생성) ===
+
+def _mesh_usda(name, resolution, indent):
+    """resolution x resolution grid mesh"""
+    pad = " " * indent
+    points = ", ".join(f"({x}, 0, {z})" for z in range(resolution + 1)
+                       for x in range(resolution + 1))
+    counts = ", ".join(["4"] * (resolution * resolution))
+    indices = []
+    row = resolution + 1
+    for z in range(resolution):
+        for x in range(resolution):
+            i = z * row + x
+            indices.extend([i, i + 1, i + row + 1, i + row])
+    return (f'{pad}def Mesh "{name}"\n{pad}{{\n'
+            f'{pad}    int[] faceVertexCounts = [{counts}]\n'
+            f'{pad}    int[] faceVertexIndices = [{", ".join(map(str, indices))}]\n'
+            f'{pad}    point3f[] points = [{points}]\n'
+            f'{pad}}}\n')
+
+
+def write_composed_scene(directory, scale):
+    """asset(variant/inherits) + reference/instancing + 애니메이션 sublayer로 이루어진 shot"""
+    rng = random.Random(SEED)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "asset.usda"), "w") as f:
+        f.write('#usda 1.0\n(\n    defaultPrim = "Asset"\n)\n\n')
+        f.write('class "_class_Asset"\n{\n    token purpose = "default"\n}\n\n')
+        f.write('def Xform "Asset" (\n    inherits = </_class_Asset>\n'
+                '    variants = {\n        string lod = "high"\n    }\n'
+                '    prepend variantSets = "lod"\n)\n{\n')
+        f.write('    variantSet "lod" = {\n        "high" {\n')
+        f.write(_mesh_usda("Geom", 12, 12))
+        f.write('        }\n        "low" {\n')
+        f.write(_mesh_usda("Geom", 2, 12))
+        f.write('        }\n    }\n')
+        for i in range(8):
+            f.write(f'    def Xform "Part{i}"\n    {{\n'
+                    f'        double3 xformOp:translate = ({i}, {i * 0.5}, 0)\n'
+                    f'        uniform token[] xformOpOrder = ["xformOp:translate"]\n'
+                    f'        def Cube "Shape" {{}}\n    }}\n')
+        f.write('}\n')
+
+    count = 50 * scale
+    with open(os.path.join(directory, "layout.usda"), "w") as f:
+        f.write('#usda 1.0\n\ndef Xform "World"\n{\n')
+        for i in range(count):
+            x, z = rng.uniform(-500, 500), rng.uniform(-500, 500)
+            instanceable = "true" if i % 2 else "false"
+            lod = "low" if i % 3 == 0 else "high"
+            f.write(f'    def "Asset_{i}" (\n        instanceable = {instanceable}\n'
+                    f'        prepend references = @./asset.usda@\n'
+                    f'        variants = {{\n            string lod = "{lod}"\n        }}\n    )\n'
+                    f'    {{\n        double3 xformOp:translate = ({x:.3f}, 0, {z:.3f})\n'
+                    f'        uniform token[] xformOpOrder = ["xformOp:translate"]\n    }}\n')
+        f.write('}\n')
+
+    anim_layers = []
+    for layer in range(4):
+        name = f"anim_{layer}.usda"
+        anim_layers.append(name)
+        with open(os.path.join(directory, name), "w") as f:
+            f.write('#usda 1.0\n\nover "World"\n{\n')
+            for i in range(layer, count, 4):
+                samples = ", ".join(f"{t}: ({t * 0.1:.2f}, {rng.uniform(0, 5):.3f}, 0)"
+                                    for t in range(1, TIME_CODES + 1))
+                f.write(f'    over "Asset_{i}"\n    {{\n'
+                        f'        double3 xformOp:translate.timeSamples = {{{samples}}}\n    }}\n')
+            f.write('}\n')
+
+    root = os.path.join(directory, "shot.usda")
+    with open(root, "w") as f:
+        sublayers = ", ".join(f"@./{n}@" for n in anim_layers + ["layout.usda"])
+        f.write(f'#usda 1.0\n(\n    subLayers = [{sublayers}]\n'
+                f'    startTimeCode = 1\n    endTimeCode = {TIME_CODES}\n)\n')
+    return root
+
+
+def _write_deep_level(f, depth, branching, indent, prefix):
+    if depth == 0:
+        return
+    pad = " " * indent
+    for i in range(branching):
+        f.write(f'{pad}def Xform "{prefix}{i}"\n{pad}{{\n')
+        if depth == 1:
+            f.write(f'{pad}    def Sphere "Leaf"\n{pad}    {{\n'
+                    f'{pad}        double radius = {0.5 + i * 0.1:.1f}\n{pad}    }}\n')
+        _write_deep_level(f, depth - 1, branching, indent + 4, prefix)
+        f.write(f"{pad}}}\n")
+
+
+def write_deep_scene(directory, scale):
+    """깊은 계층: root 아래 scale개의 depth 7, branching 3 트리"""
+    os.makedirs(directory, exist_ok=True)
+    root = os.path.join(directory, "deep.usda")
+    with open(root, "w") as f:
+        f.write('#usda 1.0\n\ndef Xform "Root"\n{\n')
+        for tree in range(scale):
+            f.write(f'    def Xform "Tree{tree}"\n    {{\n')
+            _write_deep_level(f, 7, 3, 8, "N")
+            f.write("    }\n")
+        f.write("}\n")
+    return root
+
+
+def write_instancing_scene(directory, scale):
+    """대량 native instancing: 2000 * scale 개의 instanceable reference"""
+    rng = random.Random(SEED + 1)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "proto.usda"), "w") as f:
+        f.write('#usda 1.0\n(\n    defaultPrim = "Proto"\n)\n\ndef Xform "Proto"\n{\n')
+        for i in range(20):
+            f.write(f'    def Xform "Branch{i}"\n    {{\n'
+                    f'        double3 xformOp:translate = (0, {i}, 0)\n'
+                    f'        uniform token[] xformOpOrder = ["xformOp:translate"]\n'
+                    f'        def Cube "Leaf" {{}}\n    }}\n')
+        f.write("}\n")
+    root = os.path.join(directory, "instancing.usda")
+    with open(root, "w") as f:
+        f.write('#usda 1.0\n\ndef Xform "Forest"\n{\n')
+        for i in range(2000 * scale):
+            f.write(f'    def "Tree_{i}" (\n        instanceable = true\n'
+                    f'        prepend references = @./proto.usda@\n    )\n'
+                    f'    {{\n        double3 xformOp:translate = '
+                    f'({rng.uniform(-1000, 1000):.2f}, 0, {rng.uniform(-1000, 1000):.2f})\n'
+                    f'        uniform token[] xformOpOrder = ["xformOp:translate"]\n    }}\n')
+        f.write("}\n")
+    return root
+
+
+def write_sublayers_scene(directory, scale):
+    """다수 sublayer: 32개 layer가 같은 prim들에 opinion을 쌓음"""
+    os.makedirs(directory, exist_ok=True)
+    count = 200 * scale
+    with open(os.path.join(directory, "base.usda"), "w") as f:
+        f.write('#usda 1.0\n\ndef Xform "Set"\n{\n')
+        for i in range(count):
+            f.write(f'    def Xform "Prop_{i}"\n    {{\n        float weight = 0\n'
+                    f'        def Cube "Geom" {{}}\n    }}\n')
+        f.write("}\n")
+    layers = []
+    for layer in range(32):
+        name = f"layer_{layer:02d}.usda"
+        layers.append(name)
+        with open(os.path.join(directory, name), "w") as f:
+            f.write('#usda 1.0\n\nover "Set"\n{\n')
+            for i in range(layer % 4, count, 4):
+                f.write(f'    over "Prop_{i}"\n    {{\n        float weight = {layer}\n'
+                        f'        custom string note_{layer} = "layer {layer}"\n    }}\n')
+            f.write("}\n")
+    root = os.path.join(directory, "sublayers.usda")
+    with open(root, "w") as f:
+        sublayers = ", ".join(f"@./{n}@" for n in reversed(layers))
+        f.write(f"#usda 1.0\n(\n    subLayers = [{sublayers}, @./base.usda@]\n)\n")
+    return root
+
+
+def write_timesamples_scene(directory, scale):
+    """시간 샘플 xform: 100 * scale 개 prim, translate/rotate 각 LONG_TIME_CODES 샘플"""
+    rng = random.Random(SEED + 2)
+    os.makedirs(directory, exist_ok=True)
+    root = os.path.join(directory, "timesamples.usda")
+    with open(root, "w") as f:
+        f.write(f'#usda 1.0\n(\n    startTimeCode = 1\n    endTimeCode = {LONG_TIME_CODES}\n)\n\n'
+                'def Xform "Anim"\n{\n')
+        for i in range(100 * scale):
+            speed = rng.uniform(0.1, 2.0)
+            translate = ", ".join(f"{t}: ({t * speed:.3f}, {rng.uniform(0, 1):.3f}, 0)"
+                                  for t in range(1, LONG_TIME_CODES + 1))
+            rotate = ", ".join(f"{t}: (0, {t * speed * 3 % 360:.2f}, 0)"
+                               for t in range(1, LONG_TIME_CODES + 1))
+            f.write(f'    def Xform "Mover_{i}"\n    {{\n'
+                    f'        double3 xformOp:translate.timeSamples = {{{translate}}}\n'
+                    f'        float3 xformOp:rotateXYZ.timeSamples = {{{rotate}}}\n'
+                    f'        uniform token[] xformOpOrder = '
+                    f'["xformOp:translate", "xformOp:rotateXYZ"]\n'
+                    f'        def Cube "Geom" {{}}\n    }}\n')
+        f.write("}\n")
+    return root
+
+
+def write_mesh_scene(directory, scale):
+    """대형 mesh: 4개의 grid mesh (scale 1에서 각 160x160 face)"""
+    os.makedirs(directory, exist_ok=True)
+    resolution = int(160 * scale ** 0.5)
+    root = os.path.join(directory, "mesh.usda")
+    with open(root, "w") as f:
+        f.write('#usda 1.0\n\ndef Xform "Meshes"\n{\n')
+        for i in range(4):
+            f.write(_mesh_usda(f"Grid_{i}", resolution, 4))
+        f.write("}\n")
+    return root
+
+
+SCENES = {
+    "composed": write_composed_scene,
+    "deep": write_deep_scene,
+    "instancing": write_instancing_scene,
+    "sublayers": write_sublayers_scene,
+    "timesamples": write_timesamples_scene,
+    "mesh": write_mesh_scene,
+}
+
+
+def scene_path(workdir, name, scale):
+    """scene 생성 (같은 scale/생성 코드면 재사용)"""
+    writer = SCENES[name]
+    with open(os.path.abspath(__file__), "rb") as f:
+        key = hashlib.sha1(f.read()).hexdigest()[:10]
+    directory = os.path.join(workdir, f"{name}-s{scale}-{key}")
+    done = os.path.join(directory, ".complete")
+    if not os.path.exists(done):
+        root = writer(directory, scale)
+        with open(done, "w") as f:
+            f.write(os.path.basename(root) + "\n")
+    with open(done, "r") as f:
+        return os.path.join(directory, f.read().strip())
+
+
+# === 벤치마크 ===
+
+def bench_open(path):
+    """stage open (layer 읽기 + composition + population)"""
+    from pxr import Usd
+    stage = Usd.Stage.Open(path)
+    return len(stage.GetUsedLayers())
+
+
+def bench_traverse(path):
+    """instance proxy 포함 전체 traversal"""
+    from pxr import Usd
+    stage = Usd.Stage.Open(path)
+    return sum(1 for _ in stage.Traverse(Usd.TraverseInstanceProxies()))
+
+
+def bench_xform_resolve(path):
+    """XformCache로 여러 time code의 local-to-world 계산"""
+    from pxr import Usd, UsdGeom
+    stage = Usd.Stage.Open(path)
+    xformables = [p for p in stage.Traverse() if p.IsA(UsdGeom.Xformable)]
+    for t in range(1, TIME_CODES + 1, 4):
+        cache = UsdGeom.XformCache(Usd.TimeCode(t))
+        for prim in xformables:
+            cache.GetLocalToWorldTransform(prim)
+    return len(xformables)
+
+
+def bench_compose(path):
+    """Pcp로 모든 prim index를 새로 계산 (stage population 없이 composition만)"""
+    from pxr import Sdf, Pcp
+    layer = Sdf.Layer.FindOrOpen(path)
+    cache = Pcp.Cache(Pcp.LayerStackIdentifier(layer))
+    count = 0
+    pending = [Sdf.Path.absoluteRootPath]
+    while pending:
+        prim_path = pending.pop()
+        index, _ = cache.ComputePrimIndex(prim_path)
+        names, _ = index.ComputePrimChildNames()
+        pending.extend(prim_path.AppendChild(name) for name in names)
+        count += 1
+    return count
+
+
+def bench_value_resolve(path):
+    """시간 샘플 속성을 모든 time code에서 계산"""
+    from pxr import Usd
+    stage = Usd.Stage.Open(path)
+    queries = [Usd.AttributeQuery(attr) for prim in stage.Traverse()
+               for attr in prim.GetAttributes() if attr.GetNumTimeSamples() > 0]
+    for t in range(1, LONG_TIME_CODES + 1):
+        time_code = Usd.TimeCode(t)
+        for query in queries:
+            query.Get(time_code)
+    return len(queries)
+
+
+def bench_mesh_read(path):
+    """대형 mesh의 topology/points 읽기"""
+    from pxr import Usd, UsdGeom
+    stage = Usd.Stage.Open(path)
+    points = 0
+    for prim in stage.Traverse():
+        if prim.IsA(UsdGeom.Mesh):
+            mesh = UsdGeom.Mesh(prim)
+            points += len(mesh.GetPointsAttr().Get())
+            mesh.GetFaceVertexIndicesAttr().Get()
+            mesh.GetFaceVertexCountsAttr().Get()
+    return points
+
+
+def _usdcat():
+    candidate = os.path.join(os.environ.get("USD_ROOT", ""), "bin", "usdcat")
+    return candidate if os.path.isfile(candidate) else shutil.which("usdcat")
+
+
+def _convert(src, dst, flatten=False):
+    cmd = [sys.executable, _usdcat(), src, "-o", dst] + (["--flatten"] if flatten else [])
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return os.path.getsize(dst)
+
+
+def _bench_output(path, ext):
+    out_dir = os.path.join(os.path.dirname(path), f".out-{os.getpid()}")
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ext)
+
+
+def bench_usdcat_to_usdc(path):
+    """usdcat usda → crate (composed stage는 flatten)"""
+    return _convert(path, _bench_output(path, ".usdc"), flatten=True)
+
+
+def bench_usdcat_to_usda(path):
+    """usdcat crate → usda"""
+    crate = _bench_output(path, ".usdc")
+    if not os.path.isfile(crate):
+        _convert(path, crate, flatten=True)
+    return _convert(crate, _bench_output(path, ".roundtrip.usda"))
+
+
+# (이름, scene, 함수)
+BENCHMARKS = [
+    ("open_composed", "composed", bench_open),
+    ("traverse_composed", "composed", bench_traverse),
+    ("compose_composed", "composed", bench_compose),
+    ("xform_resolve_composed", "composed", bench_xform_resolve),
+    ("open_deep", "deep", bench_open),
+    ("traverse_deep", "deep", bench_traverse),
+    ("open_instancing", "instancing", bench_open),
+    ("traverse_instancing", "instancing", bench_traverse),
+    ("open_sublayers", "sublayers", bench_open),
+    ("compose_sublayers", "sublayers", bench_compose),
+    ("open_timesamples", "timesamples", bench_open),
+    ("value_resolve_timesamples", "timesamples", bench_value_resolve),
+    ("xform_resolve_timesamples", "timesamples", bench_xform_resolve),
+    ("open_mesh", "mesh", bench_open),
+    ("mesh_read", "mesh", bench_mesh_read),
+    ("usdcat_to_usdc_composed", "composed", bench_usdcat_to_usdc),
+    ("usdcat_to_usda_composed", "composed", bench_usdcat_to_usda),
+    ("usdcat_to_usdc_mesh", "mesh", bench_usdcat_to_usdc),
+    ("usdcat_to_usda_mesh", "mesh", bench_usdcat_to_usda),
+]
+
+
+def _timed(func, path, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times),
+            "runs": [round(t, 6) for t in times], "result": result}
+
+
+def environment_info():
+    from pxr import Usd
+    return {
+        "usd_version": ".".join(map(str, Usd.GetVersion())),
+        "usd_root": os.environ.get("USD_ROOT", ""),
+        "python": sys.version.split()[0],
+        "host": socket.gethostname(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _run_suite(args):
+    """현재 프로세스에서 선택한 벤치마크 실행 → {이름: 결과}"""
+    results = {}
+    for name, scene, func in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        path = scene_path(args.workdir, scene, args.scale)
+        func(path)  # warm-up (파일 캐시, 플러그인 로딩)
+        results[name] = _timed(func, path, args.repeat)
+        print(f"  {name:<32} min {results[name]['min_s'] * 1000:9.1f}ms  "
+              f"median {results[name]['median_s'] * 1000:9.1f}ms")
+    for out_dir in glob.glob(os.path.join(args.workdir, "*", f".out-{os.getpid()}")):
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+def _run_threads(args):
+    """thread 수(PXR_WORK_THREAD_LIMIT)마다 새 프로세스에서 suite 실행 → {이름@Nt: 결과}"""
+    results = {}
+    for count in args.threads:
+        print(f"--- {count} thread(s) ---")
+        sys.stdout.flush()
+        out = os.path.join(args.workdir, f".threads-{os.getpid()}-{count}.json")
+        cmd = [sys.executable, os.path.abspath(__file__), "run", "--scale", str(args.scale),
+               "--repeat", str(args.repeat), "--workdir", args.workdir, "--out", out]
+        if args.only:
+            cmd += ["--only"] + args.only
+        env = dict(os.environ, PXR_WORK_THREAD_LIMIT=str(count))
+        subprocess.run(cmd, env=env, check=True)
+        with open(out, "r") as f:
+            child = json.load(f)
+        os.remove(out)
+        for name, result in child["results"].items():
+            results[f"{name}@{count}t"] = result
+    return results
+
+
+def run(args):
+    os.makedirs(args.workdir, exist_ok=True)
+    results = _run_threads(args) if args.threads else _run_suite(args)
+    report = {"env": environment_info(), "scale": args.scale, "repeat": args.repeat,
+              "threads": args.threads or [], "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Benchmark results: {args.out}")
+    return report
+
+
+def probe(args):
+    """(내부용) 현재 프로세스 allocator/thread 설정으로 stage open 측정 → JSON 한 줄 출력"""
+    path = scene_path(args.workdir, "composed", args.scale)
+    bench_open(path)  # warm-up
+    timing = _timed(bench_open, path, args.repeat)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    print(json.dumps({"median_s": timing["median_s"], "min_s": timing["min_s"],
+                      "peak_rss_mb": peak_mb}))
+
+
+def _default_thread_counts():
+    counts, n = [], 1
+    while n < multiprocessing.cpu_count():
+        counts.append(n)
+        n *= 4
+    return counts + [multiprocessing.cpu_count()]
+
+
+def allocators(args):
+    """시스템 allocator와 LD_PRELOAD 한 allocator들의 stage open 시간/peak RSS/thread 확장성 비교.
+    반환: 첫 번째 --lib allocator가 최대 thread 수에서 min_gain 이상 빠르면 True"""
+    threads = args.threads or _default_thread_counts()
+    scene_path(args.workdir, "composed", args.scale)  # 측정 전에 생성
+    candidates = [("system", "")] + [(os.path.basename(lib), lib) for lib in args.lib]
+    results = {}
+    print(f"=== Allocator comparison (composed scale {args.scale}, threads {threads}) ===")
+    print(f"  {'allocator':<28} {'threads':>7} {'median ms':>10} {'speedup':>8} {'peak RSS MB':>12}")
+    for label, lib in candidates:
+        env = os.environ.copy()
+        preload = [p for p in env.get("LD_PRELOAD", "").split(":") if p]
+        if lib:
+            env["LD_PRELOAD"] = ":".join([lib] + preload)
+        rows = {}
+        for count in threads:
+            env["PXR_WORK_THREAD_LIMIT"] = str(count)
+            cmd = [sys.executable, os.path.abspath(__file__), "_probe", "--scale", str(args.scale),
+                   "--repeat", str(args.repeat), "--workdir", args.workdir]
+            out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout
+            rows[str(count)] = json.loads(out.strip().splitlines()[-1])
+            single = rows[str(threads[0])]["median_s"]
+            row = rows[str(count)]
+            print(f"  {label:<28} {count:>7} {row['median_s'] * 1000:>10.1f} "
+                  f"{single / row['median_s']:>7.2f}x {row['peak_rss_mb']:>12}")
+        results[label] = {"library": lib, "threads": rows}
+
+    top = str(threads[-1])
+    base = results["system"]["threads"][top]["median_s"]
+    chosen_label = candidates[1][0] if len(candidates) > 1 else "system"
+    chosen = results[chosen_label]["threads"][top]["median_s"]
+    gain = (base - chosen) / base if base else 0.0
+    passed = gain >= args.min_gain
+    print(f"  {chosen_label}: {gain * 100:+.1f}% vs system at {top} threads "
+          f"(required {args.min_gain * 100:+.1f}%) -> {'PASS' if passed else 'FAIL'}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"env": environment_info(), "scale": args.scale, "results": results,
+                       "gain": gain, "passed": passed}, f, indent=2)
+            f.write("\n")
+    return passed
+
+
+def compare(before, after, threshold=0.05):
+    """median 기준 비교 출력, threshold보다 느려진 벤치마크 목록 반환"""
+    print(f"=== before: {before['env'].get('usd_root')} ({before['env'].get('created')})")
+    print(f"=== after:  {after['env'].get('usd_root')} ({after['env'].get('created')})")
+    print(f"  {'benchmark':<32} {'before ms':>10} {'after ms':>10} {'change':>9}")
+    regressions = []
+    res_a, res_b = before["results"], after["results"]
+    for name in [n for n in res_a if n in res_b]:
+        a, b = res_a[name]["median_s"], res_b[name]["median_s"]
+        change = (b - a) / a if a else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<32} {a * 1000:>10.1f} {b * 1000:>10.1f} {change * 100:>+8.1f}%{flag}")
+    for name in sorted(set(res_a) ^ set(res_b)):
+        print(f"  {name:<32} only in {'before' if name in res_a else 'after'}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="usd runtime benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="run the benchmark suite")
+    p_run.add_argument("--out", help="write results JSON")
+    p_run.add_argument("--scale", type=int, default=4, help="scene size multiplier")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--only", nargs="+", help="benchmark names to run")
+    p_run.add_argument("--workdir", default=DEFAULT_WORKDIR,
+                       help="directory for generated scenes")
+    p_run.add_argument("--threads", type=int, nargs="+",
+                       help="run the suite once per PXR_WORK_THREAD_LIMIT value")
+    p_run.add_argument("--baseline", help="compare against a stored results JSON "
+                                          "(exit 1 on regression)")
+    p_run.add_argument("--threshold", type=float, default=0.05)
+    sub.add_parser("list", help="list benchmarks")
+    p_cmp = sub.add_parser("compare", help="compare two results JSON files")
+    p_cmp.add_argument("before")
+    p_cmp.add_argument("after")
+    p_cmp.add_argument("--threshold", type=float, default=0.05,
+                       help="relative slowdown reported as regression (default 0.05)")
+    p_alloc = sub.add_parser("allocators",
+                             help="compare allocators (LD_PRELOAD) on a large composed stage")
+    p_alloc.add_argument("--lib", action="append", default=[],
+                         help="allocator library to preload (repeatable)")
+    p_alloc.add_argument("--threads", type=int, nargs="+",
+                         help="PXR_WORK_THREAD_LIMIT values (default: 1, 4, 16 ... CPU count)")
+    p_alloc.add_argument("--scale", type=int, default=40)
+    p_alloc.add_argument("--repeat", type=int, default=3)
+    p_alloc.add_argument("--min-gain", type=float, default=0.0,
+                         help="required relative speedup of the first --lib at max threads")
+    p_alloc.add_argument("--out", help="write results JSON")
+    p_probe = sub.add_parser("_probe")
+    for p in (p_alloc, p_probe):
+        p.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    p_probe.add_argument("--scale", type=int, default=40)
+    p_probe.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args)
+        if args.baseline:
+            with open(args.baseline, "r") as f:
+                return 1 if compare(json.load(f), report, args.threshold) else 0
+        return 0
+    if args.command == "list":
+        for name, scene, func in BENCHMARKS:
+            print(f"  {name:<32} {scene:<12} {(func.__doc__ or '').strip()}")
+        return 0
+    if args.command == "_probe":
+        probe(args)
+        return 0
+    if args.command == "allocators":
+        return 0 if allocators(args) else 1
+    with open(args.before, "r") as f:
+        before = json.load(f)
+    with open(args.after, "r") as f:
+        after = json.load(f)
+    return 1 if compare(before, after, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
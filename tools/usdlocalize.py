@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 usdlocalize - 팜 노드 로컬 디스크 패키지 캐시
+NFS의 variant 설치 트리를 노드 로컬 디스크로 복사해 두고, 작업이 시작될 때마다 수백 MB의
+.so/Python/plugin 리소스를 파일 서버에서 읽지 않도록 한다. 캐시 항목은 설치 시 생성한
+manifest(.usd_manifest.json)의 해시로 식별하므로 재설치되면 새 항목이 만들어지고,
+package.py commands()는 완성된 로컬 사본이 있을 때만 그쪽을 사용한다.
+
+사용 중인 항목은 `exec` 가 command 실행 내내 잡고 있는 공유 flock(.locks/<key>.use.lock)으로
+표시되며 evict는 이 lock이 걸린 항목을 지우지 않는다. exec 없이 쓰는 프로세스는 마지막
+populate/exec 이후 --min-idle 동안만 보호된다.
+
+사용:
+    usdlocalize populate [root] [--max-size 50G]   # 로컬 사본 생성 (이미 있으면 사용 시각만 갱신)
+    usdlocalize exec [--root root] -- <command>    # 로컬 사본을 사용 중으로 잡고 command 실행
+    usdlocalize status [root]                      # 캐시 항목/크기/마지막 사용 시각/사용 중 여부
+    usdlocalize evict [--max-size 50G]             # 크기 한도까지 오래 안 쓴 항목 삭제
+    usdlocalize manifest <root>                    # manifest 재생성 (rezbuild.py가 설치 시 호출)
+
+환경변수:
+    USD_LOCALIZE_DIR        로컬 캐시 디렉토리 (기본 /var/tmp/usd-localize)
+    USD_LOCALIZE_MAX_SIZE   캐시 최대 크기 (기본 50G)
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import contextlib
+
+MANIFEST = ".usd_manifest.json"
+MANIFEST_DIGEST = ".usd_manifest.sha256"
+MARKER = ".usd_localized"
+DEFAULT_CACHE_DIR = "/var/tmp/usd-localize"
+DEFAULT_MAX_SIZE = "50G"
+DEFAULT_MIN_IDLE = 3600  # 이 시간(초) 안에 사용된 항목은 eviction 대상에서 제외
+KEY_LENGTH = 20
+CHUNK = 1 << 20
+
+
+def _parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    text = str(text).strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_dir():
+    return os.environ.get("USD_LOCALIZE_DIR") or DEFAULT_CACHE_DIR
+
+
+# === manifest (설치 시 생성) ===
+
+def write_manifest(root, label=""):
+    """root 아래 파일/symlink 목록과 sha256을 manifest로 기록, manifest 해시 반환.
+
+    생성 시각 등 가변 정보는 넣지 않아 같은 내용의 트리는 같은 해시(캐시 key)를 가짐"""
+    entries = []
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames + [d for d in dirnames
+                                        if os.path.islink(os.path.join(dirpath, d))]):
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root)
+            if rel in (MANIFEST, MANIFEST_DIGEST):
+                continue
+            if os.path.islink(path):
+                entries.append({"path": rel, "link": os.readlink(path)})
+                continue
+            st = os.stat(path)
+            entries.append({"path": rel, "size": st.st_size, "mode": st.st_mode & 0o7777,
+                            "sha256": _sha256(path)})
+            total += st.st_size
+    manifest = {"label": label, "files": len(entries), "bytes": total, "entries": entries}
+    path = os.path.join(root, MANIFEST)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+        f.write("\n")
+    digest = _sha256(path)
+    with open(os.path.join(root, MANIFEST_DIGEST), "w") as f:
+        f.write(digest + "\n")
+    print(f"Install manifest: {len(entries)} file(s), {total / (1 << 20):.1f} MB, key {digest[:KEY_LENGTH]}")
+    return {"key": digest[:KEY_LENGTH], "files": len(entries), "bytes": total}
+
+
+def manifest_key(root):
+    """설치 트리의 캐시 key (manifest가 없으면 None)"""
+    try:
+        with open(os.path.join(root, MANIFEST_DIGEST), "r") as f:
+            return f.read().strip()[:KEY_LENGTH] or None
+    except OSError:
+        return None
+
+
+# === 로컬 캐시 ===
+
+def _lock_path(cache, name):
+    lock_dir = os.path.join(cache, ".locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    return os.path.join(lock_dir, f"{name}.lock")
+
+
+@contextlib.contextmanager
+def _locked(cache, name, blocking=True):
+    """<cache>/.locks/<name>.lock flock (blocking=False 이고 잠겨 있으면 None)"""
+    with open(_lock_path(cache, name), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield None
+            return
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def acquire_use(cache, key):
+    """항목 key의 사용 lock(공유 flock)을 잡은 fd 반환 - 닫힐 때까지(exec된 자식 포함) evict 제외"""
+    fd = os.open(_lock_path(cache, f"{key}.use"), os.O_RDWR | os.O_CREAT, 0o666)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    return fd
+
+
+def in_use(cache, key):
+    """다른 프로세스가 항목 key의 사용 lock을 잡고 있는지"""
+    with _locked(cache, f"{key}.use", blocking=False) as lock:
+        return lock is None
+
+
+def _read_marker(entry):
+    try:
+        with open(os.path.join(entry, MARKER), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def entries(cache):
+    """완성된 캐시 항목 [(key, 경로, marker, 마지막 사용 시각)] (오래된 순)"""
+    result = []
+    if not os.path.isdir(cache):
+        return result
+    for name in os.listdir(cache):
+        path = os.path.join(cache, name)
+        marker = _read_marker(path) if not name.startswith(".") else None
+        if marker:
+            result.append((name, path, marker, os.stat(os.path.join(path, MARKER)).st_mtime))
+    result.sort(key=lambda e: e[3])
+    return result
+
+
+def _copy_verified(src, dst, expected_sha):
+    """src → dst 복사하며 sha256 계산 (공유 트리를 한 번만 읽음)"""
+    h = hashlib.sha256()
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for chunk in iter(lambda: fin.read(CHUNK), b""):
+            h.update(chunk)
+            fout.write(chunk)
+    if h.hexdigest() != expected_sha:
+        raise ValueError(f"content differs from install manifest: {src}")
+
+
+def _remove_entry(cache, path):
+    """다른 작업이 반쯤 지워진 트리를 보지 않도록 이름을 바꾼 뒤 삭제"""
+    trash = os.path.join(cache, f".trash-{os.path.basename(path)}-{os.getpid()}")
+    os.rename(path, trash)
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+def evict(cache, max_bytes, keep=(), min_idle=DEFAULT_MIN_IDLE):
+    """크기 한도를 넘으면 마지막 사용이 오래된 항목부터 삭제
+    (사용 lock이 걸린 항목, min_idle 안에 쓴 항목, keep 제외)"""
+    with _locked(cache, "evict"):
+        for name in os.listdir(cache) if os.path.isdir(cache) else []:
+            if name.startswith(".trash-"):
+                shutil.rmtree(os.path.join(cache, name), ignore_errors=True)
+        items = entries(cache)
+        total = sum(marker.get("bytes", 0) for _, _, marker, _ in items)
+        removed = []
+        now = time.time()
+        for key, path, marker, used in items:
+            if total <= max_bytes:
+                break
+            if key in keep or now - used < min_idle:
+                continue
+            # 사용 lock을 배타적으로 잡은 상태에서 삭제 → 삭제 중에 새 사용자가 잡을 수 없음
+            with _locked(cache, f"{key}.use", blocking=False) as lock:
+                if lock is None:
+                    continue
+                _remove_entry(cache, path)
+            total -= marker.get("bytes", 0)
+            removed.append(key)
+            print(f"  evicted {key} ({marker.get('label', '')}, "
+                  f"{marker.get('bytes', 0) / (1 << 20):.1f} MB)")
+        if total > max_bytes:
+            print(f"WARNING: localize cache still {total / (1 << 30):.1f} GB "
+                  f"(limit {max_bytes / (1 << 30):.1f} GB), remaining entries are in use")
+    return removed
+
+
+def populate(root, cache, max_bytes, wait=True, min_idle=DEFAULT_MIN_IDLE):
+    """root의 로컬 사본 경로 반환 (없으면 생성). 실패하거나 wait=False 로 다른 작업이
+    생성 중이면 None → 호출자는 공유 트리를 사용"""
+    key = manifest_key(root)
+    if not key:
+        print(f"WARNING: no install manifest in {root}, cannot localize")
+        return None
+    entry = os.path.join(cache, key)
+    os.makedirs(cache, exist_ok=True)
+    if _read_marker(entry):
+        os.utime(os.path.join(entry, MARKER))
+        return entry
+
+    # 같은 key는 한 작업만 복사하고 나머지는 완료될 때까지 대기
+    with _locked(cache, key, blocking=wait) as lock:
+        if lock is None:
+            print(f"  {key} is being localized by another task, using the shared tree")
+            return None
+        if _read_marker(entry):
+            os.utime(os.path.join(entry, MARKER))
+            return entry
+        with open(os.path.join(root, MANIFEST), "r") as f:
+            manifest = json.load(f)
+        needed = manifest["bytes"]
+        evict(cache, max(0, max_bytes - needed), keep={key}, min_idle=min_idle)
+        if shutil.disk_usage(cache).free < needed * 1.05:
+            print(f"WARNING: not enough local disk for {key} ({needed / (1 << 20):.1f} MB), "
+                  "using the shared tree")
+            return None
+
+        tmp = os.path.join(cache, f".tmp-{key}")
+        shutil.rmtree(tmp, ignore_errors=True)  # 중단된 이전 복사 (lock을 가진 것은 이 프로세스뿐)
+        start = time.time()
+        try:
+            for item in manifest["entries"]:
+                dst = os.path.join(tmp, item["path"])
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if "link" in item:
+                    os.symlink(item["link"], dst)
+                    continue
+                _copy_verified(os.path.join(root, item["path"]), dst, item["sha256"])
+                os.chmod(dst, item["mode"])
+            for name in (MANIFEST, MANIFEST_DIGEST):
+                shutil.copy2(os.path.join(root, name), os.path.join(tmp, name))
+        except (OSError, ValueError) as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            print(f"WARNING: localizing {root} failed ({e}), using the shared tree")
+            return None
+        marker = {"key": key, "label": manifest.get("label", ""), "bytes": needed,
+                  "source": os.path.realpath(root), "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        # marker가 있어야 commands()가 사용하므로 마지막에 기록하고 디렉토리 이름을 바꿈
+        with open(os.path.join(tmp, MARKER), "w") as f:
+            json.dump(marker, f, indent=2)
+        os.rename(tmp, entry)
+    print(f"Localized {manifest.get('label') or root}: {manifest['files']} file(s), "
+          f"{needed / (1 << 20):.1f} MB in {time.time() - start:.1f}s -> {entry}")
+    return entry
+
+
+def run_localized(root, cache, max_bytes, cmd, min_idle=DEFAULT_MIN_IDLE):
+    """로컬 사본을 만들거나 재사용하고 사용 lock을 잡은 채 cmd로 exec (lock은 cmd 종료 시 해제).
+    로컬 사본을 쓸 수 없으면 lock 없이 실행 (환경은 rez resolve 때 정해진 그대로)"""
+    for _ in range(3):
+        entry = populate(root, cache, max_bytes, min_idle=min_idle)
+        if not entry:
+            break
+        fd = acquire_use(cache, os.path.basename(entry))
+        # lock을 잡기 전에 evict된 경우 다시 생성
+        if _read_marker(entry):
+            os.set_inheritable(fd, True)
+            break
+        os.close(fd)
+    local_root = os.environ.get("USD_ROOT", "")
+    if local_root.startswith(cache.rstrip(os.sep) + os.sep) and not _read_marker(local_root):
+        print(f"WARNING: {local_root} is no longer localized; "
+              f"re-resolve the environment to use the shared tree")
+    os.execvp(cmd[0], cmd)
+
+
+def status(cache, root=None):
+    key = manifest_key(root) if root else None
+    items = entries(cache)
+    total = sum(marker.get("bytes", 0) for _, _, marker, _ in items)
+    print(f"=== localize cache {cache}: {len(items)} entr(ies), {total / (1 << 30):.2f} GB ===")
+    for item_key, _, marker, used in reversed(items):
+        flag = "  <- current" if item_key == key else ""
+        if in_use(cache, item_key):
+            flag += "  (in use)"
+        print(f"  {item_key}  {marker.get('bytes', 0) / (1 << 20):9.1f} MB  "
+              f"used {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}  "
+              f"{marker.get('label', '')}{flag}")
+    if root and key and not any(k == key for k, _, _, _ in items):
+        print(f"  {root} ({key}) is not localized")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Node-local cache for the usd package")
+    sub = parser.add_subparsers(dest="command", required=True)
+    shared_root = os.environ.get("USD_SHARED_ROOT") or os.environ.get("USD_ROOT", "")
+    for name, help_text in (("populate", "copy the variant to local disk"),
+                            ("exec", "run a command holding the local copy in use"),
+                            ("status", "list cache entries"),
+                            ("evict", "evict least recently used entries"),
+                            ("manifest", "write the install manifest")):
+        p = sub.add_parser(name, help=help_text)
+        if name == "exec":
+            p.add_argument("--root", default=shared_root,
+                           help="shared usd variant root (default: $USD_SHARED_ROOT)")
+        elif name != "evict":
+            p.add_argument("root", nargs="?", default=shared_root,
+                           help="shared usd variant root (default: $USD_SHARED_ROOT)")
+        p.add_argument("--cache-dir", default=cache_dir())
+        p.add_argument("--max-size", default=os.environ.get("USD_LOCALIZE_MAX_SIZE",
+                                                            DEFAULT_MAX_SIZE))
+        p.add_argument("--min-idle", type=int, default=DEFAULT_MIN_IDLE,
+                       help="never evict entries used within this many seconds")
+        if name == "populate":
+            p.add_argument("--no-wait", action="store_true",
+                           help="return immediately if another task is localizing")
+        if name == "manifest":
+            p.add_argument("--label", default="")
+        if name == "exec":
+            p.add_argument("cmd", nargs=argparse.REMAINDER, help="-- command [args...]")
+    args = parser.parse_args(argv)
+    max_bytes = _parse_size(args.max_size)
+
+    if args.command == "evict":
+        evict(args.cache_dir, max_bytes, min_idle=args.min_idle)
+        return 0
+    if not args.root or not os.path.isdir(args.root):
+        parser.error(f"usd root not found: {args.root!r}")
+    if args.command == "manifest":
+        write_manifest(args.root, args.label)
+    elif args.command == "status":
+        status(args.cache_dir, args.root)
+    elif args.command == "exec":
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        if not cmd:
+            parser.error("exec: missing command")
+        run_localized(args.root, args.cache_dir, max_bytes, cmd, min_idle=args.min_idle)
+    else:
+        entry = populate(args.root, args.cache_dir, max_bytes, wait=not args.no_wait,
+                         min_idle=args.min_idle)
+        if not entry:
+            return 1
+        print(entry)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+usd 25.11 usdplugindex - 사전 병합된 Plug registry index
+Plug가 등록하는 plugInfo.json (registration root인 USD lib/usd, plugin/usd, Arnold USD
+플러그인 root에서 Includes를 따라간 파일)의 plugin 항목을 lib/usd/plugInfo.json 하나에
+Includes 없이 직접 넣어, 프로세스 시작 시 Plug가 NFS 디렉토리를 돌며 파일 수십 개를 읽는
+대신 파일 하나만 읽도록 한다.
+
+lib/usd는 Plug의 기본 검색 경로이므로 기본 resolve가 그대로 병합 파일을 읽는다
+(PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH 불필요). 각 registration root의 원래 plugInfo.json은
+plugInfo.source.json 으로 옮겨 Plug가 같은 plugin을 두 번 등록하지 않게 하고, 재생성/검증은
+이 원본에서 Includes를 따라간다.
+
+사용:
+    usdplugindex build <root>            # 병합 plugInfo.json + 원본 해시 sidecar 생성
+    usdplugindex check <root>            # 병합 파일이 설치 트리와 일치하는지 검증 (stale → exit 1)
+    usdplugindex bench <root> [--runs N] # 원본 디렉토리 스캔 vs 병합 파일 시작 시간 비교
+"""
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import statistics
+import subprocess
+
+INDEX_REL = os.path.join("lib", "usd", "plugInfo.json")
+META_REL = os.path.join("lib", "usd", "plugInfoIndex.meta.json")
+PLUGINFO = "plugInfo.json"
+# 병합 전 registration root의 원래 plugInfo.json (Plug는 이 이름을 읽지 않음)
+SOURCE_PLUGINFO = "plugInfo.source.json"
+GENERATED_HEADER = "# generated by usdplugindex from plugInfo.source.json - do not edit\n"
+# Plug 기본 검색 경로 (libusd_plug.so 기준 usd, ../plugin/usd)와
+# arnold-usd 설치 prefix (PREFIX_PLUGINS, PREFIX_SCHEMA) - commands()가 등록하는 root와 같음
+STANDARD_ROOTS = (os.path.join("lib", "usd"), os.path.join("plugin", "usd"))
+ARNOLD_PLUGIN_ROOTS = ("plugin", "schema")
+REGISTRATION_ROOTS = STANDARD_ROOTS + ARNOLD_PLUGIN_ROOTS
+
+BENCH_SCRIPT = (
+    "import time; t = time.time(); "
+    "from pxr import Plug; n = len(Plug.Registry().GetAllPlugins()); "
+    "print(n, time.time() - t)"
+)
+
+
+def read_pluginfo(path):
+    """plugInfo.json 읽기 (Plug와 같이 '#' 주석 줄 허용)"""
+    with open(path, "r") as f:
+        lines = [line for line in f if not line.lstrip().startswith("#")]
+    return json.loads("".join(lines))
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def registration_roots(root):
+    """plugInfo.json이 있는 registration root 디렉토리 (REGISTRATION_ROOTS 순서).
+    병합 후에는 lib/usd 하나"""
+    return [os.path.join(root, r) for r in REGISTRATION_ROOTS
+            if os.path.isfile(os.path.join(root, r, PLUGINFO))]
+
+
+def _is_generated(path):
+    try:
+        with open(path, "r") as f:
+            return f.readline() == GENERATED_HEADER
+    except OSError:
+        return False
+
+
+def source_files(root):
+    """registration root별 원래 plugInfo.json (병합 후에는 plugInfo.source.json)"""
+    result = []
+    for rel in REGISTRATION_ROOTS:
+        source = os.path.join(root, rel, SOURCE_PLUGINFO)
+        current = os.path.join(root, rel, PLUGINFO)
+        if os.path.isfile(current) and not _is_generated(current):
+            result.append(current)
+        elif os.path.isfile(source):
+            result.append(source)
+    return result
+
+
+def _included_files(path, data):
+    """Includes 패턴이 가리키는 plugInfo.json 목록 ('/'로 끝나면 디렉토리, 정렬)"""
+    base = os.path.dirname(path)
+    result = []
+    for pattern in data.get("Includes", []):
+        full = os.path.join(base, pattern)
+        if full.endswith("/"):
+            full += PLUGINFO
+        result.extend(sorted(os.path.normpath(p) for p in glob.glob(full)))
+    return result
+
+
+def discover_pluginfo_files(root):
+    """Plug처럼 registration root의 plugInfo.json에서 Includes를 따라가며 읽는 파일
+    [(path, data)] (방문 순서, 같은 파일은 한 번). Include 되지 않는 파일(examples,
+    tests, share/ 등)은 Plug가 등록하지 않으므로 넣지 않음"""
+    found, seen = [], set()
+
+    def visit(path):
+        path = os.path.normpath(path)
+        if path in seen or not os.path.isfile(path):
+            return
+        seen.add(path)
+        data = read_pluginfo(path)
+        found.append((path, data))
+        for included in _included_files(path, data):
+            visit(included)
+
+    for path in source_files(root):
+        visit(path)
+    return found
+
+
+def collect(root):
+    """(plugins, sources)
+
+    plugins: 병합 파일에 넣을 plugin 항목 (Root는 lib/usd 기준 상대 경로로 변환)
+    sources: {상대 경로: sha256} (원본에서 Includes를 따라 읽은 plugInfo.json)"""
+    index_dir = os.path.dirname(os.path.join(root, INDEX_REL))
+    plugins = []
+    sources = {}
+    for path, data in discover_pluginfo_files(root):
+        sources[os.path.relpath(path, root)] = _sha256(path)
+        base = os.path.dirname(path)
+        for plugin in data.get("Plugins", []):
+            entry = dict(plugin)
+            plugin_root = os.path.normpath(os.path.join(base, plugin.get("Root", ".")))
+            entry["Root"] = os.path.relpath(plugin_root, index_dir)
+            plugins.append(entry)
+    return plugins, sources
+
+
+def build_index(root):
+    """registration root의 plugInfo.json을 plugInfo.source.json으로 옮기고 병합한
+    lib/usd/plugInfo.json과 sidecar(meta) 생성, plugin 수 반환"""
+    # 원본 보존: 설치가 새로 쓴 plugInfo.json이 있으면 그것이 최신 원본
+    for path in source_files(root):
+        if os.path.basename(path) == PLUGINFO:
+            os.replace(path, os.path.join(os.path.dirname(path), SOURCE_PLUGINFO))
+    plugins, sources = collect(root)
+    index_path = os.path.join(root, INDEX_REL)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp = f"{index_path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(GENERATED_HEADER)
+        json.dump({"Plugins": plugins}, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, index_path)
+    meta = {
+        "index_sha256": _sha256(index_path),
+        "sources": sources,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(root, META_REL), "w") as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"plugInfo index: {len(plugins)} plugin(s) from {len(sources)} file(s) -> {index_path}")
+    return len(plugins)
+
+
+def check_index(root):
+    """index 검증 결과 문제 목록 (빈 목록이면 정상)"""
+    index_path = os.path.join(root, INDEX_REL)
+    meta_path = os.path.join(root, META_REL)
+    if not _is_generated(index_path) or not os.path.isfile(meta_path):
+        return [f"index not found: {index_path}"]
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+
+    problems = []
+    if _sha256(index_path) != meta.get("index_sha256"):
+        problems.append("index file modified after it was generated")
+    # 병합되지 않은 plugInfo.json이 registration root에 있으면 Plug가 중복 등록
+    for reg_root in registration_roots(root):
+        path = os.path.join(reg_root, PLUGINFO)
+        if path != index_path:
+            problems.append(f"unmerged plugInfo.json: {os.path.relpath(path, root)}")
+    plugins, sources = collect(root)
+    recorded = meta.get("sources", {})
+    for rel in sorted(set(sources) | set(recorded)):
+        if rel not in recorded:
+            problems.append(f"new plugInfo.json not in index: {rel}")
+        elif rel not in sources:
+            problems.append(f"indexed plugInfo.json removed: {rel}")
+        elif sources[rel] != recorded[rel]:
+            problems.append(f"plugInfo.json changed since indexing: {rel}")
+
+    index_dir = os.path.dirname(index_path)
+    seen = set()
+    for plugin in read_pluginfo(index_path).get("Plugins", []):
+        name = plugin.get("Name", "?")
+        if name in seen:
+            problems.append(f"duplicate plugin name: {name}")
+        seen.add(name)
+        plugin_root = os.path.join(index_dir, plugin.get("Root", "."))
+        for key in ("LibraryPath", "ResourcePath"):
+            rel = plugin.get(key)
+            if rel and not os.path.exists(os.path.join(plugin_root, rel)):
+                problems.append(f"{name}: {key} does not exist: {rel}")
+    if len(seen) != len(plugins):
+        problems.append(f"index has {len(seen)} plugin(s), install tree has {len(plugins)}")
+    return problems
+
+
+def index_env(root, use_index, base_env=None):
+    """root의 plugin을 병합 파일로(use_index, commands()와 같은 구성) 또는 병합 전 원본
+    스캔으로 등록하는 환경. 원본 스캔은 병합 파일과 중복되지 않도록 기본 검색 경로를 끄므로
+    bench 비교용으로만 쓴다. PXR_PLUGINPATH_NAME의 다른 패키지 경로는 유지"""
+    env = dict(os.environ if base_env is None else base_env)
+    # 이 패키지의 경로는 빼고 나머지(다른 패키지의 schema 등)는 유지
+    real_root = os.path.realpath(root)
+    others = [p for p in env.get("PXR_PLUGINPATH_NAME", "").split(os.pathsep)
+              if p and os.path.commonpath([os.path.realpath(p), real_root]) != real_root]
+    if use_index:
+        ours = registration_roots(root)
+        env.pop("PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH", None)
+    else:
+        ours = source_files(root)
+        env["PXR_DISABLE_STANDARD_PLUG_SEARCH_PATH"] = "1"
+    env["PXR_PLUGINPATH_NAME"] = os.pathsep.join(ours + others)
+    return env
+
+
+def bench(root, runs, python):
+    """새 프로세스에서 Plug registry 초기화 시간 측정 (원본 디렉토리 스캔 vs 병합 파일)"""
+    results = {}
+    for label, use_index in (("scan", False), ("index", True)):
+        env = index_env(root, use_index)
+        plug_times, wall_times, counts = [], [], set()
+        for _ in range(runs):
+            start = time.time()
+            out = subprocess.run([python, "-c", BENCH_SCRIPT], env=env, check=True,
+                                 stdout=subprocess.PIPE, universal_newlines=True).stdout
+            wall_times.append(time.time() - start)
+            count, seconds = out.split()[-2:]
+            counts.add(int(count))
+            plug_times.append(float(seconds))
+        results[label] = {"plugins": sorted(counts), "plug_s": plug_times, "wall_s": wall_times}
+
+    print(f"=== Plug startup benchmark ({runs} run(s), {python}) ===")
+    print(f"  {'mode':<8} {'plugins':>8} {'plug median':>12} {'plug min':>10} {'wall median':>12}")
+    for label, r in results.items():
+        print(f"  {label:<8} {','.join(map(str, r['plugins'])):>8} "
+              f"{statistics.median(r['plug_s']) * 1000:>10.1f}ms {min(r['plug_s']) * 1000:>8.1f}ms "
+              f"{statistics.median(r['wall_s']) * 1000:>10.1f}ms")
+    scan, index = results["scan"], results["index"]
+    if scan["plugins"] != index["plugins"]:
+        print("WARNING: plugin count differs between scan and index (stale index?)")
+    saved = statistics.median(scan["plug_s"]) - statistics.median(index["plug_s"])
+    print(f"  index saves {saved * 1000:.1f}ms per process")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-merged plugInfo.json index for usd")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("build", "merge plugins into lib/usd/plugInfo.json"),
+                            ("check", "verify the merged file matches the install tree"),
+                            ("bench", "compare Plug startup: directory scan vs merged file")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("root", nargs="?", default=os.environ.get("USD_ROOT", ""),
+                       help="usd variant root (default: $USD_ROOT)")
+        if name == "bench":
+            p.add_argument("--runs", type=int, default=10)
+            p.add_argument("--python", default=sys.executable)
+    args = parser.parse_args(argv)
+    if not args.root or not os.path.isdir(args.root):
+        parser.error(f"usd root not found: {args.root!r}")
+    root = os.path.abspath(args.root)
+
+    if args.command == "build":
+        build_index(root)
+    elif args.command == "check":
+        problems = check_index(root)
+        for problem in problems:
+            print(f"  [STALE] {problem}")
+        if problems:
+            print(f"plugInfo index is stale, regenerate with: usdplugindex build {root}")
+            return 1
+        print(f"plugInfo index OK: {os.path.join(root, INDEX_REL)}")
+    else:
+        problems = check_index(root)
+        if problems:
+            sys.exit(f"plugInfo index is stale ({problems[0]}), run 'usdplugindex check'")
+        bench(root, args.runs, args.python)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())